@@ -36,9 +36,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'tasks',
 ]
 
 MIDDLEWARE = [
+    'tasks.middleware.RequestLatencyMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -119,3 +121,49 @@ STATICFILES_DIRS = [BASE_DIR / 'frontend']
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Analysis result cache (tasks/cache.py). "local" is an in-process LRU; "django"
+# stores results in the CACHES alias below so that all workers share them.
+TASK_ANALYSIS_CACHE = {
+    'BACKEND': 'local',
+    'MAX_ENTRIES': 256,
+    'MAX_BYTES': 64 * 1024 * 1024,
+    'ALIAS': 'default',
+}
+
+# Instrumentation (tasks/instrumentation.py). Requests sent with debug_timing pass
+# their per-phase timings to this callable; GET /api/tasks/metrics/ (Prometheus
+# text format) is only served to these addresses.
+TASK_TIMING_SINK = 'tasks.instrumentation.log_sink'
+TASK_METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Async analyze endpoint (tasks/admission.py): analyses run in a pool of WORKERS
+# processes (default: one per CPU; "thread" runs them in threads instead) with at
+# most QUEUE more waiting; further requests get 503 with Retry-After. Bodies up to
+# INLINE_MAX_BYTES are analyzed on the event loop.
+TASK_ASYNC_ANALYSIS = {
+    'EXECUTOR': 'process',
+    'WORKERS': None,
+    'QUEUE': 8,
+    'RETRY_AFTER': 2,
+    'INLINE_MAX_BYTES': 64 * 1024,
+}
+
+# Per-client suggestion payloads for GET /api/tasks/suggest/ (tasks/results.py).
+# "local" is per process; with several workers use "sqlite" (a file every worker
+# opens, PATH default BASE_DIR / 'task_results.sqlite3') or "shared_memory" (slots
+# in a memory-mapped file under /dev/shm, for the workers of one host).
+TASK_RESULT_STORE = {
+    'BACKEND': 'local',
+    'TTL': 24 * 3600,
+    'MAX_ENTRIES': 4096,
+}
+
+# GET /api/tasks/<id>/explain/ (tasks/explain.py) rebuilds a task's breakdown from
+# the columns of the analyses kept in memory: at most this many per process, each
+# holding its whole task table.
+TASK_EXPLAIN_CONTEXTS = 8
+
+# Binary task snapshots (tasks/snapshot.py, built with `manage.py build_snapshot`):
+# {"snapshot": "name"} analyze requests map name.tasksnap from this directory.
+TASK_SNAPSHOT_DIR = BASE_DIR / 'snapshots'
@@ -0,0 +1,59 @@
+"""
+Throughput of batch analysis as the process pool grows.
+
+    python benchmarks/bench_batch.py [projects] [max_workers]
+
+Scores the same set of projects (mostly small, a few large, like a nightly run)
+with 1, 2, 4, ... workers up to max_workers (default: CPU count) and reports
+projects/s, tasks/s and the speedup over a single in-process worker.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks.batch import analyze_batch  # noqa: E402
+
+
+def generate(n_projects, seed=0):
+    rnd = random.Random(seed)
+    projects = {}
+    for p in range(n_projects):
+        size = rnd.choice([5, 10, 20, 50, 100, 200]) if rnd.random() < 0.95 else rnd.choice([2000, 5000])
+        projects[f"project-{p}"] = [
+            {
+                "id": f"t{i}",
+                "title": f"Task {i}",
+                "due_date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                "importance": rnd.randint(1, 10),
+                "estimated_hours": rnd.choice([0.5, 1, 2, 3, 5, 8]),
+                "dependencies": [f"t{rnd.randrange(size)}" for _ in range(rnd.choice([0, 0, 1, 2]))],
+            }
+            for i in range(size)
+        ]
+    return projects
+
+
+def main(n_projects=2000, max_workers=None):
+    projects = generate(n_projects)
+    n_tasks = sum(len(t) for t in projects.values())
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {w for w in (2, 4, 8, 16, 32, 64) if w < max_workers})
+    print(f"{n_projects} projects, {n_tasks} tasks, {os.cpu_count()} CPUs")
+    base = None
+    for workers in counts:
+        t0 = time.perf_counter()
+        _, meta = analyze_batch(projects, workers=workers, top_k=10)
+        seconds = time.perf_counter() - t0
+        base = base or seconds
+        print(
+            f"  workers={workers:<3} chunks={meta['chunks']:<5} {seconds:>7.2f} s  "
+            f"{n_projects / seconds:>8.0f} projects/s  {n_tasks / seconds:>9.0f} tasks/s  {base / seconds:>5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,76 @@
+"""
+Cost of custom scoring components.
+
+    python benchmarks/bench_components.py [tasks]
+
+Times calculate_scores (100k tasks by default) with the built-in components
+only and with two formula components added, on both engines, and compares
+evaluating one formula column through its compiled function with calling
+eval() on the formula text for every task. Also reports how long compiling a
+formula takes and what a cached compile costs.
+"""
+import os
+import sys
+import time
+from datetime import date
+from importlib.util import find_spec
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.workloads import dense_dag  # noqa: E402
+from tasks import formula  # noqa: E402
+from tasks.components import TaskColumns  # noqa: E402
+from tasks.scoring import calculate_scores  # noqa: E402
+from tasks.table import TaskTable  # noqa: E402
+
+COMPONENTS = {
+    "quick": "exp(-hours / 4) if importance >= 7 else 0",
+    "load": {"formula": "sqrt(blocks) + dependency_count / 2", "normalize": "minmax"},
+}
+WEIGHTS = {"urgency": 0.3, "importance": 0.25, "dependencies": 0.1, "effort": 0.1, "quick": 0.15, "load": 0.1}
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(n):
+    tasks = dense_dag(n)
+    engines = ["python"] + (["numpy"] if find_spec("numpy") is not None else [])
+    print(f"{n} tasks")
+    for engine in engines:
+        builtin = best_of(lambda: calculate_scores(tasks, custom_weights=WEIGHTS, engine=engine, top_k=10))
+        custom = best_of(
+            lambda: calculate_scores(tasks, custom_weights=WEIGHTS, components=COMPONENTS, engine=engine, top_k=10)
+        )
+        print(f"  {engine:<7} built-in only {builtin * 1000:>8.1f} ms   + 2 formulas {custom * 1000:>8.1f} ms")
+
+    table, _ = TaskTable.build(tasks)
+    columns = TaskColumns(table, date.today(), table.outdegree())
+    text = COMPONENTS["quick"]
+    compiled = formula.compile_formula(text)
+    seconds = best_of(lambda: compiled.evaluate(columns))
+    print(f"one formula column, compiled function   {seconds * 1000:>8.1f} ms")
+    code = compile(text.replace("exp(", "_exp("), "<formula>", "eval")
+    rows = list(zip(columns.importance, columns.hours))
+    seconds = best_of(
+        lambda: [eval(code, {"_exp": formula._exp}, {"importance": i, "hours": h}) for i, h in rows]
+    )
+    print(f"one formula column, eval() per task      {seconds * 1000:>8.1f} ms")
+
+    formula.compile_formula.cache_clear()
+    t0 = time.perf_counter()
+    formula.compile_formula(text)
+    cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    formula.compile_formula(text)
+    print(f"compile: {cold * 1e6:.0f} us, cached: {(time.perf_counter() - t0) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
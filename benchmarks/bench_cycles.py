@@ -0,0 +1,64 @@
+"""
+Cycle detection benchmark: deep dependency chains and dense graphs.
+
+    python benchmarks/bench_cycles.py
+
+Deep chains used to overflow the recursion limit of the old recursive DFS;
+the iterative SCC engine should scale linearly with V+E.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks.scoring import find_cycle_groups  # noqa: E402
+
+
+def deep_chain(n, closed=False):
+    tasks = [{"id": f"t{i}", "dependencies": [f"t{i + 1}"]} for i in range(n - 1)]
+    tasks.append({"id": f"t{n - 1}", "dependencies": ["t0"] if closed else []})
+    return tasks
+
+
+def dense_graph(n, avg_degree, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {"id": f"t{i}", "dependencies": [f"t{rnd.randrange(n)}" for _ in range(avg_degree)]}
+        for i in range(n)
+    ]
+
+
+def dense_dag(n, avg_degree, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {"id": f"t{i}", "dependencies": [f"t{rnd.randrange(i)}" for _ in range(avg_degree)] if i else []}
+        for i in range(n)
+    ]
+
+
+def run(name, tasks, repeat=3):
+    edges = sum(len(t["dependencies"]) for t in tasks)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        groups = find_cycle_groups(tasks)
+        best = min(best, time.perf_counter() - start)
+    print(
+        f"{name:<28} V={len(tasks):>8} E={edges:>9} groups={len(groups):>6} "
+        f"{best * 1000:>9.1f} ms  {(len(tasks) + edges) / best / 1e6:>6.2f} M(V+E)/s"
+    )
+
+
+def main():
+    for n in (2_000, 20_000, 200_000):
+        run(f"chain {n}", deep_chain(n))
+        run(f"closed chain {n}", deep_chain(n, closed=True))
+    for n, degree in ((10_000, 10), (100_000, 10), (20_000, 50)):
+        run(f"dense cyclic {n}x{degree}", dense_graph(n, degree))
+        run(f"dense dag {n}x{degree}", dense_dag(n, degree))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark for due_date parsing.
+
+    python benchmarks/bench_dates.py [n ...]
+
+Parses a column of n due dates drawn from a few hundred distinct values (the
+shape of real payloads, plus a few timestamps, epoch integers and bad values)
+into date ordinals (what the scoring engines consume) with the former
+unmemoized parser, the memoized parse_date, and the bulk due_ordinals parser.
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks.dates import _parse_string, due_ordinals, parse_date  # noqa: E402
+
+
+def legacy_parse_date(value):
+    # the parser before memoization, for comparison
+    if value is None:
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(value).date()
+    except Exception:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except Exception:
+            return None
+
+
+def generate(n, distinct=300, seed=0):
+    rnd = random.Random(seed)
+    start = date(2026, 1, 1)
+    pool = [(start + timedelta(days=d)).isoformat() for d in range(distinct)]
+    pool += ["2026-03-01T09:30:00+02:00", "2026-03-01T23:00:00Z", 1772323200, 1772323200000, "not a date", "2026-02-30", ""]
+    return [rnd.choice(pool) if rnd.random() < 0.98 else None for _ in range(n)]
+
+
+def ordinals_with(parser):
+    def column(values):
+        out = []
+        for v in values:
+            day = parser(v)
+            out.append(day.toordinal() if day is not None else 0)
+        return out
+    return column
+
+
+def timed(fn, values, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        _parse_string.cache_clear()
+        t0 = time.perf_counter()
+        fn(values)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(sizes):
+    for n in sizes:
+        values = generate(n)
+        legacy = timed(ordinals_with(legacy_parse_date), values)
+        memoized = timed(ordinals_with(parse_date), values)
+        bulk = timed(due_ordinals, values)
+        print(f"n={n}")
+        for name, seconds in (("legacy parser", legacy), ("memoized parse_date", memoized), ("bulk due_ordinals", bulk)):
+            print(f"  {name:<22} {seconds * 1000:>9.1f} ms  {legacy / seconds:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
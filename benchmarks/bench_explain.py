@@ -0,0 +1,59 @@
+"""
+Cost of sparse fields and lazy explanations.
+
+    python benchmarks/bench_explain.py [tasks]
+
+Times calculate_scores plus JSON encoding (200k tasks by default) returning
+every field, only id/score/tier, and every field with lazy explanations, then
+the cost of explaining one task from the kept analysis.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from benchmarks.workloads import dense_dag  # noqa: E402
+from tasks.scoring import _analyze, calculate_scores  # noqa: E402
+from tasks.serializers import dumps  # noqa: E402
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(n):
+    tasks = dense_dag(n)
+    print(f"{n} tasks")
+    variants = (
+        ("all fields", {}),
+        ("fields=id,score,tier", {"fields": ["id", "score", "tier"]}),
+        ("all fields, lazy", {"lazy": True}),
+    )
+    for label, options in variants:
+        built = best_of(lambda: calculate_scores(tasks, **options))
+        encoded = best_of(lambda: dumps(calculate_scores(tasks, **options)))
+        size = len(dumps(calculate_scores(tasks, **options)))
+        print(f"  {label:<22} analyze {built * 1000:>8.1f} ms   + encode {encoded * 1000:>8.1f} ms   {size / 1e6:>6.1f} MB")
+
+    _, _, context = _analyze(tasks, fields=["id"])
+    task_id = tasks[n // 2]["id"]
+    t0 = time.perf_counter()
+    context.explain(task_id)
+    first = time.perf_counter() - t0
+    seconds = best_of(lambda: context.explain(task_id))
+    print(f"explain one task: first {first * 1000:.1f} ms (builds the id index), then {seconds * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,53 @@
+"""
+Ranking forecasts: incremental sweep vs one analysis per day.
+
+    python benchmarks/bench_forecast.py [tasks] [days]
+
+Times forecast_scores (50k tasks, 30 days by default) against calling
+calculate_scores(as_of=day, top_k=10) once per day, on both engines, and
+checks that both give the same top 10 every day.
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+from importlib.util import find_spec
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.workloads import dense_dag  # noqa: E402
+from tasks.forecast import forecast_scores  # noqa: E402
+from tasks.scoring import calculate_scores  # noqa: E402
+
+
+def main(n, days):
+    tasks = dense_dag(n)
+    start = date.today()
+    engines = ["python"] + (["numpy"] if find_spec("numpy") is not None else [])
+    print(f"{n} tasks, {days} days")
+    for engine in engines:
+        t0 = time.perf_counter()
+        result = forecast_scores(tasks, days=days, engine=engine, as_of=start, top_k=10)
+        swept = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        daily = [
+            calculate_scores(tasks, engine=engine, as_of=start + timedelta(days=k), top_k=10)["analyzed_tasks"]
+            for k in range(days)
+        ]
+        repeated = time.perf_counter() - t0
+
+        for entry, rows in zip(result["forecast"], daily):
+            assert [t["id"] for t in entry["tasks"]] == [t["id"] for t in rows], entry["date"]
+        rescored = sum(entry["changed"] for entry in result["forecast"]) / max(days - 1, 1)
+        print(
+            f"  {engine:<7} forecast {swept * 1000:>8.1f} ms   {days} analyses {repeated * 1000:>8.1f} ms"
+            f"   ({repeated / swept:.1f}x, {rescored:.0f} tasks rescored per day)"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 30,
+    )
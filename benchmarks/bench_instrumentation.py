@@ -0,0 +1,66 @@
+"""
+Cost of the analysis instrumentation.
+
+    python benchmarks/bench_instrumentation.py [tasks]
+
+Times calculate_scores with timing disabled (the NULL_TIMINGS default) and
+enabled, and the raw cost of one disabled and one enabled phase.
+"""
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks.instrumentation import NULL_TIMINGS, Timings  # noqa: E402
+from tasks.scoring import iter_scores  # noqa: E402
+
+
+def generate(n, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": f"t{i}",
+            "importance": rnd.randint(1, 10),
+            "estimated_hours": rnd.choice([0.5, 1, 2, 3, 5, 8]),
+            "due_date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "dependencies": [f"t{rnd.randrange(i)}" for _ in range(rnd.randint(0, 3))] if i else [],
+        }
+        for i in range(n)
+    ]
+
+
+def best_of(fn, repeat=7):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main(n):
+    tasks = generate(n)
+    off = best_of(lambda: list(iter_scores(tasks)[0]))
+    on = best_of(lambda: list(iter_scores(tasks, timings=Timings())[0]))
+    print(f"{n} tasks: disabled {off * 1000:.2f} ms  enabled {on * 1000:.2f} ms  ({on / off - 1:+.2%})")
+
+    timings = Timings()
+
+    def null_phase():
+        with NULL_TIMINGS.phase("x"):
+            pass
+
+    def real_phase():
+        with timings.phase("x"):
+            pass
+
+    loops = 200_000
+    print(f"disabled phase {timeit.timeit(null_phase, number=loops) / loops * 1e9:.0f} ns, "
+          f"enabled phase {timeit.timeit(real_phase, number=loops) / loops * 1e9:.0f} ns")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,72 @@
+"""
+Memory benchmark for the normalized task representation (tracemalloc).
+
+    python benchmarks/bench_memory.py [n ...]
+
+Compares what the scoring pipeline keeps alive per task: the former
+list-of-dicts normalization (a dict copy per task plus five id-keyed factor
+dicts) against the TaskTable struct-of-arrays, and reports the end-to-end
+peak of calculate_scores with top_k=10.
+"""
+import os
+import random
+import sys
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks.scoring import _normalize_task, calculate_scores  # noqa: E402
+from tasks.table import TaskTable  # noqa: E402
+
+
+def generate(n, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": f"t{i}",
+            "title": f"Task {i}",
+            "due_date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "importance": rnd.randint(1, 10),
+            "estimated_hours": rnd.choice([0.5, 1, 2, 3, 5, 8]),
+            "dependencies": [f"t{rnd.randrange(n)}" for _ in range(rnd.choice([0, 0, 1, 2]))],
+        }
+        for i in range(n)
+    ]
+
+
+def dict_pipeline(tasks):
+    warnings_map = defaultdict(list)
+    normalized = [dict(t, **_normalize_task(t, i, warnings_map)) for i, t in enumerate(tasks)]
+    factors = [{t["id"]: 0.5 for t in normalized} for _ in range(5)]
+    return normalized, factors
+
+
+def table_pipeline(tasks):
+    return TaskTable.build(tasks)
+
+
+def scoring_top10(tasks):
+    return calculate_scores(tasks, top_k=10)
+
+
+def measure(fn, tasks):
+    tracemalloc.start()
+    kept = fn(tasks)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current, peak
+
+
+def main(sizes):
+    for n in sizes:
+        tasks = generate(n)
+        print(f"n={n}")
+        for name, fn in (("dict pipeline", dict_pipeline), ("TaskTable", table_pipeline), ("calculate_scores top_k=10", scoring_top10)):
+            current, peak = measure(fn, tasks)
+            print(f"  {name:<28} retained {current / 2**20:>9.1f} MiB  peak {peak / 2**20:>9.1f} MiB  ({current / n:>6.0f} B/task)")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,60 @@
+"""
+Daily plan optimizer: solution quality and runtime against plain greedy-by-score.
+
+    python benchmarks/bench_optimizer.py [tasks ...]
+
+For each size, plans a 3-day horizon at 6 hours/day with every method and
+prints the total score (relative to greedy-by-score) and the wall time. Two
+dependency shapes are generated: a forest (at most one prerequisite per task,
+so the exact tree DP applies) and a general DAG (branch and bound / greedy).
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks.optimizer import optimize_days  # noqa: E402
+
+METHODS = ("score_greedy", "greedy", "bnb", "dp", "auto")
+
+
+def generate(n, max_deps, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": f"t{i}",
+            "importance": rnd.randint(1, 10),
+            "estimated_hours": rnd.choice([0.25, 0.5, 1, 1.5, 2, 3, 4, 6]),
+            "due_date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "dependencies": [f"t{rnd.randrange(i)}" for _ in range(rnd.randint(0, max_deps))] if i else [],
+        }
+        for i in range(n)
+    ]
+
+
+def main(sizes):
+    for shape, max_deps in (("forest", 1), ("dag", 3)):
+        for n in sizes:
+            tasks = generate(n, max_deps)
+            baseline = None
+            print(f"{shape} n={n}")
+            for method in METHODS:
+                t0 = time.perf_counter()
+                try:
+                    result = optimize_days(tasks, 6, days=3, method=method, time_budget_ms=500)
+                except ValueError as e:
+                    print(f"  {method:<13} n/a ({e})")
+                    continue
+                ms = (time.perf_counter() - t0) * 1000
+                total = result["meta"]["total_score"]
+                baseline = baseline or total
+                print(
+                    f"  {method:<13} score {total:>8.4f} ({total / baseline:>6.1%} of greedy-by-score)  "
+                    f"{ms:>8.1f} ms  {','.join(result['meta']['methods_used'])}  optimal={result['meta']['optimal']}"
+                )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [50, 200, 1000, 10_000])
@@ -0,0 +1,65 @@
+"""
+Planner scaling benchmark.
+
+    python benchmarks/bench_planner.py [edges ...]
+
+Builds layered dependency graphs with ~4 dependencies per task (plus a few
+cycles) and times build_plan end to end next to calculate_scores on the same
+tasks, so the planning overhead on top of scoring is visible. The default
+sizes go up to 1M edges.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks.planner import build_plan  # noqa: E402
+from tasks.scoring import calculate_scores  # noqa: E402
+
+DEPS_PER_TASK = 4
+
+
+def generate(edges, seed=0):
+    rnd = random.Random(seed)
+    n = max(2, edges // DEPS_PER_TASK)
+    tasks = []
+    for i in range(n):
+        deps = [f"t{rnd.randrange(i)}" for _ in range(DEPS_PER_TASK)] if i else []
+        if i % 1000 == 999 and i + 1 < n:
+            deps.append(f"t{i + 1}")  # t{i+1} depends on t{i} below: a two-task cycle
+        if i % 1000 == 0 and i:
+            deps[0] = f"t{i - 1}"
+        tasks.append(
+            {
+                "id": f"t{i}",
+                "importance": rnd.randint(1, 10),
+                "estimated_hours": rnd.choice([0.5, 1, 2, 3, 5, 8]),
+                "due_date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                "dependencies": deps,
+            }
+        )
+    return tasks
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def main(sizes):
+    for edges in sizes:
+        tasks = generate(edges)
+        score_s, _ = timed(lambda: calculate_scores(tasks, top_k=10))
+        plan_s, plan = timed(lambda: build_plan(tasks, top_k=10))
+        meta = plan["meta"]
+        print(
+            f"E={edges:>8} V={len(tasks):>7}  calculate_scores {score_s:>6.2f} s  build_plan {plan_s:>6.2f} s  "
+            f"cycles={len(meta['cycles'])} critical path {len(plan['critical_path']['tasks'])} tasks"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,68 @@
+"""
+Result store backends (tasks/results.py): stored size and put/get latency.
+
+    python benchmarks/bench_results.py [tasks]
+
+Builds the suggestion payload of a 10k-task analysis (by default; the dirty
+workload, so meta carries a warnings summary, and a compact one with
+aggregate_warnings) and times storing and reading it for 1000 clients with
+each backend. get includes unpacking, i.e. everything suggest_tasks does
+besides building the HttpResponse.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.workloads import dirty  # noqa: E402
+from tasks.results import (  # noqa: E402
+    LocalResultStore,
+    ResultStore,
+    SharedMemoryResultStore,
+    SQLiteResultStore,
+    pack,
+)
+from tasks.scoring import calculate_scores  # noqa: E402
+from tasks.serializers import dumps  # noqa: E402
+
+CLIENTS = 1000
+
+
+def suggestion(tasks, **options):
+    result = calculate_scores(tasks, top_k=3, **options)
+    return dumps({"suggested_tasks": result["analyzed_tasks"], "meta": result["meta"]})
+
+
+def main(n):
+    tasks = dirty(n, seed=1)
+    payloads = {"full meta": suggestion(tasks), "aggregated warnings": suggestion(tasks, aggregate_warnings=True)}
+    tmp = tempfile.mkdtemp()
+    for label, body in payloads.items():
+        print(f"{label}: {len(body) / 1e3:.1f} KB encoded, {len(pack(body)) / 1e3:.1f} KB stored")
+        backends = [
+            LocalResultStore(),
+            SQLiteResultStore(os.path.join(tmp, "results.sqlite3")),
+            SharedMemoryResultStore(os.path.join(tmp, "results.shm"), slots=CLIENTS * 2, slot_bytes=len(pack(body)) + 64),
+        ]
+        for backend in backends:
+            store = ResultStore(backend)
+            clients = [f"token:{i}" for i in range(CLIENTS)]
+            t0 = time.perf_counter()
+            for client in clients:
+                store.put(client, body)
+            put = (time.perf_counter() - t0) / CLIENTS
+            t0 = time.perf_counter()
+            for client in clients:
+                assert store.get(client) == body
+            get = (time.perf_counter() - t0) / CLIENTS
+            print(f"  {backend.name:<14} put {put * 1e6:>8.1f} us   get {get * 1e6:>8.1f} us")
+            store.clear()
+        for name in os.listdir(tmp):
+            os.remove(os.path.join(tmp, name))
+    os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
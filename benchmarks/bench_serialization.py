@@ -0,0 +1,80 @@
+"""
+Response size and encode/decode time of the analyze payloads.
+
+    python benchmarks/bench_serialization.py [tasks]
+
+Encodes one analysis result (100k tasks by default) with the stdlib encoder
+the views used before (json + DjangoJSONEncoder), with tasks.serializers
+(orjson / msgspec when installed), with the weights hoisted into meta, and as
+MessagePack when a MessagePack library is installed. Also times decoding the
+request body.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+from django.core.serializers.json import DjangoJSONEncoder  # noqa: E402
+
+from tasks import serializers  # noqa: E402
+from tasks.scoring import calculate_scores  # noqa: E402
+
+
+def generate(n, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": f"t{i}",
+            "title": f"Task {i}",
+            "importance": rnd.randint(1, 10),
+            "estimated_hours": rnd.choice([0.5, 1, 2, 3, 5, 8]),
+            "due_date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "dependencies": [f"t{rnd.randrange(i)}" for _ in range(rnd.randint(0, 2))] if i else [],
+        }
+        for i in range(n)
+    ]
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def report(label, fn):
+    seconds, body = best_of(fn)
+    print(f"  {label:<34} {seconds * 1000:>9.1f} ms  {len(body) / 2**20:>8.2f} MiB")
+
+
+def main(n):
+    tasks = generate(n)
+    plain = calculate_scores(tasks)
+    hoisted = calculate_scores(tasks, hoist_weights=True)
+    print(f"{n} tasks, JSON backend: {serializers.BACKEND}")
+    print("encode response")
+    report("stdlib json + DjangoJSONEncoder", lambda: json.dumps(plain, cls=DjangoJSONEncoder).encode("utf-8"))
+    report("stdlib, weights hoisted", lambda: json.dumps(hoisted, cls=DjangoJSONEncoder).encode("utf-8"))
+    report(f"serializers.dumps ({serializers.BACKEND})", lambda: serializers.dumps(plain))
+    report("serializers.dumps, weights hoisted", lambda: serializers.dumps(hoisted))
+    if serializers.MSGPACK_AVAILABLE:
+        report("msgpack, weights hoisted", lambda: serializers.dumps_msgpack(hoisted))
+    else:
+        print("  msgpack                            n/a (install msgspec or msgpack)")
+
+    body = json.dumps({"tasks": tasks}).encode("utf-8")
+    print(f"decode request ({len(body) / 2**20:.2f} MiB)")
+    seconds, _ = best_of(lambda: json.loads(body.decode("utf-8")))
+    print(f"  {'stdlib json.loads':<34} {seconds * 1000:>9.1f} ms")
+    seconds, _ = best_of(lambda: serializers.decode_analyze_request(body))
+    print(f"  {'decode_analyze_request':<34} {seconds * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,120 @@
+"""
+What-if simulations: overlays on a shared base vs one analysis per modified copy.
+
+    python benchmarks/bench_simulation.py [tasks] [scenarios]
+
+Builds 100 scenarios (by default) of 1-5 overlays each (deadline slips,
+importance and estimate changes, added and removed dependencies) against a
+20k-task base (workloads.dense_dag), times simulate_scenarios against
+copying the task list, applying the overlays and running calculate_scores
+for every scenario, and checks that both report the same ranks and scores.
+Peak memory (tracemalloc, on top of the task list) is measured in a second
+run: all scenarios for the simulation, one scenario for the copies.
+"""
+import copy
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.workloads import dense_dag  # noqa: E402
+from tasks.scoring import calculate_scores  # noqa: E402
+from tasks.simulation import simulate_scenarios  # noqa: E402
+
+AS_OF = "2026-06-01"
+
+
+def scenarios(tasks, count, seed=0):
+    rnd = random.Random(seed)
+    ids = [t["id"] for t in tasks]
+    result = []
+    for s in range(count):
+        overlays = []
+        for _ in range(rnd.randint(1, 5)):
+            overlay = {"id": rnd.choice(ids)}
+            kind = rnd.random()
+            if kind < 0.3:
+                overlay["due_date"] = f"2026-{rnd.randint(6, 9):02d}-{rnd.randint(1, 28):02d}"
+            elif kind < 0.5:
+                overlay["importance"] = rnd.randint(1, 10)
+            elif kind < 0.7:
+                overlay["estimated_hours"] = rnd.choice([0.5, 1.0, 2.0, 4.0, 8.0])
+            elif kind < 0.85:
+                overlay["add_dependencies"] = [rnd.choice(ids)]
+            else:
+                overlay["dependencies"] = []
+            overlays.append(overlay)
+        result.append({"name": f"scenario {s}", "overlays": overlays})
+    return result
+
+
+def apply(tasks, overlays):
+    modified = copy.deepcopy(tasks)
+    by_id = {t["id"]: t for t in modified}
+    for overlay in overlays:
+        task = by_id[overlay["id"]]
+        for key in ("due_date", "importance", "estimated_hours", "dependencies"):
+            if key in overlay:
+                task[key] = overlay[key]
+        if "add_dependencies" in overlay:
+            deps = list(task.get("dependencies") or [])
+            task["dependencies"] = deps + [d for d in overlay["add_dependencies"] if d not in deps]
+    return modified
+
+
+def ranks(tasks):
+    result = calculate_scores(tasks, as_of=AS_OF)
+    return {t["id"]: (rank, t["score"]) for rank, t in enumerate(result["analyzed_tasks"], start=1)}
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main(n, count):
+    tasks = dense_dag(n, seed=1)
+    plan = scenarios(tasks, count)
+    simulated, simulate = timed(lambda: simulate_scenarios(tasks, plan, as_of=AS_OF, max_changes=n))
+
+    def one_by_one():
+        base = ranks(tasks)
+        return base, [ranks(apply(tasks, scenario["overlays"])) for scenario in plan]
+
+    (base, expected), repeated = timed(one_by_one)
+    for scenario, after in zip(simulated["scenarios"], expected):
+        assert scenario["moved"] == sum(1 for tid, (rank, _) in after.items() if rank != base[tid][0]), scenario["name"]
+        for change in scenario["changes"]:
+            assert change["rank"] == [base[change["id"]][0], after[change["id"]][0]], scenario["name"]
+            assert change["score"][1] == after[change["id"]][1], scenario["name"]
+
+    simulate_peak = peak_memory(lambda: simulate_scenarios(tasks, plan, as_of=AS_OF))
+    copy_peak = peak_memory(lambda: calculate_scores(apply(tasks, plan[0]["overlays"]), as_of=AS_OF))
+    results = simulated["scenarios"]
+    rescaled = sum(1 for s in results if s["rescaled"])
+    changed = sum(s["changed"] for s in results) / len(results)
+    moved = sum(s["moved"] for s in results) / len(results)
+    print(f"{n} tasks, {count} scenarios ({rescaled} rescaled every task)")
+    print(f"  simulate_scenarios       {simulate * 1000:>9.1f} ms   peak {simulate_peak / 1e6:>6.1f} MB (all scenarios)")
+    print(f"  copy + analysis each     {repeated * 1000:>9.1f} ms   peak {copy_peak / 1e6:>6.1f} MB (one scenario)"
+          f"   ({repeated / simulate:.1f}x slower)")
+    print(f"  per scenario: {changed:.1f} scores changed, {moved:.0f} ranks moved")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+    )
@@ -0,0 +1,81 @@
+"""
+Loading a large project from JSON vs from a binary snapshot.
+
+    python benchmarks/bench_snapshot.py [tasks]
+
+Writes 1M tasks (by default; workloads.dense_dag, so every task has
+dependencies) as a JSON file and as a snapshot (tasks/snapshot.py), then
+times getting an analyzable table from each (JSON: read, decode and
+normalize; snapshot: open_snapshot) and a top-10 analysis starting from each
+file.
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from benchmarks.workloads import dense_dag  # noqa: E402
+from tasks.scoring import calculate_scores  # noqa: E402
+from tasks.serializers import dumps, loads  # noqa: E402
+from tasks.snapshot import open_snapshot, write_snapshot  # noqa: E402
+from tasks.table import TaskTable  # noqa: E402
+
+
+def timed(fn):
+    gc.collect()
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def load_json(path):
+    with open(path, "rb") as f:
+        return TaskTable.build(loads(f.read()))
+
+
+def main(n):
+    tmp = tempfile.mkdtemp()
+    json_path = os.path.join(tmp, "tasks.json")
+    snap_path = os.path.join(tmp, "tasks.tasksnap")
+    tasks = dense_dag(n, seed=1)
+    with open(json_path, "wb") as f:
+        f.write(dumps(tasks))
+    _, build = timed(lambda: write_snapshot(snap_path, *TaskTable.build(tasks)))
+    del tasks
+
+    print(f"{n} tasks: JSON {os.path.getsize(json_path) / 1e6:.0f} MB, snapshot {os.path.getsize(snap_path) / 1e6:.0f} MB"
+          f" (written in {build:.1f} s)")
+    _, json_load = timed(lambda: load_json(json_path))
+    snapshot, snap_open = timed(lambda: open_snapshot(snap_path))
+    print(f"  table from JSON (read, decode, normalize)  {json_load * 1000:>9.1f} ms")
+    print(f"  table from snapshot (open_snapshot)        {snap_open * 1000:>9.1f} ms")
+    snapshot.close()
+
+    def analyze_json():
+        with open(json_path, "rb") as f:
+            return calculate_scores(loads(f.read()), top_k=10, as_of="2026-06-01")
+
+    def analyze_snapshot():
+        with open_snapshot(snap_path) as snap:
+            return calculate_scores(snap, top_k=10, as_of="2026-06-01")
+
+    expected, json_total = timed(analyze_json)
+    result, snap_total = timed(analyze_snapshot)
+    assert dumps(result) == dumps(expected)
+    print(f"  top-10 analysis from the JSON file         {json_total * 1000:>9.1f} ms")
+    print(f"  top-10 analysis from the snapshot          {snap_total * 1000:>9.1f} ms")
+    for name in os.listdir(tmp):
+        os.remove(os.path.join(tmp, name))
+    os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
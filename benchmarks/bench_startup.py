@@ -0,0 +1,116 @@
+"""
+Cold-start cost of the scoring core, with an import-time budget.
+
+    python benchmarks/bench_startup.py [--runs 15] [--budget-ms 25]
+
+Runs `python -X importtime -c "import tasks.scoring"` in fresh interpreters
+without DJANGO_SETTINGS_MODULE and reports the median cumulative import time
+of tasks.scoring, the modules that cost the most, and the wall time of the
+command line (python -m tasks.scoring on a 3-task file) next to a bare
+interpreter and to setting up Django first. Exits with status 1 when the
+median import exceeds --budget-ms or when importing tasks.scoring loads any of
+HEAVY_MODULES, so CI can check it. Byte code is written by a warm-up run, so
+the numbers are those of an installed package, not of compiling the sources.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = 25.0
+# optional or framework modules the scoring core must not import up front
+HEAVY_MODULES = ("django", "numpy", "orjson", "logging", "re", "ast", "tasks.snapshot", "tasks.formula")
+LOADED = "import sys, tasks.scoring; print(','.join(m for m in {modules} if m in sys.modules))"
+
+
+def _env(django=False):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env.pop("DJANGO_SETTINGS_MODULE", None)
+    if django:
+        env["DJANGO_SETTINGS_MODULE"] = "backend.settings"
+    return env
+
+
+def import_times(runs):
+    """
+    Per run: ({module: cumulative microseconds}, {module: self microseconds}) from -X importtime.
+    """
+    results = []
+    for _ in range(runs):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import tasks.scoring"],
+            cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+        ).stderr
+        cumulative, own = {}, {}
+        # the interpreter's own startup imports come first and end with site
+        lines = stderr.splitlines()
+        start = next(k for k, line in enumerate(lines) if line.endswith("| site")) + 1
+        for line in lines[start:]:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            cumulative[name.strip()] = int(cumulative_us)
+            own[name.strip()] = int(self_us)
+        results.append((cumulative, own))
+    return results
+
+
+def wall_ms(command, runs, env):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    import_times(1)  # writes the byte code
+    runs = import_times(args.runs)
+    median_ms = statistics.median(cumulative["tasks.scoring"] for cumulative, _ in runs) / 1000
+    own = {name: statistics.median(r[1].get(name, 0) for r in runs) for name in runs[0][1]}
+    loaded = subprocess.run(
+        [sys.executable, "-c", LOADED.format(modules=HEAVY_MODULES)],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    ).stdout.strip()
+
+    print(f"import tasks.scoring: {median_ms:.1f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    print("  largest self times of the modules it loads:")
+    for name, us in sorted(own.items(), key=lambda item: -item[1])[:8]:
+        print(f"    {name:<28} {us / 1000:>6.2f} ms")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump([{"id": "a", "importance": 9}, {"id": "b", "dependencies": ["a"]}, {"id": "c"}], f)
+    try:
+        bare = wall_ms([sys.executable, "-c", "pass"], args.runs, _env())
+        cli = wall_ms([sys.executable, "-m", "tasks.scoring", f.name], args.runs, _env())
+        with_django = wall_ms(
+            [sys.executable, "-c", "import django; django.setup(); import tasks.scoring"], args.runs, _env(django=True)
+        )
+    finally:
+        os.remove(f.name)
+    print(f"  python -c pass                              {bare:>7.1f} ms")
+    print(f"  python -m tasks.scoring tasks.json          {cli:>7.1f} ms")
+    print(f"  django.setup() + import tasks.scoring       {with_django:>7.1f} ms")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: import tasks.scoring loads {loaded}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: import tasks.scoring takes {median_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Cost of task normalization on dirty imports.
+
+    python benchmarks/bench_validation.py [tasks]
+
+Normalizes 100k tasks (by default) whose fields are mostly dirty (non-numeric
+importance and hours, string dependencies) with the former exception-driven
+coercion and with table.coerce_task's type-dispatched fast paths, then
+compares validate_tasks with a full analysis and the size of the per-task
+warnings summary with the aggregated one.
+"""
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks.scoring import calculate_scores  # noqa: E402
+from tasks.table import coerce_task  # noqa: E402
+from tasks.validation import TaskWarnings, validate_tasks  # noqa: E402
+
+
+def legacy_coerce_task(t, i, warnings_map):
+    # coerce_task before the type-dispatched fast paths and warning codes, for comparison
+    tid = t["id"] if "id" in t else f"t{ i+1 }"
+    title = t["title"] if "title" in t else tid
+    orig_imp = t.get("importance", None)
+    try:
+        importance = max(1, min(10, int(t.get("importance", 5))))
+        if orig_imp is not None:
+            try:
+                if int(orig_imp) != importance:
+                    warnings_map[tid].append(f"importance value '{orig_imp}' normalized to {importance}")
+            except Exception:
+                warnings_map[tid].append(f"importance value '{orig_imp}' is invalid and defaulted to {importance}")
+    except Exception:
+        importance = 5
+        warnings_map[tid].append(f"importance value '{orig_imp}' is invalid and defaulted to 5")
+    orig_hours = t.get("estimated_hours", None)
+    try:
+        hours = float(t.get("estimated_hours", 2.0))
+        if hours < 0:
+            hours = 2.0
+            warnings_map[tid].append(f"estimated_hours '{orig_hours}' was negative and set to 2.0")
+    except Exception:
+        hours = 2.0
+        warnings_map[tid].append(f"estimated_hours value '{orig_hours}' is invalid and defaulted to 2.0")
+    deps = t.get("dependencies") or []
+    if not isinstance(deps, list):
+        try:
+            if isinstance(deps, str):
+                deps = [s.strip() for s in deps.split(",") if s.strip()]
+                warnings_map[tid].append(f"dependencies value was a string and coerced to list: {deps}")
+            else:
+                deps = list(deps)
+                warnings_map[tid].append("dependencies value coerced to list")
+        except Exception:
+            deps = []
+            warnings_map[tid].append("dependencies value invalid; treated as empty list")
+    return tid, title, t.get("due_date"), importance, hours, None, deps
+
+
+def dirty_tasks(n, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": f"t{i}",
+            "importance": rnd.choice(["high", "low", "", None, "7", 8, 12]),
+            "estimated_hours": rnd.choice(["lots", "", None, "2.5", 3, -1]),
+            "due_date": rnd.choice(["2026-05-01", "someday", None]),
+            "dependencies": f"t{rnd.randrange(n)}, t{rnd.randrange(n)}" if rnd.random() < 0.3 else [],
+        }
+        for i in range(n)
+    ]
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(n):
+    tasks = dirty_tasks(n)
+    def legacy():
+        warnings_map = defaultdict(list)
+        for i, t in enumerate(tasks):
+            legacy_coerce_task(t, i, warnings_map)
+
+    def current():
+        warnings_map = TaskWarnings()
+        for i, t in enumerate(tasks):
+            coerce_task(t, i, warnings_map, parse_dates=False)
+
+    print(f"{n} dirty tasks")
+    print(f"  coerce_task, exception-driven           {best_of(legacy) * 1000:>8.1f} ms")
+    print(f"  coerce_task, type-dispatched            {best_of(current) * 1000:>8.1f} ms  (with warning codes)")
+
+    print(f"  validate_tasks                          {best_of(lambda: validate_tasks(tasks)) * 1000:>8.1f} ms")
+    print(f"  calculate_scores                        {best_of(lambda: calculate_scores(tasks, top_k=10)) * 1000:>8.1f} ms")
+
+    per_task = calculate_scores(tasks, top_k=10)["meta"]["warnings_summary"]
+    aggregated = calculate_scores(tasks, top_k=10, aggregate_warnings=True)["meta"]["warnings"]
+    print(
+        f"meta warnings: per task {len(json.dumps(per_task)) / 1e6:.1f} MB,"
+        f" aggregated {len(json.dumps(aggregated)) / 1e3:.1f} KB ({len(aggregated)} codes)"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,150 @@
+"""
+Latency of small requests while large analyses run, sync vs async views.
+
+    python benchmarks/load_async.py [--large-tasks 10000] [--clients 2] [--requests 200]
+
+Starts uvicorn (backend.asgi) on a free local port and, for each of the sync
+and the async views, times --requests small requests (GET suggest and a
+20-task analyze) one after another: first on an idle server, then while
+--clients threads keep posting --large-tasks analyses. Reports p50/p99/max
+of the small requests and how many large analyses completed or got a 503.
+Needs uvicorn (pip install uvicorn). Large bodies must stay under
+DATA_UPLOAD_MAX_MEMORY_SIZE (2.5 MB by default, about 13k tasks).
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.workloads import dense_dag  # noqa: E402
+
+ENDPOINTS = {
+    "sync": ("/api/tasks/analyze/", "/api/tasks/suggest/"),
+    "async": ("/api/tasks/async/analyze/", "/api/tasks/async/suggest/"),
+}
+HEADERS = {"Content-Type": "application/json", "X-Client-Token": "load-test"}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.asgi:application", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=dict(os.environ, DJANGO_SETTINGS_MODULE="backend.settings"),
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            request(port, "GET", "/api/tasks/cache/stats/")
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise SystemExit("uvicorn did not start (is it installed?)")
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+    try:
+        conn.request(method, path, body=body, headers=HEADERS)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def small_requests(port, kind, count):
+    analyze, suggest = ENDPOINTS[kind]
+    small = json.dumps({"tasks": dense_dag(20, seed=1)}).encode()
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        if i % 2:
+            request(port, "GET", suggest)
+        else:
+            request(port, "POST", analyze, small)
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.01)
+    return latencies
+
+
+def large_client(port, kind, tasks, stop, counts, lock):
+    analyze = ENDPOINTS[kind][0]
+    rnd = random.Random()
+    while not stop.is_set():
+        # a unique extra task so the sync view's result cache never answers
+        body = json.dumps({"tasks": tasks + [{"id": f"probe{rnd.random()}"}]}).encode()
+        status = request(port, "POST", analyze, body)
+        with lock:
+            counts[status] = counts.get(status, 0) + 1
+        if status == 503:
+            time.sleep(0.5)
+
+
+def scenario(port, kind, tasks, clients, count):
+    stop, lock, counts = threading.Event(), threading.Lock(), {}
+    threads = [
+        threading.Thread(target=large_client, args=(port, kind, tasks, stop, counts, lock), daemon=True)
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5 if clients else 0)
+    latencies = small_requests(port, kind, count)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--large-tasks", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    tasks = dense_dag(args.large_tasks)
+    port = free_port()
+    server = start_server(port)
+    try:
+        request(port, "POST", ENDPOINTS["async"][0], json.dumps({"tasks": tasks}).encode())  # warm up the pool
+        print(f"small requests: {args.requests}; load: {args.clients} clients x {args.large_tasks} tasks")
+        for kind in ("sync", "async"):
+            for clients in (0, args.clients):
+                latencies, counts = scenario(port, kind, tasks, clients, args.requests)
+                print(
+                    f"  {kind:<5} {'loaded' if clients else 'idle':<6}"
+                    f"  p50 {statistics.median(latencies) * 1000:>8.1f} ms"
+                    f"  p99 {percentile(latencies, 0.99) * 1000:>8.1f} ms"
+                    f"  max {max(latencies) * 1000:>8.1f} ms"
+                    + (f"  large: {counts.get(200, 0)} done, {counts.get(503, 0)} x 503" if clients else "")
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
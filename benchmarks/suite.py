@@ -0,0 +1,187 @@
+"""
+Benchmark suite with regression thresholds.
+
+    python benchmarks/suite.py [--sizes 1000,10000,100000,1000000] [--workloads flat,chain,...]
+                               [--output results.json] [--baseline benchmarks/baseline.json]
+                               [--threshold 0.25] [--update-baseline]
+
+For every workload in benchmarks/workloads.py and every size, times
+calculate_scores, detect_cycles and the full HTTP path (JSON request through
+Django's test client to /api/tasks/analyze/, result cache bypassed) and
+records the peak traced memory of each. Times are the median of several runs
+after a warm-up; peak memory comes from one extra run under tracemalloc, so
+tracing does not skew the times.
+
+Results are written as JSON. With a baseline (the default one is used when it
+exists), every measurement is compared against it and the script exits with
+status 1 when a time or peak memory grew by more than --threshold (relative;
+times within MIN_SLACK_S of the baseline are ignored as noise). Baselines are
+machine specific: record one with --update-baseline on the machine that checks
+it. The default sizes stop at 100k tasks; pass --sizes to include 1M.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from workloads import WORKLOADS  # noqa: E402
+
+from tasks.scoring import calculate_scores, detect_cycles  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+MIN_SLACK_S = 0.005
+MIN_TOTAL_S = 1.0
+MAX_RUNS = 50
+
+
+def _http(body):
+    client = Client(HTTP_X_CLIENT_TOKEN="benchmark-suite")
+
+    def run():
+        response = client.post("/api/tasks/analyze/?debug_timing=1", data=body, content_type="application/json")
+        if response.status_code != 200:
+            raise RuntimeError(f"analyze returned {response.status_code}: {response.content[:200]!r}")
+        return response
+
+    return run
+
+
+def targets(tasks):
+    """
+    (name, zero-argument callable) for every measured code path over one task list.
+    """
+    body = json.dumps({"tasks": tasks})
+    return (
+        ("calculate_scores", lambda: calculate_scores(tasks)),
+        ("detect_cycles", lambda: detect_cycles(tasks)),
+        ("http_analyze", _http(body)),
+    )
+
+
+def measure(fn, repeat):
+    """
+    Median time of at least `repeat` runs (more for fast paths, up to MIN_TOTAL_S of runs) after
+    one warm-up run, and the peak traced memory of one more run. Returns (seconds, peak bytes).
+    The median is used because the best run varies a lot between processes on shared machines.
+    """
+    fn()
+    times = []
+    while len(times) < repeat or (sum(times) < MIN_TOTAL_S and len(times) < MAX_RUNS):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def run_suite(sizes, workloads, seed=0):
+    results = []
+    for size in sizes:
+        repeat = 3 if size <= 100_000 else 1
+        for workload in workloads:
+            tasks = WORKLOADS[workload](size, seed)
+            for target, fn in targets(tasks):
+                seconds, peak = measure(fn, repeat)
+                results.append(
+                    {"workload": workload, "size": size, "target": target, "seconds": round(seconds, 6), "peak_bytes": peak}
+                )
+                print(f"{workload:<10} n={size:>8} {target:<17} {seconds * 1000:>10.1f} ms  peak {peak / 2**20:>8.1f} MiB")
+            del tasks
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns a list of human-readable regressions against the baseline results.
+    """
+    reference = {(r["workload"], r["size"], r["target"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        base = reference.get((r["workload"], r["size"], r["target"]))
+        if base is None:
+            continue
+        name = f"{r['workload']} n={r['size']} {r['target']}"
+        if r["seconds"] > base["seconds"] * (1 + threshold) and r["seconds"] - base["seconds"] > MIN_SLACK_S:
+            regressions.append(f"{name}: {base['seconds'] * 1000:.1f} ms -> {r['seconds'] * 1000:.1f} ms")
+        if r["peak_bytes"] > base["peak_bytes"] * (1 + threshold):
+            regressions.append(f"{name}: peak {base['peak_bytes'] / 2**20:.1f} MiB -> {r['peak_bytes'] / 2**20:.1f} MiB")
+    return regressions
+
+
+def main(argv=None):
+    setup_test_environment()  # lets the test client's "testserver" host through ALLOWED_HOSTS
+    settings.DATA_UPLOAD_MAX_MEMORY_SIZE = None  # 100k+ task bodies exceed the 2.5 MB default
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline instead of checking")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    workloads = args.workloads.split(",")
+    unknown = [w for w in workloads if w not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(unknown)}")
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+        },
+        "results": run_suite(sizes, workloads, args.seed),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(report["results"], json.load(f), args.threshold)
+    for line in regressions:
+        print("REGRESSION", line)
+    if regressions:
+        return 1
+    print(f"no regressions beyond {args.threshold:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
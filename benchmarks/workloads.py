@@ -0,0 +1,88 @@
+"""
+Seeded synthetic task lists for the benchmark suite (benchmarks/suite.py).
+
+Every generator takes (n, seed) and returns n task dicts; the same arguments
+always give the same tasks.
+
+- flat:      a wide backlog without dependencies.
+- chain:     one deep dependency chain (t_i depends on t_{i-1}).
+- dense_dag: every task depends on DENSE_DEGREE earlier tasks.
+- cyclic:    random dependencies in both directions, so most tasks sit in cycles.
+- dirty:     a mix of valid tasks and inputs that hit every warning branch of
+             normalization (out-of-range and invalid importance, negative and
+             invalid hours, string / non-list / invalid dependencies, unknown
+             dependencies) plus unparseable due dates and missing and duplicate ids.
+"""
+import random
+
+DENSE_DEGREE = 8
+CYCLIC_DEGREE = 2
+
+
+def _task(rnd, i, deps):
+    return {
+        "id": f"t{i}",
+        "title": f"Task {i}",
+        "due_date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}" if rnd.random() < 0.9 else None,
+        "importance": rnd.randint(1, 10),
+        "estimated_hours": rnd.choice([0.5, 1, 2, 3, 5, 8, 13]),
+        "dependencies": deps,
+    }
+
+
+def flat(n, seed=0):
+    rnd = random.Random(seed)
+    return [_task(rnd, i, []) for i in range(n)]
+
+
+def chain(n, seed=0):
+    rnd = random.Random(seed)
+    return [_task(rnd, i, [f"t{i - 1}"] if i else []) for i in range(n)]
+
+
+def dense_dag(n, seed=0):
+    rnd = random.Random(seed)
+    return [
+        _task(rnd, i, [f"t{rnd.randrange(i)}" for _ in range(min(i, DENSE_DEGREE))])
+        for i in range(n)
+    ]
+
+
+def cyclic(n, seed=0):
+    rnd = random.Random(seed)
+    return [_task(rnd, i, [f"t{rnd.randrange(n)}" for _ in range(CYCLIC_DEGREE)]) for i in range(n)]
+
+
+# one entry per warning branch of coerce_task / date parsing, applied to every tenth task
+_DIRTY = (
+    lambda t, i: t.update(importance=42),
+    lambda t, i: t.update(importance="high"),
+    lambda t, i: t.update(estimated_hours=-3),
+    lambda t, i: t.update(estimated_hours="soon"),
+    lambda t, i: t.update(dependencies=f"t{i // 2}, t{i // 3}"),
+    lambda t, i: t.update(dependencies={f"t{i // 2}": True}),
+    lambda t, i: t.update(dependencies=7),
+    lambda t, i: t.update(due_date="next tuesday"),
+    lambda t, i: t.pop("id"),
+    lambda t, i: t.update(id=f"t{i // 2}", dependencies=[f"ghost{i}"]),
+)
+
+
+def dirty(n, seed=0):
+    rnd = random.Random(seed)
+    tasks = []
+    for i in range(n):
+        task = _task(rnd, i, [f"t{rnd.randrange(i)}"] if i and rnd.random() < 0.5 else [])
+        if i % 10 == 0:
+            _DIRTY[(i // 10) % len(_DIRTY)](task, i)
+        tasks.append(task)
+    return tasks
+
+
+WORKLOADS = {
+    "flat": flat,
+    "chain": chain,
+    "dense_dag": dense_dag,
+    "cyclic": cyclic,
+    "dirty": dirty,
+}
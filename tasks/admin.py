@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("external_id", "title", "project", "due_date", "importance", "estimated_hours")
+    list_filter = ("project",)
+    search_fields = ("external_id", "title")
@@ -0,0 +1,186 @@
+"""
+Admission control for the async analyze endpoint.
+
+CPU-bound analyses run in a bounded executor (worker processes by default, so
+scoring never holds the event loop's GIL). At most WORKERS analyses run at a
+time and at most QUEUE more wait for a worker; beyond that, requests are
+rejected right away (the view answers 503 with Retry-After) instead of piling
+up. Cancelling a waiting request (the client disconnected) removes it from
+the queue; a running one cannot be interrupted, so its slot is freed when it
+finishes.
+
+Configured with settings.TASK_ASYNC_ANALYSIS, e.g.
+    {"EXECUTOR": "process", "WORKERS": 4, "QUEUE": 8, "RETRY_AFTER": 2, "INLINE_MAX_BYTES": 65536}
+WORKERS defaults to the CPU count. Bodies of at most INLINE_MAX_BYTES are
+analyzed directly on the event loop: they take a few milliseconds, and small
+requests should not wait behind large ones.
+
+The job functions do not touch the database, so worker processes only import
+the scoring engine and the serializers.
+"""
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .batch import default_workers
+from .scoring import _ranks_from_top, calculate_scores
+from .serializers import decode_analyze_request, dumps, dumps_msgpack
+
+DEFAULT_CONFIG = {
+    "EXECUTOR": "process",
+    "WORKERS": None,
+    "QUEUE": 8,
+    "RETRY_AFTER": 2,
+    "INLINE_MAX_BYTES": 64 * 1024,
+}
+
+
+class Overloaded(Exception):
+    """
+    Every worker is busy and the waiting queue is full.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__("analysis queue is full")
+        self.retry_after = retry_after
+
+
+class AdmissionQueue:
+    """
+    Runs functions in `executor` with at most workers + queue of them admitted at once.
+    """
+
+    def __init__(self, executor, workers, queue, retry_after=2, inline_max_bytes=0):
+        self.executor = executor
+        self.workers = workers
+        self.capacity = workers + queue
+        self.retry_after = retry_after
+        self.inline_max_bytes = inline_max_bytes
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.in_flight -= 1
+
+    async def run(self, fn, *args):
+        """
+        Result of fn(*args) computed in the executor. Raises Overloaded when the queue is full.
+        """
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise Overloaded(self.retry_after)
+            self.in_flight += 1
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # the slot is freed when the work is done (or cancelled before it started), not when the caller stops waiting
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": self.in_flight, "capacity": self.capacity, "workers": self.workers, "rejected": self.rejected}
+
+
+def analyze_job(body, tasks=None, msgpack=False):
+    """
+    Decodes an analyze request body and scores it. tasks: the task list to use instead of
+    the body's (stored project tasks, loaded by the caller).
+    Returns ("project", name) when the body references stored tasks and none were passed,
+    else ("result", encoded response, encoded suggestion payload for suggest_tasks, None
+    for a later page or a fields-restricted analysis).
+    Raises ValueError (DecodeError for invalid JSON) on bad input.
+    """
+    payload = decode_analyze_request(body)
+    if tasks is None:
+        if payload["has_tasks"]:
+            tasks = payload["tasks"]
+        elif payload["project"] is not None:
+            return "project", payload["project"]
+        elif payload["snapshot"] is not None:
+            raise ValueError("snapshots are analyzed by /api/tasks/analyze/")
+        else:
+            raise ValueError("tasks must be a list")
+    result = calculate_scores(
+        tasks,
+        strategy=payload["strategy"],
+        custom_weights=payload["weights"],
+        engine=payload["engine"],
+        top_k=payload["top_k"],
+        cursor=payload["cursor"],
+        compare=payload["compare"],
+        hoist_weights=payload["hoist_weights"],
+        components=payload["components"],
+        fields=payload["fields"],
+        as_of=payload["as_of"],
+        aggregate_warnings=payload["aggregate_warnings"],
+    )
+    suggestion = None
+    if _ranks_from_top(payload["top_k"], payload["cursor"], payload["fields"]):
+        suggestion = dumps({"suggested_tasks": result["analyzed_tasks"][:3], "meta": result["meta"]})
+    return "result", (dumps_msgpack if msgpack else dumps)(result), suggestion
+
+
+async def run_analysis(queue, body, tasks=None, msgpack=False):
+    """
+    analyze_job, inline for small bodies and through the queue otherwise (stored project
+    tasks always go through the queue: their size is unknown up front). A broken process
+    pool (a worker was killed) is replaced so later requests get a fresh one.
+    """
+    if tasks is None and len(body) <= queue.inline_max_bytes:
+        return analyze_job(body, tasks, msgpack)
+    try:
+        return await queue.run(analyze_job, body, tasks, msgpack)
+    except BrokenProcessPool:
+        _reset_executor(queue)
+        raise
+
+
+def _make_executor(kind, workers):
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+    raise ValueError(f"unknown TASK_ASYNC_ANALYSIS executor '{kind}'")
+
+
+def _reset_executor(queue):
+    kind = "process" if isinstance(queue.executor, ProcessPoolExecutor) else "thread"
+    queue.executor.shutdown(wait=False, cancel_futures=True)
+    queue.executor = _make_executor(kind, queue.workers)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_admission_queue():
+    """
+    Process-wide AdmissionQueue built from settings.TASK_ASYNC_ANALYSIS on first use.
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                from django.conf import settings
+
+                config = dict(DEFAULT_CONFIG, **getattr(settings, "TASK_ASYNC_ANALYSIS", {}))
+                workers = max(1, int(config["WORKERS"] or default_workers()))
+                _queue = AdmissionQueue(
+                    _make_executor(config["EXECUTOR"], workers),
+                    workers,
+                    max(0, int(config["QUEUE"])),
+                    config["RETRY_AFTER"],
+                    config["INLINE_MAX_BYTES"],
+                )
+    return _queue
@@ -0,0 +1,128 @@
+"""
+Batch analysis of many independent projects.
+
+Projects are scored in parallel with a ProcessPoolExecutor. Small projects are
+packed into chunks of up to CHUNK_TASKS tasks (fewer when needed to give every
+worker several chunks) so each submission carries
+enough work to amortize the pickling round trip; large projects travel alone.
+Every project is analyzed in its own try block, so one bad task list only
+fails its own entry.
+
+This module does not touch Django, so worker processes only import the
+scoring engine.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .scoring import _resolve_as_of, calculate_scores
+
+CHUNK_TASKS = 5000  # target tasks per pool submission
+MAX_PROJECT_NAME = 100
+
+
+def normalize_projects(projects):
+    """
+    Input: {"name": [tasks], ...} or [{"name": ..., "tasks": [...]}, ...].
+    Returns: list of (name, tasks) in input order. Raises ValueError on bad shapes or duplicate names.
+    """
+    if isinstance(projects, dict):
+        items = list(projects.items())
+    elif isinstance(projects, list):
+        items = []
+        for i, p in enumerate(projects):
+            if not isinstance(p, dict) or "name" not in p or "tasks" not in p:
+                raise ValueError(f"project at position {i} needs a 'name' and 'tasks'")
+            items.append((p["name"], p["tasks"]))
+    else:
+        raise ValueError("projects must be an object or a list")
+
+    seen = set()
+    for name, _ in items:
+        if not isinstance(name, str) or not name or len(name) > MAX_PROJECT_NAME:
+            raise ValueError(f"project names must be non-empty strings of at most {MAX_PROJECT_NAME} characters")
+        if name in seen:
+            raise ValueError(f"duplicate project name '{name}'")
+        seen.add(name)
+    return items
+
+
+def _chunks(items, target):
+    """
+    Packs consecutive projects into chunks of about `target` tasks.
+    """
+    chunk, size = [], 0
+    for name, tasks in items:
+        n = len(tasks) if isinstance(tasks, list) else 1
+        if chunk and size + n > target:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append((name, tasks))
+        size += n
+    if chunk:
+        yield chunk
+
+
+def _analyze_one(tasks, options):
+    if not isinstance(tasks, list):
+        return {"error": "tasks must be a list"}
+    try:
+        return calculate_scores(tasks, **options)
+    except Exception as e:  # isolate the project, whatever went wrong
+        return {"error": str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"}
+
+
+def _analyze_chunk(chunk, options):
+    """
+    Worker entry point: [(name, tasks)] -> [(name, result or {"error": ...})].
+    """
+    return [(name, _analyze_one(tasks, options)) for name, tasks in chunk]
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def analyze_batch(projects, strategy="smart_balance", custom_weights=None, engine="auto",
+                  top_k=None, workers=None, chunk_tasks=CHUNK_TASKS, as_of=None):
+    """
+    Input: projects as accepted by normalize_projects, analysis options shared by all of them
+           (as_of is checked once, up front), workers (default: CPU count; 1 runs in-process)
+           and the chunk size in tasks.
+    Returns: ({name: calculate_scores result or {"error": message}}, meta) in input order,
+             meta = {"projects", "failed", "workers", "chunks"}.
+    """
+    items = normalize_projects(projects)
+    if as_of is not None:
+        as_of = _resolve_as_of(as_of).isoformat()
+    options = {
+        "strategy": strategy, "custom_weights": custom_weights, "engine": engine, "top_k": top_k, "as_of": as_of,
+    }
+    workers = max(1, int(workers or default_workers()))
+    total = sum(len(tasks) if isinstance(tasks, list) else 1 for _, tasks in items)
+    # at least ~4 chunks per worker so uneven projects still balance across the pool
+    chunks = list(_chunks(items, max(1, min(chunk_tasks, total // (workers * 4)))))
+    workers = min(workers, len(chunks)) or 1
+
+    results = {}
+    if workers == 1:
+        for chunk in chunks:
+            results.update(_analyze_chunk(chunk, options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(chunk, pool.submit(_analyze_chunk, chunk, options)) for chunk in chunks]
+            for chunk, future in futures:
+                try:
+                    results.update(future.result())
+                except BrokenProcessPool:
+                    # a worker died (e.g. killed for memory); the chunks still pending fail with it
+                    results.update((name, {"error": "worker process died while analyzing this project"}) for name, _ in chunk)
+
+    ordered = {name: results[name] for name, _ in items}
+    meta = {
+        "projects": len(items),
+        "failed": sum(1 for r in ordered.values() if "error" in r),
+        "workers": workers,
+        "chunks": len(chunks),
+    }
+    return ordered, meta
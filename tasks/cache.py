@@ -0,0 +1,226 @@
+"""
+Result cache for /api/tasks/analyze/.
+
+Entries are the encoded JSON response bodies, keyed by a canonical hash of the
+tasks, strategy, weights and options plus today's date (urgency depends on it,
+so results never outlive the day they were computed). Two backends:
+
+- "local":  in-process LRU bounded by entry count and total bytes.
+- "django": any configured Django cache (shared between workers), entries expire at midnight.
+
+Configured with settings.TASK_ANALYSIS_CACHE, e.g.
+    {"BACKEND": "local", "MAX_ENTRIES": 256, "MAX_BYTES": 64 * 1024 * 1024}
+    {"BACKEND": "django", "ALIAS": "default"}
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+
+DEFAULT_CONFIG = {
+    "BACKEND": "local",
+    "MAX_ENTRIES": 256,
+    "MAX_BYTES": 64 * 1024 * 1024,
+    "ALIAS": "default",
+    "KEY_PREFIX": "task-analysis:",
+}
+
+
+def analysis_key(tasks, strategy, weights, options=None, today=None):
+    """
+    Canonical hash of an analysis request: key order and whitespace in the
+    payload do not matter, and the key changes every day.
+    """
+    canonical = json.dumps(
+        {
+            "tasks": tasks,
+            "strategy": strategy,
+            "weights": weights,
+            "options": options or {},
+            "today": (today or date.today()).isoformat(),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def client_id(request, create=False):
+    """
+    Scope for per-client state: the X-Client-Token header, else the key of the client's
+    session. Without a session, create=True starts one (analyses do, so a browser that
+    keeps the cookie can ask for suggestions later); otherwise returns None and nothing
+    is kept on the client's behalf.
+    """
+    token = request.headers.get("X-Client-Token")
+    if token:
+        return "token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+    if not request.session.session_key:
+        if not create:
+            return None
+        request.session.save()
+    return "session:" + request.session.session_key
+
+
+class LocalLRUCache:
+    """
+    Thread-safe in-process LRU of bytes values, bounded by entries and total size.
+    """
+
+    name = "local"
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._day = date.today()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _expire_day(self):
+        # every key embeds the date, so yesterday's entries can never hit again
+        today = date.today()
+        if today != self._day:
+            self._data.clear()
+            self.nbytes = 0
+            self._day = today
+
+    def get(self, key):
+        with self._lock:
+            self._expire_day()
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._expire_day()
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old)
+            self._data[key] = value
+            self.nbytes += len(value)
+            while len(self._data) > self.max_entries or self.nbytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+
+class DjangoCacheBackend:
+    """
+    Stores entries in a Django cache so every worker shares them; eviction is the
+    cache's own (LRU for locmem, memcached and redis). Entries expire at midnight.
+    """
+
+    name = "django"
+
+    def __init__(self, alias="default", key_prefix="task-analysis:"):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+        self.key_prefix = key_prefix
+
+    def __len__(self):
+        return -1
+
+    def _timeout(self):
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), time.min)
+        return max(1, int((midnight - now).total_seconds()))
+
+    def get(self, key):
+        return self.cache.get(self.key_prefix + key)
+
+    def set(self, key, value):
+        self.cache.set(self.key_prefix + key, value, timeout=self._timeout())
+
+    def clear(self):
+        self.cache.clear()
+
+
+class AnalysisCache:
+    """
+    Counts hits and misses (per process) in front of a backend.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def peek(self, key):
+        """
+        Lookup that does not touch the hit/miss counters (bookkeeping entries).
+        """
+        return self.backend.get(key)
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        stats = {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "pid": os.getpid(),
+        }
+        if isinstance(self.backend, LocalLRUCache):
+            stats.update(
+                entries=len(self.backend),
+                bytes=self.backend.nbytes,
+                max_entries=self.backend.max_entries,
+                max_bytes=self.backend.max_bytes,
+            )
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """
+    Process-wide AnalysisCache built from settings.TASK_ANALYSIS_CACHE on first use.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from django.conf import settings
+
+                config = dict(DEFAULT_CONFIG, **getattr(settings, "TASK_ANALYSIS_CACHE", {}))
+                if config["BACKEND"] == "django":
+                    backend = DjangoCacheBackend(config["ALIAS"], config["KEY_PREFIX"])
+                elif config["BACKEND"] == "local":
+                    backend = LocalLRUCache(config["MAX_ENTRIES"], config["MAX_BYTES"])
+                else:
+                    raise ValueError(f"unknown TASK_ANALYSIS_CACHE backend '{config['BACKEND']}'")
+                _cache = AnalysisCache(backend)
+    return _cache
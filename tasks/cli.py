@@ -0,0 +1,183 @@
+"""
+Command line scoring: python -m tasks.scoring [options] [FILE ...]
+
+Reads tasks from the FILEs (- or none: standard input) as a JSON list,
+{"tasks": [...]} or NDJSON with one task per line, and writes the ranked
+analysis to standard output (or --output): the calculate_scores document, or
+with --ndjson one task per line and a closing {"meta": ...} record, like the
+streaming API. NDJSON files (.ndjson/.jsonl, or --format ndjson) are read
+line by line, never held in memory at once.
+
+Only the scoring core is imported: no Django settings, apps or database, so
+short-lived jobs start in milliseconds. Optional backends load on first use:
+orjson for decoding and encoding when installed (else the stdlib json
+module), numpy only when the numpy engine runs. orjson itself takes longer
+to import than the stdlib json module, so inputs known to be smaller than
+ORJSON_MIN_BYTES use the stdlib.
+"""
+import argparse
+import os
+import stat
+import sys
+from contextlib import nullcontext
+
+from .ndjson import iter_ndjson_tasks
+from .scoring import ENGINES, OUTPUT_FIELDS, STRATEGY_PRESETS, iter_scores
+
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+ORJSON_MIN_BYTES = 256 * 1024
+
+_codec = None
+
+
+def _json_codec(large=True):
+    """
+    (loads, dumps) of the JSON backend, resolved on the first call: orjson when installed
+    and the input is large, else the stdlib. dumps returns bytes.
+    """
+    global _codec
+    if _codec is None:
+        import json
+
+        def stdlib_dumps(obj):
+            return json.dumps(obj).encode("utf-8")
+
+        orjson = None
+        if large:
+            try:
+                import orjson
+            except ImportError:
+                pass
+        if orjson is None:
+            _codec = (json.loads, stdlib_dumps)
+        else:
+            def orjson_dumps(obj):
+                try:
+                    return orjson.dumps(obj)
+                except (TypeError, orjson.JSONEncodeError):
+                    return stdlib_dumps(obj)  # e.g. integers beyond 64 bits
+
+            _codec = (orjson.loads, orjson_dumps)
+    return _codec
+
+
+def _read_tasks(name, fmt, stdin):
+    """
+    Tasks of one input, lazily. fmt "auto" reads .ndjson/.jsonl files as NDJSON and anything
+    else as a JSON document, falling back to NDJSON when the input is not one.
+    """
+    if fmt == "auto" and os.path.splitext(name)[1] in NDJSON_SUFFIXES:
+        fmt = "ndjson"
+    with nullcontext(stdin) if name == "-" else open(name, "rb") as source:
+        if fmt == "ndjson":
+            yield from iter_ndjson_tasks(source, _json_codec()[0], name)
+            return
+        data = source.read()
+    try:
+        payload = _json_codec()[0](data)
+    except ValueError as e:
+        if fmt == "json":
+            raise ValueError(f"{name}: invalid json: {e}")
+        yield from iter_ndjson_tasks(data.splitlines(), _json_codec()[0], name)
+        return
+    if isinstance(payload, dict) and "tasks" in payload:
+        payload = payload["tasks"]
+    elif isinstance(payload, dict) and fmt == "auto":
+        payload = [payload]  # NDJSON with a single task
+    if not isinstance(payload, list):
+        raise ValueError(f"{name}: expected a list of tasks or {{\"tasks\": [...]}}")
+    yield from payload
+
+
+def _input_size(names, stdin):
+    """
+    Total size of the inputs in bytes, None when one of them is a pipe or a terminal.
+    """
+    total = 0
+    for name in names:
+        try:
+            info = os.fstat(stdin.fileno()) if name == "-" else os.stat(name)
+        except (AttributeError, OSError, ValueError):
+            return None
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        total += info.st_size
+    return total
+
+
+def _tasks(names, fmt, stdin):
+    for name in names:
+        yield from _read_tasks(name, fmt, stdin)
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m tasks.scoring",
+        description="Rank tasks from JSON or NDJSON input without a Django project.",
+    )
+    parser.add_argument("files", nargs="*", metavar="FILE", help="task files (default, or -: standard input)")
+    parser.add_argument(
+        "--format", choices=("auto", "json", "ndjson"), default="auto",
+        help="input format; auto reads .ndjson/.jsonl files as NDJSON",
+    )
+    parser.add_argument("--ndjson", action="store_true", help="write one task per line, then a {\"meta\": ...} record")
+    parser.add_argument("-o", "--output", help="output file (default: standard output)")
+    parser.add_argument("--strategy", choices=tuple(STRATEGY_PRESETS), default="smart_balance")
+    parser.add_argument("--weights", help="custom weights as a JSON object, e.g. '{\"urgency\": 0.6, \"importance\": 0.4}'")
+    parser.add_argument("--engine", choices=ENGINES, default="auto")
+    parser.add_argument("--as-of", help="reference date (YYYY-MM-DD) instead of today")
+    parser.add_argument("--top-k", type=int, help="only the best K tasks")
+    parser.add_argument("--fields", help=f"comma-separated output fields out of {','.join(OUTPUT_FIELDS)}")
+    parser.add_argument("--aggregate-warnings", action="store_true", help="summarize warnings by code in meta")
+    parser.add_argument("--hoist-weights", action="store_true", help="report the weights once in meta")
+    return parser
+
+
+def main(argv=None, stdin=None, stdout=None):
+    """
+    Runs the command line (sys.argv[1:] by default). stdin/stdout: binary streams, the
+    process's own by default. Returns the exit status.
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    stdin = stdin if stdin is not None else sys.stdin.buffer
+    names = args.files or ["-"]
+    size = _input_size(names, stdin)
+    loads, dumps = _json_codec(large=size is None or size >= ORJSON_MIN_BYTES)
+    weights = None
+    if args.weights is not None:
+        try:
+            weights = loads(args.weights)
+        except ValueError:
+            weights = None
+        if not isinstance(weights, dict):
+            parser.error("--weights must be a JSON object")
+
+    try:
+        rows, meta = iter_scores(
+            _tasks(names, args.format, stdin),
+            strategy=args.strategy, custom_weights=weights, engine=args.engine, top_k=args.top_k,
+            fields=args.fields, as_of=args.as_of, aggregate_warnings=args.aggregate_warnings,
+            hoist_weights=args.hoist_weights,
+        )
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"error: {e}\n")
+        return 1
+
+    try:
+        with open(args.output, "wb") if args.output else nullcontext(stdout or sys.stdout.buffer) as out:
+            if args.ndjson:
+                for row in rows:
+                    out.write(dumps(row) + b"\n")
+                out.write(dumps({"meta": meta}) + b"\n")
+            else:
+                out.write(dumps({"analyzed_tasks": list(rows), "meta": meta}) + b"\n")
+            out.flush()
+    except BrokenPipeError:
+        # the reader went away (e.g. | head): stop quietly, and keep the interpreter from
+        # reporting the failed flush of stdout at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except OSError as e:
+        sys.stderr.write(f"error: {e}\n")
+        return 1
+    return 0
@@ -0,0 +1,317 @@
+"""
+Scoring components.
+
+A component turns the per-task inputs (TaskColumns) into one column of
+factor values; a task's score is the weighted sum of its components, with the
+weights keyed by component name. The four built-in components are registered
+here:
+
+- urgency:      1 when due today or past due (boosted up to
+                MAX_PAST_DUE_DAYS_FOR_BOOST days late), falling linearly to 0
+                at URGENCY_HORIZON_DAYS; 0 without a due date.
+- importance:   importance / 10.
+- dependencies: min-max normalized number of references to the task.
+- effort:       min-max normalized 1 / (1 + hours), 0.5 when all are equal.
+
+register_component() adds more (e.g. from an app's ready()); they are
+computed when a weight vector of the analysis names them. An analysis request
+can also define components as formulas (tasks/formula.py) or replace a
+built-in one with a formula, e.g. {"urgency": "clamp(1 - days / 30)"}.
+
+Every component has a python implementation (lists in, list out) and may
+have a numpy one (arrays in, array out) for the numpy engine; without it the
+numpy engine runs the python one. Both must give the same floats.
+Values are then normalized: "none" (the component guarantees [0, 1]),
+"clamp" (to [0, 1]) or "minmax" (scaled to [0, 1] over the task set, 0 when
+all are equal); NaN becomes 0.
+"""
+from collections import namedtuple
+from functools import cached_property
+from math import inf
+
+from .table import NO_DUE_DATE
+
+MAX_PAST_DUE_DAYS_FOR_BOOST = 30
+URGENCY_HORIZON_DAYS = 60.0
+
+# order of the weighted sum (and of the engines' arithmetic)
+BUILTIN_COMPONENTS = ("urgency", "importance", "dependencies", "effort")
+# order in score_breakdown
+BREAKDOWN_ORDER = ("urgency", "importance", "effort", "dependencies")
+NORMALIZATIONS = ("none", "clamp", "minmax")
+MAX_FORMULA_COMPONENTS = 16
+_NAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789_")
+
+Component = namedtuple("Component", "name python numpy normalize")
+
+
+class TaskColumns:
+    """
+    Per-row inputs of the components, computed on first use. Factors are keyed by id:
+    rows with a duplicated id use the values of its last row. With numpy=True every
+    column is a float64 array, else a list of floats. The table, today and outdegree
+    (per-name reference counts) are available to components needing more.
+    """
+
+    def __init__(self, table, today, outdegree, numpy=False):
+        self.table = table
+        self.today = today
+        self.outdegree = outdegree
+        self.numpy = numpy
+
+    def __len__(self):
+        return len(self.table)
+
+    @cached_property
+    def rows(self):
+        """
+        Row whose values each row uses; None when ids are unique.
+        """
+        if self.numpy:
+            import numpy as np
+
+            name_rows = np.frombuffer(self.table.name_rows, dtype=np.int64)
+            if (name_rows >= 0).sum() == len(self.table):
+                return None
+            return name_rows[np.frombuffer(self.table.row_names, dtype=np.int64)]
+        return self.table.representative_rows()
+
+    def _column(self, values, dtype):
+        rows = self.rows
+        if self.numpy:
+            import numpy as np
+
+            column = np.frombuffer(values, dtype=dtype).astype(np.float64)
+            return column if rows is None else column[rows]
+        if rows is None:
+            return [float(v) for v in values]
+        return [float(values[r]) for r in rows]
+
+    @cached_property
+    def importance(self):
+        return self._column(self.table.importance, "int8")
+
+    @cached_property
+    def hours(self):
+        return self._column(self.table.hours, "float64")
+
+    @cached_property
+    def due(self):
+        """
+        Due date ordinals (NO_DUE_DATE without one).
+        """
+        return self._column(self.table.due, "int32")
+
+    @cached_property
+    def days(self):
+        today = self.today.toordinal()
+        if self.numpy:
+            import numpy as np
+
+            return np.where(self.due == NO_DUE_DATE, inf, self.due - today)
+        return [inf if d == NO_DUE_DATE else d - today for d in self.due]
+
+    @cached_property
+    def has_due_date(self):
+        if self.numpy:
+            return (self.due != NO_DUE_DATE).astype("float64")
+        return [0.0 if d == NO_DUE_DATE else 1.0 for d in self.due]
+
+    @cached_property
+    def blocks(self):
+        outdegree = self.outdegree
+        if self.numpy:
+            import numpy as np
+
+            counts = np.asarray(outdegree, dtype=np.float64)
+            return counts[np.frombuffer(self.table.row_names, dtype=np.int64)]
+        return [float(outdegree[j]) for j in self.table.row_names]
+
+    @cached_property
+    def dependency_count(self):
+        offsets = self.table.dep_offsets
+        if self.numpy:
+            import numpy as np
+
+            counts = np.diff(np.frombuffer(offsets, dtype=np.int64)).astype(np.float64)
+            return counts if self.rows is None else counts[self.rows]
+        counts = [float(offsets[i + 1] - offsets[i]) for i in range(len(self.table))]
+        return counts if self.rows is None else [counts[r] for r in self.rows]
+
+
+def _urgency(days):
+    """
+    days: days until due (negative when past due), None without a due date.
+    """
+    if days is None:
+        return 0.0
+    if days < 0:
+        return min(
+            1.0,
+            1.0 + min(-days, MAX_PAST_DUE_DAYS_FOR_BOOST) / MAX_PAST_DUE_DAYS_FOR_BOOST,
+        )
+    return min(1.0, max(0.0, 1.0 - (days / URGENCY_HORIZON_DAYS)))
+
+
+def _minmax(values, flat):
+    """
+    (v - min) / (max - min) over values; `flat` for every value when they are all equal.
+    """
+    if not values:
+        return []
+    lo, hi = min(values), max(values)
+    if hi - lo < 1e-9:
+        return [flat] * len(values)
+    return [(v - lo) / (hi - lo) for v in values]
+
+
+def urgency(columns):
+    return [0.0 if d == inf else _urgency(d) for d in columns.days]
+
+
+def importance(columns):
+    return [i / 10.0 for i in columns.importance]
+
+
+def dependencies(columns):
+    known = columns.table.known_outdegrees(columns.outdegree)
+    # the bounds only cover referenced tasks, so unreferenced ones can fall below 0
+    lo, hi = (min(known), max(known)) if known else (0, 1)
+    if hi - lo < 1e-9:
+        return [0.0] * len(columns)
+    return [(c - lo) / (hi - lo) for c in columns.blocks]
+
+
+def effort(columns):
+    return _minmax([1.0 / (1.0 + h) for h in columns.hours], 0.5)
+
+
+def _vectorized(name):
+    def run(columns):
+        from . import vectorized
+
+        return getattr(vectorized, name)(columns)
+
+    return run
+
+
+_registry = {}
+
+
+def _valid_name(name):
+    """
+    1-40 characters of a-z, 0-9 and _, not starting with a digit.
+    """
+    return 0 < len(name) <= 40 and not name[0].isdigit() and _NAME_CHARS.issuperset(name)
+
+
+def register_component(name, python, numpy=None, normalize="clamp"):
+    """
+    Registers (or replaces) a scoring component. python(columns) returns one raw value per row
+    of a TaskColumns; numpy(columns), optional, does the same over numpy columns.
+    """
+    if not _valid_name(name):
+        raise ValueError(f"invalid component name '{name}'")
+    if normalize not in NORMALIZATIONS:
+        raise ValueError(f"normalize must be one of {', '.join(NORMALIZATIONS)}")
+    _registry[name] = Component(name, python, numpy, normalize)
+
+
+def unregister_component(name):
+    if name in BUILTIN_COMPONENTS:
+        raise ValueError(f"cannot unregister built-in component '{name}'")
+    _registry.pop(name, None)
+
+
+def registered_components():
+    return dict(_registry)
+
+
+register_component("urgency", urgency, _vectorized("urgency_numpy"), normalize="none")
+register_component("importance", importance, _vectorized("importance_numpy"), normalize="none")
+register_component("dependencies", dependencies, _vectorized("dependencies_numpy"), normalize="none")
+register_component("effort", effort, _vectorized("effort_numpy"), normalize="none")
+
+
+def formula_component(name, spec):
+    """
+    Component from a request's formula spec: "expression" or
+    {"formula": "expression", "normalize": "clamp" | "minmax"}. Raises ValueError.
+    """
+    if not isinstance(name, str) or not _valid_name(name) or name == "weights":
+        raise ValueError(f"invalid component name '{name}': use lowercase letters, digits and _")
+    if isinstance(spec, str):
+        text, normalize = spec, "clamp"
+    elif isinstance(spec, dict) and isinstance(spec.get("formula"), str):
+        text, normalize = spec["formula"], spec.get("normalize", "clamp")
+        if normalize not in ("clamp", "minmax"):
+            raise ValueError(f"component '{name}': normalize must be \"clamp\" or \"minmax\"")
+    else:
+        raise ValueError(f"component '{name}' must be a formula string or {{\"formula\", \"normalize\"}} object")
+    from .formula import compile_formula  # ast and the compiler only load for requests with formulas
+
+    formula = compile_formula(text)
+    return Component(name, formula.evaluate, formula.evaluate_numpy, normalize)
+
+
+def resolve_components(formulas=None, weight_sets=()):
+    """
+    Components of one analysis, in weighted-sum order: the built-ins (or the formulas
+    replacing them), registered components named in any of weight_sets, then the other
+    formula components. formulas: {name: spec} from the request. Raises ValueError.
+    """
+    if formulas is None:
+        formulas = {}
+    if not isinstance(formulas, dict):
+        raise ValueError("components must be an object of name: formula")
+    if len(formulas) > MAX_FORMULA_COMPONENTS:
+        raise ValueError(f"at most {MAX_FORMULA_COMPONENTS} formula components are allowed")
+    custom = {name: formula_component(name, spec) for name, spec in formulas.items()}
+    active = [custom.pop(name, None) or _registry[name] for name in BUILTIN_COMPONENTS]
+    seen = set(BUILTIN_COMPONENTS)
+    for weights in weight_sets:
+        for name in weights:
+            if name not in seen and name not in custom and name in _registry:
+                seen.add(name)
+                active.append(_registry[name])
+    active.extend(custom.values())
+    return active
+
+
+def _normalize(values, mode):
+    if mode == "none":
+        return values
+    values = [0.0 if v != v else v for v in values]
+    if mode == "minmax":
+        finite = [v for v in values if -inf < v < inf]
+        if finite:
+            lo, hi = min(finite), max(finite)
+            values = [0.0] * len(values) if hi - lo < 1e-9 else [(v - lo) / (hi - lo) for v in values]
+    # comparisons rather than min/max, so -0.0 becomes 0.0 like in the numpy version
+    return [0.0 if v <= 0.0 else 1.0 if v >= 1.0 else float(v) for v in values]
+
+
+def evaluate(components, columns):
+    """
+    {name: normalized values} of every component over a TaskColumns (python engine).
+    """
+    return {c.name: _normalize(c.python(columns), c.normalize) for c in components}
+
+
+def weighted_sum(values, names, weights):
+    """
+    Per-row sum of weights[name] * values[name] over names, added in that order.
+    """
+    score = None
+    for name in names:
+        w = weights.get(name, 0)
+        column = values[name]
+        score = [w * x for x in column] if score is None else [s + w * x for s, x in zip(score, column)]
+    return score
+
+
+def breakdown_names(names):
+    """
+    Component names in score_breakdown order: the built-ins, then the others.
+    """
+    return [n for n in BREAKDOWN_ORDER if n in names] + [n for n in names if n not in BUILTIN_COMPONENTS]
@@ -0,0 +1,115 @@
+"""
+Due-date parsing.
+
+Payloads repeat a few hundred distinct due dates across many tasks, so string
+parsing is memoized in a bounded LRU (failures included, bad input is not
+parsed twice) and due_ordinals() parses each distinct value of a column once.
+
+Accepted due dates:
+- date / datetime objects
+- "YYYY-MM-DD" strings (fast path, no exception handling for valid input)
+- ISO 8601 timestamps with or without an offset ("2025-03-01T09:30:00+02:00",
+  "...Z"); the date is the calendar day in the timestamp's own offset
+- epoch integers, in seconds, or milliseconds when abs(value) >= 1e11 (UTC day)
+- anything datetime.strptime(value, "%Y-%m-%d") accepts ("2025-3-1")
+Everything else parses to None (no due date).
+"""
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
+
+NO_DUE_DATE = 0  # date ordinals start at 1
+PARSE_CACHE_SIZE = 4096
+EPOCH_MS_THRESHOLD = 10 ** 11  # ~5138 AD in seconds, ~1973 in milliseconds
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_MONTH_DAYS = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_MAX_ORDINAL = date.max.toordinal()
+
+
+def _iso_day(s):
+    """
+    "YYYY-MM-DD" without try/except. Returns a date, None for an impossible
+    day, or False when s does not have that shape.
+    """
+    if len(s) != 10 or s[4] != "-" or s[7] != "-" or not s.isascii():
+        return False
+    y, m, d = s[:4], s[5:7], s[8:]
+    if not (y.isdigit() and m.isdigit() and d.isdigit()):
+        return False
+    y, m, d = int(y), int(m), int(d)
+    if y < 1 or not 1 <= m <= 12:
+        return None
+    if not 1 <= d <= _MONTH_DAYS[m]:
+        if not (m == 2 and d == 29 and y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)):
+            return None
+    return date(y, m, d)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_string(s):
+    day = _iso_day(s)
+    if day is not False:
+        return day
+    try:
+        return datetime.fromisoformat(s).date()
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(s, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _from_epoch(value):
+    if abs(value) >= EPOCH_MS_THRESHOLD:
+        value //= 1000
+    ordinal = _EPOCH_ORDINAL + value // 86400
+    if 1 <= ordinal <= _MAX_ORDINAL:
+        return date.fromordinal(ordinal)
+    return None
+
+
+def parse_date(value):
+    """
+    Input: a raw due_date value.
+    Returns: a date, or None if there is none or it cannot be parsed.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return _parse_string(value)
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, int) and not isinstance(value, bool):
+        return _from_epoch(value)
+    return None
+
+
+def due_ordinals(values):
+    """
+    Bulk mode: parses a column of raw due_date values, each distinct string once.
+    Returns: array('i') of date ordinals, NO_DUE_DATE where parse_date gives None.
+    """
+    ordinals = []
+    append = ordinals.append
+    seen = {}
+    lookup = seen.get
+    for value in values:
+        ordinal = lookup(value) if value.__class__ is str else None
+        if ordinal is None:
+            day = parse_date(value)
+            ordinal = day.toordinal() if day is not None else NO_DUE_DATE
+            if value.__class__ is str:
+                seen[value] = ordinal
+        append(ordinal)
+    return array("i", ordinals)
+
+
+def parse_cache_info():
+    """
+    Hit/miss statistics of the memoized string parser.
+    """
+    return _parse_string.cache_info()
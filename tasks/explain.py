@@ -0,0 +1,276 @@
+"""
+Task explanations.
+
+explanation() and task_warnings() build the "explanation" string and the
+"warnings" list of a ranked task. With lazy=True, calculate_scores defers
+them with Lazy objects that render on first use: str(), iteration,
+comparison, or encoding through tasks.serializers. Results whose
+explanations are never read or serialized skip the string formatting.
+
+ExplainContext keeps the columns of one analysis. GET /api/tasks/<id>/explain/
+uses it to rebuild the full breakdown of one task later. ExplainStore keeps
+the contexts of the most recent analyses of this process and remembers
+which analysis each client ran last. It holds at most
+settings.TASK_EXPLAIN_CONTEXTS analyses.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+from functools import cached_property
+
+from .components import BUILTIN_COMPONENTS, breakdown_names
+from .table import NO_DUE_DATE
+
+DEFAULT_CONTEXTS = 8
+MAX_CLIENTS = 4096
+_UNSET = object()
+
+
+class Lazy:
+    """
+    A value (a string or a list) computed by render(*args) on first use.
+    Compares, iterates, prints and pickles like the value.
+    """
+
+    __slots__ = ("_render", "_args", "_value")
+
+    def __init__(self, render, *args):
+        self._render = render
+        self._args = args
+        self._value = _UNSET
+
+    def value(self):
+        if self._value is _UNSET:
+            self._value = self._render(*self._args)
+            self._render = self._args = None
+        return self._value
+
+    def __str__(self):
+        return str(self.value())
+
+    def __repr__(self):
+        return repr(self.value())
+
+    def __eq__(self, other):
+        return self.value() == (other.value() if isinstance(other, Lazy) else other)
+
+    def __hash__(self):
+        return hash(self.value())
+
+    def __len__(self):
+        return len(self.value())
+
+    def __iter__(self):
+        return iter(self.value())
+
+    def __contains__(self, item):
+        return item in self.value()
+
+    def __getitem__(self, index):
+        return self.value()[index]
+
+    def __reduce__(self):
+        value = self.value()
+        return type(value), (value,)
+
+
+def explanation(days, blocks, hours, importance, has_dependencies):
+    """
+    days: days until due (negative when past due), None without a due date.
+    blocks: number of dependency references to the task.
+    """
+    reasons = []
+    if days is not None:
+        if days < 0:
+            reasons.append(f"Past due by {-days} day(s) → urgency boosted")
+        elif days <= 3:
+            reasons.append(f"Due in {days} day(s) → urgent")
+        else:
+            reasons.append(f"Due in {days} day(s)")
+    else:
+        reasons.append("No due date")
+
+    if has_dependencies:
+        reasons.append(f"Blocks {blocks} task(s)")
+    if hours <= 2:
+        reasons.append("Quick win (low estimated hours)")
+    if importance >= 8:
+        reasons.append("High importance")
+    return "; ".join(reasons)
+
+
+def task_warnings(cycle_ids, warnings):
+    """
+    cycle_ids: ids of the cycles the task belongs to; warnings: its normalization warnings.
+    """
+    result = []
+    if cycle_ids:
+        if len(cycle_ids) == 1:
+            result.append(f"Task is part of a circular dependency (cycle #{cycle_ids[0]}).")
+        else:
+            result.append(
+                f"Task is part of multiple circular dependencies (cycles {', '.join(map(str, cycle_ids))})."
+            )
+    result.extend(warnings)
+    return result
+
+
+class ExplainContext:
+    """
+    What explain() needs from one analysis: the TaskTable, the engine's columns
+    (see scoring._score_python), the weights and the cycle and warning maps.
+    """
+
+    def __init__(self, table, cols, weights, today, outdegree, cycle_memberships, warnings_map, strategy):
+        self.table = table
+        self.cols = cols
+        self.weights = weights
+        self.today = today
+        self.outdegree = outdegree
+        self.cycle_memberships = cycle_memberships
+        self.warnings_map = warnings_map
+        self.strategy = strategy
+
+    @cached_property
+    def _rows(self):
+        # the last row of each id, like the factors; ids arrive as strings from the URL
+        rows = {}
+        for i, tid in enumerate(self.table.ids):
+            rows[str(tid)] = i
+            rows[tid] = i
+        return rows
+
+    @cached_property
+    def _ranks(self):
+        """
+        1-based rank of every row, from the engine's order when it covers every row (no top_k).
+        """
+        order = self.cols["order"]
+        if len(order) != len(self.table):
+            return None
+        ranks = array("q", bytes(8 * len(order)))
+        for rank, i in enumerate(order, start=1):
+            ranks[i] = rank
+        return ranks
+
+    def _rank(self, row):
+        """
+        Position of row in the full ranking (the engines' sort key, ties by input order).
+        """
+        if self._ranks is not None:
+            return self._ranks[row]
+        score, importance, hours = self.cols["score"], self.table.importance, self.table.hours
+        key = (-round(score[row], 4), -importance[row], hours[row], row)
+        return 1 + sum(
+            1 for i in range(len(self.table)) if (-round(score[i], 4), -importance[i], hours[i], i) < key
+        )
+
+    def explain(self, task_id):
+        """
+        Full breakdown of one task, or None when the analysis has no task with that id.
+        """
+        i = self._rows.get(task_id)
+        if i is None:
+            return None
+        table, cols = self.table, self.cols
+        tid = table.ids[i]
+        due = table.due[i]
+        days = due - self.today.toordinal() if due != NO_DUE_DATE else None
+        dependencies = table.dependencies(i)
+        blocks = self.outdegree[table.row_names[i]]
+        cycle_ids = self.cycle_memberships.get(tid, [])
+        components = {}
+        for name in breakdown_names(cols.get("components", BUILTIN_COMPONENTS)):
+            weight = self.weights.get(name, 0)
+            components[name] = {
+                "value": round(cols[name][i], 4),
+                "weight": round(weight, 4),
+                "contribution": round(weight * cols[name][i], 4),
+            }
+        return {
+            "id": tid,
+            "title": table.titles[i],
+            "rank": self._rank(i),
+            "total_tasks": len(table),
+            "score": round(cols["score"][i], 4),
+            "tier": cols["tier"][i],
+            "strategy": self.strategy,
+            "components": components,
+            "inputs": {
+                "importance": table.importance[i],
+                "estimated_hours": table.hours[i],
+                "due_date": table.due_dates[i],
+                "days_until_due": days,
+                "dependencies": dependencies,
+                "blocks": blocks,
+            },
+            "explanation": explanation(days, blocks, table.hours[i], table.importance[i], bool(dependencies)),
+            "warnings": task_warnings(cycle_ids, self.warnings_map.get(tid, [])),
+            "cycles": cycle_ids,
+        }
+
+
+class ExplainStore:
+    """
+    Thread-safe LRU of ExplainContexts keyed by a token (the analysis cache key, so a
+    cached response can point at the context of the analysis that produced it), plus
+    each client's last token.
+    """
+
+    def __init__(self, max_contexts=DEFAULT_CONTEXTS):
+        self.max_contexts = max_contexts
+        self._contexts = OrderedDict()
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, client, token, context):
+        with self._lock:
+            self._contexts[token] = context
+            self._contexts.move_to_end(token)
+            while len(self._contexts) > self.max_contexts:
+                self._contexts.popitem(last=False)
+            self._point(client, token)
+
+    def point(self, client, token):
+        """
+        Makes token (an analysis already remembered, or since evicted) the client's last analysis.
+        """
+        with self._lock:
+            self._point(client, token)
+
+    def _point(self, client, token):
+        self._clients[client] = token
+        self._clients.move_to_end(client)
+        while len(self._clients) > MAX_CLIENTS:
+            self._clients.popitem(last=False)
+
+    def lookup(self, client):
+        with self._lock:
+            token = self._clients.get(client)
+            context = self._contexts.get(token)
+            if context is not None:
+                self._contexts.move_to_end(token)
+            return context
+
+    def clear(self):
+        with self._lock:
+            self._contexts.clear()
+            self._clients.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_explain_store():
+    """
+    Process-wide ExplainStore sized by settings.TASK_EXPLAIN_CONTEXTS.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from django.conf import settings
+
+                _store = ExplainStore(getattr(settings, "TASK_EXPLAIN_CONTEXTS", DEFAULT_CONTEXTS))
+    return _store
@@ -0,0 +1,176 @@
+"""
+Ranking forecasts.
+
+forecast_scores() ranks the same tasks on each of `days` consecutive
+reference dates, e.g. to show how priorities shift over the next month.
+Only urgency (and formula components reading `days`) depends on the date,
+and built-in urgency is piecewise linear in it: 0 until URGENCY_HORIZON_DAYS
+before the due date, rising linearly to 1 on the due date, constant once past
+due. So moving the reference date by one day can only change the urgency of
+tasks due within that window, a slice of the rows sorted by due date.
+
+The component columns are computed once, for as_of. Every following day
+rescores only the rows whose date-dependent components changed (the same
+arithmetic as the engines, so each day equals a full analysis with that
+as_of) and merges them back into the previous day's order: the other rows
+keep their relative order, so no full sort is needed.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from math import ceil
+from operator import ne
+
+from . import components as _components
+from .components import MAX_PAST_DUE_DAYS_FOR_BOOST, URGENCY_HORIZON_DAYS, TaskColumns, _urgency, evaluate
+from .formula import compile_formula
+from .scoring import (
+    _page_bounds,
+    _resolve_as_of,
+    _resolve_weights,
+    _score_table,
+    _select_engine,
+    _tier,
+    resolve_components,
+)
+from .snapshot import build_table
+from .table import NO_DUE_DATE
+
+DEFAULT_FORECAST_DAYS = 30
+MAX_FORECAST_DAYS = 366
+# built-in components that do not read the reference date
+STATIC_COMPONENTS = {
+    "importance": _components.importance,
+    "dependencies": _components.dependencies,
+    "effort": _components.effort,
+}
+
+
+def _dynamic_components(active, formulas):
+    """
+    Splits the components of an analysis into (built-in urgency or None, other date-dependent
+    components). Formula components depend on the date when they read `days`; registered
+    components other than the built-ins are assumed to.
+    """
+    urgency, others = None, []
+    for component in active:
+        name = component.name
+        if name in (formulas or {}):
+            spec = formulas[name]
+            text = spec if isinstance(spec, str) else spec["formula"]
+            if "days" in compile_formula(text).variables:
+                others.append(component)
+        elif component.python is _components.urgency:
+            urgency = component
+        elif component.python is not STATIC_COMPONENTS.get(name):
+            others.append(component)
+    return urgency, others
+
+
+class _DueIndex:
+    """
+    Rows with a due date sorted by the due ordinal their urgency uses
+    (TaskColumns.due: the last row of a duplicated id supplies it).
+    """
+
+    def __init__(self, due):
+        self.of_row = due
+        rows = sorted((d, i) for i, d in enumerate(due) if d != NO_DUE_DATE)
+        self.due = [d for d, _ in rows]
+        self.rows = [i for _, i in rows]
+
+    def between(self, lo, hi):
+        """
+        Rows due from ordinal lo to hi, inclusive.
+        """
+        return self.rows[bisect_left(self.due, lo):bisect_right(self.due, hi)]
+
+
+def forecast_scores(
+    tasks, days=DEFAULT_FORECAST_DAYS, strategy="smart_balance", custom_weights=None, engine="auto",
+    as_of=None, top_k=10, components=None,
+):
+    """
+    Input: tasks and options as for calculate_scores; days: number of consecutive reference
+    dates starting at as_of (default today), at most MAX_FORECAST_DAYS; top_k: tasks listed per day.
+    Returns: {"forecast": [...], "meta": {...}}, one forecast entry per date:
+      date, tasks (the top_k tasks of that day: id, score, tier), changed (tasks rescored
+      since the previous day) and moved (tasks whose rank changed).
+    """
+    if isinstance(days, bool) or not isinstance(days, int) or not 1 <= days <= MAX_FORECAST_DAYS:
+        raise ValueError(f"days must be an integer from 1 to {MAX_FORECAST_DAYS}")
+    _page_bounds(top_k, None)
+    start = _resolve_as_of(as_of)
+    weights = _resolve_weights(strategy, custom_weights)
+    active = resolve_components(components, [weights])
+    urgency, others = _dynamic_components(active, components)
+
+    table, _ = build_table(tasks)
+    engine = _select_engine(engine, len(table))
+    outdegree = table.outdegree()
+    cols = _score_table(engine, table, start, weights, outdegree, None, components=active)
+    names = cols["components"]
+    terms = [(weights.get(name, 0), cols[name]) for name in names]
+    score = cols["score"]
+    importance, hours = table.importance, table.hours
+    keys = [(-round(score[i], 4), -importance[i], hours[i], i) for i in range(len(table))]
+
+    due_index = _DueIndex(TaskColumns(table, start, outdegree).due) if urgency is not None else None
+    # urgency is constant more than the horizon before the due date or the boost period after it
+    before, after = ceil(URGENCY_HORIZON_DAYS), MAX_PAST_DUE_DAYS_FOR_BOOST + 1
+
+    order = cols["order"]
+    forecast = []
+    for step in range(days):
+        day = start + timedelta(days=step)
+        changed = set()
+        if step:
+            if urgency is not None:
+                column, today = cols["urgency"], day.toordinal()
+                for i in due_index.between(today - after, today + before):
+                    value = _urgency(due_index.of_row[i] - today)
+                    if value != column[i]:
+                        column[i] = value
+                        changed.add(i)
+            if others:
+                fresh = evaluate(others, TaskColumns(table, day, outdegree))
+                for component in others:
+                    column, values = cols[component.name], fresh[component.name]
+                    for i, value in enumerate(values):
+                        if value != column[i]:
+                            column[i] = value
+                            changed.add(i)
+        moved = 0
+        if changed:
+            for i in changed:
+                total = None
+                for w, column in terms:
+                    term = w * column[i]
+                    total = term if total is None else total + term
+                score[i] = total
+                keys[i] = (-round(total, 4), -importance[i], hours[i], i)
+            previous = order
+            kept = [i for i in order if i not in changed]
+            # two sorted runs: Timsort merges them in linear time
+            order = sorted(kept + sorted(changed, key=keys.__getitem__), key=keys.__getitem__)
+            moved = sum(map(ne, previous, order))
+        forecast.append(
+            {
+                "date": day.isoformat(),
+                "tasks": [
+                    {"id": table.ids[i], "score": round(score[i], 4), "tier": _tier(score[i])}
+                    for i in order[:top_k]
+                ],
+                "changed": len(changed),
+                "moved": moved,
+            }
+        )
+
+    meta = {
+        "as_of": start.isoformat(),
+        "days": days,
+        "strategy_used": strategy,
+        "engine": engine,
+        "total_tasks": len(table),
+        "top_k": top_k,
+    }
+    return {"forecast": forecast, "meta": meta}
@@ -0,0 +1,348 @@
+"""
+Safe arithmetic formulas for custom scoring components.
+
+A formula is a single Python-syntax expression over the per-task variables in
+VARIABLES, numbers, + - * / **, comparisons, and/or/not, "a if cond else b"
+and the functions in FUNCTIONS, e.g.
+
+    clamp(1 - days / 30)
+    exp(-hours / 4) if importance >= 7 else 0
+
+Anything else (attribute access, subscripts, other names, keyword arguments)
+is rejected with FormulaError. A formula is parsed and compiled once per
+distinct text (compile_formula is memoized) into two functions: one scalar
+function called per task by the python engine, and one over whole numpy
+columns for the numpy engine. Both give the same floats: arithmetic follows
+IEEE semantics in both (x / 0 is inf or nan instead of an error), and exp,
+log and ** go through the math module on both.
+"""
+import ast
+import math
+from functools import cached_property, lru_cache
+
+# variable: meaning (see components.TaskColumns)
+VARIABLES = {
+    "importance": "importance, 1-10",
+    "hours": "estimated hours",
+    "days": "days until due, negative when past due, inf without a due date",
+    "has_due_date": "1 with a due date, else 0",
+    "blocks": "number of dependency references to the task",
+    "dependency_count": "number of dependencies of the task",
+}
+# function: (min args, max args)
+FUNCTIONS = {
+    "min": (2, None),
+    "max": (2, None),
+    "abs": (1, 1),
+    "clamp": (1, 3),
+    "exp": (1, 1),
+    "log": (1, 1),
+    "sqrt": (1, 1),
+}
+MAX_FORMULA_LENGTH = 500
+MAX_FORMULA_NODES = 200
+FORMULA_CACHE_SIZE = 256
+
+_BINARY_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_UNARY_OPS = (ast.UAdd, ast.USub, ast.Not)
+_COMPARE_OPS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+# nodes without further checks
+_STRUCTURAL = (ast.BoolOp, ast.IfExp, ast.Load, ast.And, ast.Or) + _BINARY_OPS + _UNARY_OPS + _COMPARE_OPS
+
+
+class FormulaError(ValueError):
+    """
+    A formula uses unsupported syntax, names or functions.
+    """
+
+
+def _div(a, b):
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a != a or a == 0:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+def _pow(a, b):
+    try:
+        result = a ** b
+    except (ZeroDivisionError, OverflowError):
+        return math.inf
+    return math.nan if isinstance(result, complex) else result
+
+
+def _exp(x):
+    try:
+        return math.exp(x)
+    except OverflowError:
+        return math.inf
+
+
+def _log(x):
+    if x > 0:
+        return math.log(x)
+    return -math.inf if x == 0 else math.nan
+
+
+def _sqrt(x):
+    return math.nan if x < 0 else math.sqrt(x)
+
+
+def _min(*args):
+    result = args[0]
+    for x in args[1:]:
+        if x != x or x < result:
+            result = x
+    return result
+
+
+def _max(*args):
+    result = args[0]
+    for x in args[1:]:
+        if x != x or x > result:
+            result = x
+    return result
+
+
+def _clamp(x, lo=0.0, hi=1.0):
+    return _min(_max(x, lo), hi)
+
+
+def _and(*args):
+    return all(args)
+
+
+def _or(*args):
+    return any(args)
+
+
+def _not(x):
+    return not x
+
+
+_SCALAR_FUNCTIONS = {
+    "_div": _div,
+    "_pow": _pow,
+    "_and": _and,
+    "_or": _or,
+    "_not": _not,
+    "_f_min": _min,
+    "_f_max": _max,
+    "_f_abs": abs,
+    "_f_clamp": _clamp,
+    "_f_exp": _exp,
+    "_f_log": _log,
+    "_f_sqrt": _sqrt,
+}
+
+
+def _numpy_functions():
+    import numpy as np
+
+    def mapped(fn):
+        def run(*args):
+            arrays = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in args))
+            if arrays[0].ndim == 0:
+                return fn(*(float(a) for a in arrays))
+            values = map(fn, *(a.tolist() for a in arrays))
+            return np.fromiter(values, dtype=np.float64, count=arrays[0].size)
+
+        return run
+
+    def as_float(x):
+        return np.asarray(x, dtype=np.float64)
+
+    def reduce(ufunc):
+        def run(*args):
+            result = args[0]
+            for x in args[1:]:
+                result = ufunc(result, x)
+            return result
+
+        return run
+
+    def clamp(x, lo=0.0, hi=1.0):
+        return np.minimum(np.maximum(x, lo), hi)
+
+    return {
+        "_div": np.divide,
+        "_pow": mapped(_pow),
+        "_and": lambda *args: as_float(reduce(np.logical_and)(*args)),
+        "_or": lambda *args: as_float(reduce(np.logical_or)(*args)),
+        "_not": lambda x: as_float(np.logical_not(x)),
+        "_bool": as_float,
+        "_where": np.where,
+        "_f_min": reduce(np.minimum),
+        "_f_max": reduce(np.maximum),
+        "_f_abs": np.abs,
+        "_f_clamp": clamp,
+        "_f_exp": mapped(_exp),
+        "_f_log": mapped(_log),
+        "_f_sqrt": np.sqrt,
+    }
+
+
+def _call(name, args):
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[])
+
+
+class _Rewriter(ast.NodeTransformer):
+    """
+    Turns a validated expression into calls of the helper functions; vectorized=True
+    also replaces the constructs numpy arrays do not support (chained comparisons,
+    conditional expressions, boolean results in arithmetic).
+    """
+
+    def __init__(self, vectorized):
+        self.vectorized = vectorized
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Div):
+            return _call("_div", [node.left, node.right])
+        if isinstance(node.op, ast.Pow):
+            return _call("_pow", [node.left, node.right])
+        return node
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return _call("_not", [node.operand])
+        return node
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        return _call("_and" if isinstance(node.op, ast.And) else "_or", node.values)
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if not self.vectorized:
+            return node
+        operands = [node.left] + node.comparators
+        pairs = [
+            ast.Compare(left=operands[k], ops=[op], comparators=[operands[k + 1]]) for k, op in enumerate(node.ops)
+        ]
+        return _call("_bool", pairs) if len(pairs) == 1 else _call("_and", pairs)
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        if not self.vectorized:
+            return node
+        return _call("_where", [node.test, node.body, node.orelse])
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        node.func = ast.Name(id="_f_" + node.func.id, ctx=ast.Load())
+        return node
+
+    def visit_Constant(self, node):
+        return ast.Constant(value=float(node.value))
+
+
+def _validate(tree, text):
+    """
+    Checks every node of the parsed expression. Returns the variables it uses, in first-use order.
+    """
+    variables = []
+    callees = set()
+    count = 0
+    for node in ast.walk(tree.body):
+        count += 1
+        if count > MAX_FORMULA_NODES:
+            raise FormulaError(f"formula '{text}' is too long")
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float)):
+                raise FormulaError(f"formula '{text}': only numbers are allowed as constants")
+            if abs(node.value) > 1e308:
+                raise FormulaError(f"formula '{text}': number out of range")
+        elif isinstance(node, ast.Name):
+            if node.id not in VARIABLES and id(node) not in callees:
+                raise FormulaError(
+                    f"formula '{text}': unknown variable '{node.id}', expected one of {', '.join(VARIABLES)}"
+                )
+            if node.id in VARIABLES and node.id not in variables:
+                variables.append(node.id)
+        elif isinstance(node, ast.Call):
+            name = node.func.id if isinstance(node.func, ast.Name) else None
+            if name not in FUNCTIONS or node.keywords:
+                raise FormulaError(f"formula '{text}': unknown function, expected one of {', '.join(FUNCTIONS)}")
+            low, high = FUNCTIONS[name]
+            if len(node.args) < low or (high is not None and len(node.args) > high):
+                raise FormulaError(f"formula '{text}': wrong number of arguments for {name}()")
+            if any(isinstance(a, ast.Starred) for a in node.args):
+                raise FormulaError(f"formula '{text}': unsupported syntax")
+            callees.add(id(node.func))
+        elif isinstance(node, ast.BinOp):
+            if not isinstance(node.op, _BINARY_OPS):
+                raise FormulaError(f"formula '{text}': unsupported operator")
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, _UNARY_OPS):
+                raise FormulaError(f"formula '{text}': unsupported operator")
+        elif isinstance(node, ast.Compare):
+            if not all(isinstance(op, _COMPARE_OPS) for op in node.ops):
+                raise FormulaError(f"formula '{text}': unsupported comparison")
+        elif not isinstance(node, _STRUCTURAL):
+            raise FormulaError(f"formula '{text}': unsupported syntax ({type(node).__name__})")
+    return variables
+
+
+class Formula:
+    """
+    A compiled formula. python: scalar function of the variables (in .variables order);
+    vectorized: the same over numpy arrays (built on first use).
+    """
+
+    def __init__(self, text, tree, variables):
+        self.text = text
+        self.variables = tuple(variables)
+        self._tree = tree
+        self.python = self._build(False, _SCALAR_FUNCTIONS)
+
+    @cached_property
+    def vectorized(self):
+        return self._build(True, _numpy_functions())
+
+    def _build(self, vectorized, functions):
+        body = _Rewriter(vectorized).visit(ast.parse(ast.unparse(self._tree), mode="eval").body)
+        args = ast.arguments(
+            posonlyargs=[], args=[ast.arg(arg=v) for v in self.variables], kwonlyargs=[], kw_defaults=[], defaults=[]
+        )
+        tree = ast.fix_missing_locations(ast.Expression(body=ast.Lambda(args=args, body=body)))
+        return eval(compile(tree, "<formula>", "eval"), {"__builtins__": {}, **functions})
+
+    def evaluate(self, columns):
+        """
+        Raw values (a list) for every row of a components.TaskColumns.
+        """
+        if not self.variables:
+            return [self.python()] * len(columns)
+        return list(map(self.python, *(getattr(columns, v) for v in self.variables)))
+
+    def evaluate_numpy(self, columns):
+        """
+        Raw values (a float64 array) for every row of a components.TaskColumns built with numpy=True.
+        """
+        import numpy as np
+
+        with np.errstate(all="ignore"):
+            values = self.vectorized(*(getattr(columns, v) for v in self.variables))
+        return np.broadcast_to(np.asarray(values, dtype=np.float64), (len(columns),))
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def compile_formula(text):
+    """
+    Parses, validates and compiles a formula; the result is cached by text.
+    Raises FormulaError.
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise FormulaError("formula must be a non-empty string")
+    if len(text) > MAX_FORMULA_LENGTH:
+        raise FormulaError(f"formula is longer than {MAX_FORMULA_LENGTH} characters")
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"formula '{text}' is not a valid expression: {e.msg}")
+    return Formula(text, tree, _validate(tree, text))
@@ -0,0 +1,352 @@
+"""
+Stateful incremental analysis.
+
+IncrementalAnalyzer keeps the normalized tasks, dependency reference counts,
+running min/max structures for the two normalized factors and the ranked order.
+Applying a delta only rescores the tasks it touches; everything is rescaled only
+when an effort or out-degree normalization bound moves. result() is identical to
+calculate_scores() over the current task list (see the equivalence tests).
+"""
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import date
+from heapq import heappop, heappush
+
+from .scoring import (
+    _build_cycle_meta,
+    _iter_output,
+    _normalize_task,
+    _resolve_weights,
+    _tier,
+    _urgency,
+)
+from .table import TaskTable
+from .validation import TaskWarnings
+
+
+class _MinMax:
+    """
+    Multiset of numbers with amortized O(log n) min/max under insertions and
+    removals (lazy-deletion heaps).
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self._low = []
+        self._high = []
+
+    def __bool__(self):
+        return bool(self.counts)
+
+    def add(self, v):
+        if not self.counts[v]:
+            heappush(self._low, v)
+            heappush(self._high, -v)
+        self.counts[v] += 1
+
+    def remove(self, v):
+        self.counts[v] -= 1
+        if not self.counts[v]:
+            del self.counts[v]
+
+    def min(self):
+        while self._low[0] not in self.counts:
+            heappop(self._low)
+        return self._low[0]
+
+    def max(self):
+        while -self._high[0] not in self.counts:
+            heappop(self._high)
+        return -self._high[0]
+
+
+class IncrementalAnalyzer:
+    """
+    analyzer = IncrementalAnalyzer(tasks, strategy="smart_balance")
+    analyzer.apply(updates=[{"id": "t3", "importance": 9}])
+    analyzer.result(top_k=10)
+
+    Tasks must carry unique ids. Urgency is evaluated against `today`
+    (date.today() at construction).
+    """
+
+    def __init__(self, tasks, strategy="smart_balance", custom_weights=None, today=None):
+        self.strategy = strategy
+        self.weights = _resolve_weights(strategy, custom_weights)
+        self.today = today or date.today()
+
+        self._raw = {}  # id -> raw input task, in list order
+        self._tasks = {}  # id -> normalized task, same order
+        self._field_warnings = {}  # id -> coercion warnings (unknown dependencies are checked on output)
+        self._pos = {}  # id -> sequence number, the tie-break order of a full recompute
+        self._next_pos = 0
+        self._refs = Counter()  # dependency target -> number of tasks listing it (target may be unknown)
+        self._outdegree = _MinMax()  # out-degrees > 0 of present tasks
+        self._effort = _MinMax()  # effort_raw of present tasks
+        self._components = {}  # id -> (urgency, importance, effort_raw)
+        self._scores = {}
+        self._keys = {}
+        self._ranked = []
+        self._bounds = None
+        self._cycle_list, self._cycle_memberships = [], {}
+
+        self._check_delta(tasks, (), ())
+        for t in tasks:
+            self._insert(t)
+        self._rescore_all()
+        self._refresh_cycles()
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def tasks(self):
+        """
+        Current raw task list; calculate_scores(analyzer.tasks()) == analyzer.result().
+        """
+        return list(self._raw.values())
+
+    # -- delta application -------------------------------------------------
+
+    def apply(self, inserts=(), updates=(), deletes=()):
+        """
+        inserts: new task dicts; updates: partial task dicts merged into the existing
+        task with the same id; deletes: task ids. Deletes run first, then updates, then inserts.
+        Returns {"rescored": n, "rescaled": bool, "cycles_recomputed": bool}.
+        """
+        self._check_delta(inserts, updates, deletes)
+        affected = set()
+        edges_changed = False
+
+        for tid in deletes:
+            nt = self._tasks[tid]
+            edges_changed = edges_changed or bool(nt["dependencies"]) or self._refs[tid] > 0
+            affected |= self._detach(tid)
+            if self._refs[tid]:
+                self._outdegree.remove(self._refs[tid])
+            self._unrank(tid)
+            for store in (self._raw, self._tasks, self._field_warnings, self._pos, self._components, self._scores):
+                del store[tid]
+
+        for patch in updates:
+            tid = patch["id"]
+            raw = dict(self._raw[tid], **patch)
+            old_deps = self._tasks[tid]["dependencies"]
+            affected |= self._detach(tid)
+            affected |= self._attach(raw, self._pos[tid])
+            edges_changed = edges_changed or old_deps != self._tasks[tid]["dependencies"]
+
+        for raw in inserts:
+            edges_changed = edges_changed or bool(raw.get("dependencies")) or self._refs[raw["id"]] > 0
+            affected |= self._insert(raw)
+
+        affected &= self._tasks.keys()
+        rescaled = self._current_bounds() != self._bounds
+        if rescaled:
+            self._rescore_all()
+        else:
+            for tid in affected:
+                self._rescore(tid)
+        if edges_changed:
+            self._refresh_cycles()
+        return {
+            "rescored": len(self._tasks) if rescaled else len(affected),
+            "rescaled": rescaled,
+            "cycles_recomputed": edges_changed,
+        }
+
+    def _check_delta(self, inserts, updates, deletes):
+        present = set(self._tasks)
+        for tid in deletes:
+            if tid not in present:
+                raise ValueError(f"cannot delete unknown task '{tid}'")
+            present.discard(tid)
+        for patch in updates:
+            if not isinstance(patch, dict) or patch.get("id") not in present:
+                raise ValueError(f"cannot update unknown task '{patch.get('id') if isinstance(patch, dict) else patch}'")
+        for raw in inserts:
+            if not isinstance(raw, dict) or "id" not in raw:
+                raise ValueError("inserted tasks need an explicit 'id'")
+            if raw["id"] in present:
+                raise ValueError(f"duplicate task id '{raw['id']}'")
+            present.add(raw["id"])
+
+    def _bump_ref(self, target, delta):
+        """
+        Changes the reference count of `target`, keeping the out-degree multiset in sync.
+        """
+        old = self._refs[target]
+        new = old + delta
+        if new:
+            self._refs[target] = new
+        else:
+            del self._refs[target]
+        if target in self._tasks:
+            if old:
+                self._outdegree.remove(old)
+            if new:
+                self._outdegree.add(new)
+
+    def _insert(self, raw):
+        tid = raw["id"]
+        if self._refs[tid]:
+            # previously dangling references now count towards the new task's out-degree
+            self._outdegree.add(self._refs[tid])
+        affected = self._attach(raw, self._next_pos)
+        self._next_pos += 1
+        return affected
+
+    def _attach(self, raw, pos):
+        """
+        Normalizes and registers a task (new or replacing its previous version in place).
+        Returns the ids whose factors changed.
+        """
+        warnings_map = TaskWarnings()
+        nt = _normalize_task(raw, pos, warnings_map)
+        tid = nt["id"]
+        self._raw[tid] = raw
+        self._tasks[tid] = nt
+        self._field_warnings[tid] = warnings_map.get(tid, [])
+        self._pos[tid] = pos
+        for d in nt["dependencies"]:
+            self._bump_ref(d, 1)
+
+        effort_raw = 1.0 / (1.0 + nt["estimated_hours"])
+        self._effort.add(effort_raw)
+        dd = nt["due_date_parsed"]
+        days = (dd - self.today).days if dd is not None else None
+        self._components[tid] = (_urgency(days), nt["importance"] / 10.0, effort_raw)
+        return {tid, *nt["dependencies"]}
+
+    def _detach(self, tid):
+        """
+        Removes a task's contributions to the shared counters. Returns the ids whose factors changed.
+        """
+        nt = self._tasks[tid]
+        for d in nt["dependencies"]:
+            self._bump_ref(d, -1)
+        self._effort.remove(self._components[tid][2])
+        return {tid, *nt["dependencies"]}
+
+    # -- scoring and ranking -----------------------------------------------
+
+    def _current_bounds(self):
+        if self._effort:
+            min_e, max_e = self._effort.min(), self._effort.max()
+        else:
+            min_e, max_e = 0.0, 1.0
+        if self._outdegree:
+            min_d, max_d = self._outdegree.min(), self._outdegree.max()
+        else:
+            min_d, max_d = 0, 1
+        return min_e, max_e, min_d, max_d
+
+    def _factors(self, tid):
+        s_urg, s_imp, effort_raw = self._components[tid]
+        min_e, max_e, min_d, max_d = self._bounds
+        if max_e - min_e < 1e-9:
+            s_eff = 0.5
+        else:
+            s_eff = (effort_raw - min_e) / (max_e - min_e)
+        if max_d - min_d < 1e-9:
+            s_dep = 0.0
+        else:
+            s_dep = (self._refs[tid] - min_d) / (max_d - min_d)
+        return min(1.0, s_urg), s_imp, s_eff, s_dep
+
+    def _compute(self, tid):
+        s_urg, s_imp, s_eff, s_dep = self._factors(tid)
+        weights = self.weights
+        score = (
+            weights.get("urgency", 0) * s_urg
+            + weights.get("importance", 0) * s_imp
+            + weights.get("dependencies", 0) * s_dep
+            + weights.get("effort", 0) * s_eff
+        )
+        nt = self._tasks[tid]
+        self._scores[tid] = score
+        self._keys[tid] = (-round(score, 4), -nt["importance"], nt["estimated_hours"], self._pos[tid], tid)
+
+    def _unrank(self, tid):
+        key = self._keys.pop(tid)
+        i = bisect_left(self._ranked, key)
+        if i < len(self._ranked) and self._ranked[i] is key:
+            del self._ranked[i]
+        else:
+            # unorderable keys (NaN hours) can defeat the bisection
+            self._ranked.remove(key)
+
+    def _rescore(self, tid):
+        if tid in self._keys:
+            self._unrank(tid)
+        self._compute(tid)
+        insort(self._ranked, self._keys[tid])
+
+    def _rescore_all(self):
+        self._bounds = self._current_bounds()
+        for tid in self._tasks:
+            self._compute(tid)
+        self._ranked = sorted(self._keys.values())
+
+    def _refresh_cycles(self):
+        self._cycle_list, self._cycle_memberships = _build_cycle_meta(
+            TaskTable.from_normalized(self._tasks.values())
+        )
+
+    # -- output -------------------------------------------------------------
+
+    def _warnings(self, tid):
+        missing = [
+            f"dependency '{d}' not found in provided tasks"
+            for d in self._tasks[tid]["dependencies"]
+            if d not in self._tasks
+        ]
+        return self._field_warnings[tid] + missing
+
+    def ranking(self):
+        """
+        Task ids in rank order.
+        """
+        return [key[-1] for key in self._ranked]
+
+    def result(self, top_k=None):
+        """
+        Same shape as calculate_scores(); with top_k only the best top_k tasks are built.
+        """
+        keys = self._ranked if top_k is None else self._ranked[:top_k]
+        selected = [key[-1] for key in keys]
+
+        table = TaskTable.from_normalized(self._tasks[tid] for tid in selected)
+        cols = {"urgency": [], "importance": [], "effort": [], "dependencies": [], "score": [], "tier": []}
+        for tid in selected:
+            s_urg, s_imp, s_eff, s_dep = self._factors(tid)
+            cols["urgency"].append(s_urg)
+            cols["importance"].append(s_imp)
+            cols["effort"].append(s_eff)
+            cols["dependencies"].append(s_dep)
+            cols["score"].append(self._scores[tid])
+            cols["tier"].append(_tier(self._scores[tid]))
+        warnings_map = {tid: self._warnings(tid) for tid in selected}
+        outdegree = [self._refs[name] for name in table.names]
+
+        meta = {"cycles": self._cycle_list, "strategy_used": self.strategy, "engine": "incremental"}
+        # same ordering as a full recompute: coercion warnings first, then unknown-dependency-only tasks
+        flat_warnings = [
+            {"task_id": tid, "warnings": self._warnings(tid)} for tid in self._tasks if self._field_warnings[tid]
+        ]
+        for tid in self._tasks:
+            if not self._field_warnings[tid]:
+                msgs = self._warnings(tid)
+                if msgs:
+                    flat_warnings.append({"task_id": tid, "warnings": msgs})
+        if flat_warnings:
+            meta["warnings_summary"] = flat_warnings
+        if top_k is not None:
+            meta["top_k"] = top_k
+            meta["total_tasks"] = len(self._tasks)
+            meta["next_cursor"] = str(top_k) if top_k < len(self._tasks) else None
+
+        rows = _iter_output(
+            table, cols, range(len(selected)), self.today, self.weights, outdegree,
+            self._cycle_memberships, warnings_map,
+        )
+        return {"analyzed_tasks": list(rows), "meta": meta}
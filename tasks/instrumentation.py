@@ -0,0 +1,231 @@
+"""
+Hot-path instrumentation.
+
+A Timings object records how long each phase of a request takes (decode,
+normalize, score, sort, ...) plus a few counts (tasks, edges, cycles,
+warnings). Phases nest: the time of an inner phase is reported under its own
+name and not again under the enclosing one, so the phases add up to the total.
+It is opt-in per request; code on the hot path takes a `timings` argument that
+defaults to NULL_TIMINGS, whose methods do nothing.
+
+Finished records go to a pluggable sink, settings.TASK_TIMING_SINK: the dotted
+path of a callable taking the record dict (default: log_sink, one INFO line on
+the "tasks.timing" logger).
+
+LatencyHistograms aggregates request and phase latencies per process for the
+Prometheus endpoint (see tasks/middleware.py).
+"""
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_SINK = "tasks.instrumentation.log_sink"
+# upper bounds in seconds; +Inf is implied
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _logger():
+    # logging is imported on first use: the scoring core loads without it
+    import logging
+
+    return logging.getLogger("tasks.timing")
+
+
+class _Phase:
+    __slots__ = ("timings", "name", "started", "inner")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.inner = 0.0
+        self.timings._stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        stack = self.timings._stack
+        stack.pop()
+        if stack:
+            stack[-1].inner += elapsed
+        phases = self.timings.phases
+        phases[self.name] = phases.get(self.name, 0.0) + elapsed - self.inner
+        return False
+
+
+class Timings:
+    """
+    Per-request phase timings (seconds, exclusive of nested phases) and counts.
+    """
+
+    enabled = True
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = {}
+        self.counts = {}
+        self._stack = []
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        """
+        Records a phase measured by the caller (e.g. before timing was known to be wanted).
+        """
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def as_meta(self):
+        """
+        {"total_ms", "phases_ms": {phase: ms}, "counts": {...}} as of now.
+        """
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "phases_ms": {name: round(s * 1000, 3) for name, s in self.phases.items()},
+            "counts": dict(self.counts),
+        }
+
+    def server_timing(self):
+        """
+        Server-Timing header value, one metric per phase.
+        """
+        return ", ".join(f"{name};dur={s * 1000:.3f}" for name, s in self.phases.items())
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTimings:
+    """
+    Stand-in when timing is off: phase() hands out one shared no-op context manager.
+    """
+
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def add(self, name, seconds):
+        pass
+
+    def count(self, name, value):
+        pass
+
+
+NULL_TIMINGS = _NullTimings()
+
+
+def log_sink(record):
+    import json
+
+    _logger().info(json.dumps(record, sort_keys=True))
+
+
+_sink = None
+
+
+def get_sink():
+    """
+    The callable configured as settings.TASK_TIMING_SINK, imported on first use.
+    """
+    global _sink
+    if _sink is None:
+        from django.conf import settings
+        from django.utils.module_loading import import_string
+
+        _sink = import_string(getattr(settings, "TASK_TIMING_SINK", DEFAULT_SINK))
+    return _sink
+
+
+def emit(endpoint, timings):
+    """
+    Sends the final record of a request to the configured sink and adds its phases to
+    the tasks_phase_duration_seconds histograms. Sink errors are logged, not raised.
+    """
+    for name, seconds in timings.phases.items():
+        histograms.observe("tasks_phase_duration_seconds", {"endpoint": endpoint, "phase": name}, seconds)
+    record = dict(timings.as_meta(), endpoint=endpoint)
+    try:
+        get_sink()(record)
+    except Exception:
+        _logger().exception("timing sink failed")
+    return record
+
+
+class LatencyHistograms:
+    """
+    Thread-safe cumulative histograms keyed by (metric, label items).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, metric, labels, seconds):
+        key = (metric, tuple(sorted(labels.items())))
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (last slot: above every bound), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self, help_texts=None):
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            snapshot = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        lines = []
+        last_metric = None
+        for (metric, labels), (counts, total, n) in snapshot:
+            if metric != last_metric:
+                if help_texts and metric in help_texts:
+                    lines.append(f"# HELP {metric} {help_texts[metric]}")
+                lines.append(f"# TYPE {metric} histogram")
+                last_metric = metric
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            sep = "," if label_text else ""
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{{label_text}{sep}le="{le}"}} {cumulative}')
+            plain = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{metric}_sum{plain} {total!r}")
+            lines.append(f"{metric}_count{plain} {n}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+HELP_TEXTS = {
+    "tasks_request_duration_seconds": "Request latency by view, method and status class.",
+    "tasks_phase_duration_seconds": "Per-phase time of requests sent with debug_timing.",
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+histograms = LatencyHistograms()
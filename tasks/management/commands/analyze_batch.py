@@ -0,0 +1,71 @@
+import json
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from tasks.batch import analyze_batch, default_workers
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Analyze many projects in parallel worker processes. Input is a JSON file shaped like the "
+        "/api/tasks/batch/ body (or just its \"projects\" object), a directory of <project>.json task "
+        "lists, or --stored to analyze every project in the task store."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", nargs="?", help="JSON file or directory of per-project JSON files")
+        parser.add_argument("--stored", action="store_true", help="analyze all projects in the task store")
+        parser.add_argument("--output", "-o", help="write results here instead of stdout")
+        parser.add_argument("--workers", type=int, default=default_workers())
+        parser.add_argument("--strategy", default=None)
+        parser.add_argument("--top-k", type=int, default=None)
+        parser.add_argument("--engine", default="auto")
+        parser.add_argument("--as-of", help="reference date (YYYY-MM-DD) instead of today")
+
+    def _load(self, options):
+        if options["stored"]:
+            names = Task.objects.values_list("project", flat=True).distinct().order_by("project")
+            return {"projects": {name: list(Task.objects.for_project(name).iter_task_dicts()) for name in names}}
+        if not options["input"]:
+            raise CommandError("give an input file or directory, or --stored")
+        path = Path(options["input"])
+        try:
+            if path.is_dir():
+                return {"projects": {f.stem: json.loads(f.read_text()) for f in sorted(path.glob("*.json"))}}
+            payload = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f"cannot read {path}: {e}")
+        return payload if isinstance(payload, dict) and "projects" in payload else {"projects": payload}
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+        payload = self._load(options)
+        try:
+            results, meta = analyze_batch(
+                payload["projects"],
+                strategy=options["strategy"] or payload.get("strategy", "smart_balance"),
+                custom_weights=payload.get("weights"),
+                engine=options["engine"],
+                top_k=options["top_k"] if options["top_k"] is not None else payload.get("top_k"),
+                workers=options["workers"],
+                as_of=options["as_of"] or payload.get("as_of"),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        body = json.dumps({"results": results, "meta": meta}, cls=DjangoJSONEncoder)
+        if options["output"]:
+            Path(options["output"]).write_text(body)
+        else:
+            self.stdout.write(body)
+        self.stderr.write(
+            f"analyzed {meta['projects']} projects ({meta['failed']} failed) "
+            f"with {meta['workers']} workers in {meta['chunks']} chunks"
+        )
+        if meta["failed"]:
+            sys.exit(1)
@@ -0,0 +1,66 @@
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.ndjson import iter_ndjson_tasks
+from tasks.serializers import DecodeError, loads
+from tasks.snapshot import SNAPSHOT_SUFFIX, write_snapshot
+from tasks.table import TaskTable
+
+
+class Command(BaseCommand):
+    help = (
+        "Normalize a JSON task list (or {\"tasks\": [...]}) or an NDJSON file with one task per line "
+        "into a binary snapshot (tasks/snapshot.py) that analyses open without parsing. "
+        "Use - to read standard input."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="JSON or NDJSON task file, or - for stdin")
+        parser.add_argument(
+            "output", nargs="?", help=f"snapshot path (default: the input path with a {SNAPSHOT_SUFFIX} suffix)"
+        )
+        parser.add_argument(
+            "--format", choices=("auto", "json", "ndjson"), default="auto",
+            help="input format; auto picks ndjson for .ndjson/.jsonl files",
+        )
+
+    def _tasks(self, source, fmt):
+        if fmt == "ndjson":
+            return iter_ndjson_tasks(source, loads)
+        payload = loads(source.read())
+        if isinstance(payload, dict):
+            payload = payload.get("tasks")
+        if not isinstance(payload, list):
+            raise ValueError("expected a list of tasks or {\"tasks\": [...]}")
+        return payload
+
+    def handle(self, *args, **options):
+        name = options["input"]
+        if name == "-" and not options["output"]:
+            raise CommandError("give an output path when reading stdin")
+        fmt = options["format"]
+        if fmt == "auto":
+            fmt = "ndjson" if Path(name).suffix in (".ndjson", ".jsonl") else "json"
+        output = Path(options["output"] or Path(name).with_suffix(SNAPSHOT_SUFFIX))
+
+        started = time.perf_counter()
+        try:
+            source = nullcontext(sys.stdin.buffer) if name == "-" else open(name, "rb")
+        except OSError as e:
+            raise CommandError(f"cannot read {name}: {e}")
+        try:
+            with source as lines:
+                table, warnings_map = TaskTable.build(self._tasks(lines, fmt))
+            write_snapshot(output, table, warnings_map)
+        except DecodeError as e:
+            raise CommandError(f"invalid json in {name}: {e}")
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        self.stderr.write(
+            f"wrote {len(table)} tasks ({len(table.dep_targets)} dependencies, {len(warnings_map)} tasks with "
+            f"warnings) to {output} ({output.stat().st_size} bytes) in {time.perf_counter() - started:.2f}s"
+        )
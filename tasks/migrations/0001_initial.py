@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.CharField(default='default', max_length=100)),
+                ('external_id', models.CharField(max_length=100)),
+                ('title', models.CharField(max_length=400)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('importance', models.IntegerField(default=5)),
+                ('estimated_hours', models.FloatField(default=2.0)),
+                ('dependencies', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['due_date'], name='task_due_date_idx'), models.Index(fields=['importance'], name='task_importance_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'external_id'), name='task_project_external_id_uniq')],
+            },
+        ),
+    ]
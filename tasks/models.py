@@ -1,6 +1,78 @@
-from django.db import models
+from django.db import models, transaction
+
+# fields read by the scoring engine, in the order calculate_scores expects them
+SCORING_FIELDS = ("external_id", "title", "due_date", "importance", "estimated_hours", "dependencies")
+
+
+class TaskQuerySet(models.QuerySet):
+
+    def for_project(self, project):
+        return self.filter(project=project)
+
+    def iter_task_dicts(self, chunk_size=2000):
+        """
+        Streams stored tasks as plain dicts in the shape calculate_scores takes,
+        using a single query with .values() instead of model instances.
+        Unless the queryset is already ordered, tasks come in insertion (pk) order, so tie
+        breaks, warnings and cache keys do not depend on the database's row order.
+        """
+        rows = self if self.ordered else self.order_by("pk")
+        for row in rows.values_list(*SCORING_FIELDS).iterator(chunk_size=chunk_size):
+            external_id, title, due_date, importance, estimated_hours, dependencies = row
+            yield {
+                "id": external_id,
+                "title": title,
+                "due_date": due_date.isoformat() if due_date else None,
+                "importance": importance,
+                "estimated_hours": estimated_hours,
+                "dependencies": dependencies,
+            }
+
+    def bulk_upsert(self, project, tasks, batch_size=1000):
+        """
+        tasks: normalized task dicts (id, title, due_date_parsed, importance, estimated_hours, dependencies).
+        Inserts new ids and updates existing ones with bulk_create/bulk_update, batch_size rows at a time.
+        Returns (created, updated).
+        """
+        by_id = {t["id"]: t for t in tasks}
+        items = list(by_id.values())
+        created = updated = 0
+        with transaction.atomic():
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                existing = dict(
+                    self.filter(project=project, external_id__in=[t["id"] for t in batch])
+                    .values_list("external_id", "pk")
+                )
+                to_create, to_update = [], []
+                for t in batch:
+                    obj = Task(
+                        pk=existing.get(t["id"]),
+                        project=project,
+                        external_id=t["id"],
+                        title=t["title"],
+                        due_date=t["due_date_parsed"],
+                        importance=t["importance"],
+                        estimated_hours=t["estimated_hours"],
+                        dependencies=t["dependencies"],
+                    )
+                    (to_update if obj.pk else to_create).append(obj)
+                if to_create:
+                    self.bulk_create(to_create, batch_size=batch_size)
+                if to_update:
+                    self.bulk_update(
+                        to_update,
+                        ["title", "due_date", "importance", "estimated_hours", "dependencies"],
+                        batch_size=batch_size,
+                    )
+                created += len(to_create)
+                updated += len(to_update)
+        return created, updated
+
 
 class Task(models.Model):
+    project = models.CharField(max_length=100, default="default")
+    external_id = models.CharField(max_length=100)
     title = models.CharField(max_length=400)
     due_date = models.DateField(null=True, blank=True)
     importance = models.IntegerField(default=5)
@@ -10,5 +82,26 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["project", "external_id"], name="task_project_external_id_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["due_date"], name="task_due_date_idx"),
+            models.Index(fields=["importance"], name="task_importance_idx"),
+        ]
+
     def __str__(self):
         return self.title
+
+    def to_task_dict(self):
+        return {
+            "id": self.external_id,
+            "title": self.title,
+            "due_date": self.due_date.isoformat() if self.due_date else None,
+            "importance": self.importance,
+            "estimated_hours": self.estimated_hours,
+            "dependencies": self.dependencies,
+        }
@@ -0,0 +1,28 @@
+"""
+NDJSON task input: one task object per line.
+
+Shared by the API views, the build_snapshot command and the command line
+(tasks/cli.py). It imports nothing else from the project, not even Django.
+Callers pass their JSON decoder. Blank lines are skipped.
+"""
+
+
+def iter_ndjson_tasks(lines, loads, source=None):
+    """
+    Parses one task object per line, lazily, so the input is never held in memory at once.
+    lines: any iterable of str or bytes lines. loads: the JSON decoder, raising ValueError
+    on invalid input. source: a name (e.g. the file) that error messages start with.
+    Raises ValueError naming the line of the first invalid or non-object line.
+    """
+    prefix = f"{source}: " if source is not None else ""
+    for lineno, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            task = loads(line)
+        except ValueError as e:
+            raise ValueError(f"{prefix}invalid json on line {lineno}: {e}")
+        if not isinstance(task, dict):
+            raise ValueError(f"{prefix}line {lineno} is not a task object")
+        yield task
@@ -0,0 +1,361 @@
+"""
+Capacity-constrained daily plans.
+
+optimize_days() picks, day by day over a horizon, the set of tasks with the
+highest total score that fits the day's hours budget, where a task can only be
+picked once everything it depends on is done on an earlier day or picked the
+same day. Circular dependencies are collapsed into one item (all members or
+none), as in the planner.
+
+Each day is solved with one of:
+
+- "dp":    exact 0/1 knapsack DP at quarter-hour resolution. Precedence is
+           handled with the tree-knapsack recurrence, so it applies when every
+           candidate has at most one prerequisite among the day's candidates
+           and items x capacity stays under DP_MAX_CELLS.
+- "bnb":   depth-first branch and bound (fractional-knapsack bound) seeded with
+           the greedy solution; exact when it finishes within its share of
+           time_budget_ms, otherwise the best solution found so far.
+- "greedy": best of a lazy density greedy over bundles (an item together with
+           its missing prerequisites, walk cut off at the day's budget) and plain
+           greedy-by-score.
+- "score_greedy": take tasks in score order when they fit (the baseline).
+
+"auto" uses dp when it applies, else bnb up to BNB_MAX_ITEMS candidates, else greedy.
+"""
+import heapq
+import math
+import time
+from datetime import timedelta
+
+from .planner import _dependency_model, _execution_order, _model_meta
+
+METHODS = ("auto", "dp", "bnb", "greedy", "score_greedy")
+HOUR_UNITS = 4  # dp resolution: quarter hours
+DP_MAX_CELLS = 1_000_000
+BNB_MAX_ITEMS = 300
+DEFAULT_TIME_BUDGET_MS = 200
+MAX_DAYS = 366
+
+
+def _candidates(remaining, weight, cap, done, preds):
+    """
+    Items that fit `cap` on their own and whose prerequisites are done or candidates too.
+    remaining is in topological order, so prerequisites are decided first.
+    """
+    candidate = set()
+    for c in remaining:
+        if weight[c] <= cap + 1e-9 and all(p in done or p in candidate for p in preds[c]):
+            candidate.add(c)
+    return candidate
+
+
+def _score_greedy(cands, value, weight, cap, preds, done):
+    chosen = set()
+    for c in sorted(cands, key=lambda c: -value[c]):
+        if weight[c] <= cap + 1e-9 and all(p in done or p in chosen for p in preds[c]):
+            chosen.add(c)
+            cap -= weight[c]
+    return chosen
+
+
+def _bundle(c, preds, done, chosen, weight, cap):
+    """
+    c plus its prerequisites that are neither done nor chosen, or None once the bundle
+    cannot fit `cap` (the walk stops there, which bounds the work per item).
+    """
+    bundle, stack, total = {c}, [c], weight[c]
+    while stack:
+        for p in preds[stack.pop()]:
+            if p not in done and p not in chosen and p not in bundle:
+                total += weight[p]
+                if total > cap + 1e-9:
+                    return None
+                bundle.add(p)
+                stack.append(p)
+    return bundle if total <= cap + 1e-9 else None
+
+
+def _density(value, weight):
+    return value / weight if weight > 0 else math.inf
+
+
+def _closure_greedy(cands, value, weight, cap, preds, done):
+    """
+    Lazy greedy over bundles (an item with its missing prerequisites), best bundle density
+    first. A bundle shrinks as its prerequisites get chosen, so a popped entry is re-scored
+    and pushed back when it no longer beats the next one.
+    """
+    chosen = set()
+    heap = []
+    for c in cands:
+        bundle = _bundle(c, preds, done, chosen, weight, cap)
+        if bundle is not None:
+            heap.append((-_density(sum(value[b] for b in bundle), sum(weight[b] for b in bundle)), c))
+    heapq.heapify(heap)
+    while heap:
+        key, c = heapq.heappop(heap)
+        if c in chosen:
+            continue
+        bundle = _bundle(c, preds, done, chosen, weight, cap)
+        if bundle is None:
+            continue
+        bundle_value = sum(value[b] for b in bundle)
+        new_key = -_density(bundle_value, sum(weight[b] for b in bundle))
+        if heap and new_key > key and new_key > heap[0][0]:
+            heapq.heappush(heap, (new_key, c))
+            continue
+        if bundle_value > 0:
+            chosen |= bundle
+            cap -= sum(weight[b] for b in bundle)
+    return chosen
+
+
+def _greedy(cands, value, weight, cap, preds, done):
+    a = _closure_greedy(cands, value, weight, cap, preds, done)
+    b = _score_greedy(cands, value, weight, cap, preds, done)
+    return a if sum(value[c] for c in a) >= sum(value[c] for c in b) else b
+
+
+def _forest_preds(cands, preds, done):
+    """
+    The single candidate prerequisite of every candidate (None for roots), or None
+    when some candidate has several and the tree DP does not apply.
+    """
+    parent = {}
+    for c in cands:
+        open_preds = [p for p in preds[c] if p not in done]
+        if len(open_preds) > 1:
+            return None
+        parent[c] = open_preds[0] if open_preds else None
+    return parent
+
+
+def _dp(order, parent, value, weight, cap):
+    """
+    Tree knapsack over a preorder of the prerequisite forest: skipping an item skips
+    its whole subtree. best[i][u] = best value from preorder position i on with u units.
+    """
+    children = {c: [] for c in order}
+    roots = []
+    for c in order:
+        (children[parent[c]] if parent[c] is not None else roots).append(c)
+    preorder, skip = [], {}
+    stack = [(c, False) for c in reversed(roots)]
+    while stack:
+        c, closing = stack.pop()
+        if closing:
+            skip[c] = len(preorder)
+            continue
+        preorder.append(c)
+        stack.append((c, True))
+        stack.extend((child, False) for child in reversed(children[c]))
+    skip = [skip[c] for c in preorder]
+
+    units = int(cap * HOUR_UNITS + 1e-9)
+    w = [math.ceil(weight[c] * HOUR_UNITS - 1e-9) for c in preorder]
+    n = len(preorder)
+    best = [None] * (n + 1)
+    best[n] = [0.0] * (units + 1)
+    for i in range(n - 1, -1, -1):
+        skipped, nxt, wi, vi = best[skip[i]], best[i + 1], w[i], value[preorder[i]]
+        if wi > units:
+            best[i] = list(skipped)
+            continue
+        best[i] = skipped[:wi] + [s if s >= vi + t else vi + t for s, t in zip(skipped[wi:], nxt)]
+
+    chosen, i, u = set(), 0, units
+    while i < n:
+        # ties were resolved towards skipping, so any difference means the item was taken
+        if w[i] <= u and best[i][u] != best[skip[i]][u]:
+            chosen.add(preorder[i])
+            u -= w[i]
+            i += 1
+        else:
+            i = skip[i]
+    return chosen
+
+
+def _bnb(cands, order, value, weight, cap, preds, done, deadline, incumbent):
+    """
+    Depth-first include/exclude search in topological order. Returns (chosen, finished).
+    """
+    seq = [c for c in order if c in cands]
+    n = len(seq)
+    pos_of = {c: i for i, c in enumerate(seq)}
+    need = [[pos_of[p] for p in preds[c] if p not in done] for c in seq]
+    v = [value[c] for c in seq]
+    w = [weight[c] for c in seq]
+    by_density = sorted(range(n), key=lambda i: -v[i] / w[i] if w[i] > 0 else -math.inf)
+
+    best_value = sum(value[c] for c in incumbent)
+    best = set(incumbent)
+    taken = bytearray(n)
+    state = {"nodes": 0, "timed_out": False}
+
+    def bound(pos, room):
+        total = 0.0
+        for i in by_density:
+            if i < pos or v[i] <= 0:
+                continue
+            if w[i] <= room:
+                room -= w[i]
+                total += v[i]
+            else:
+                return total + (v[i] * room / w[i] if w[i] > 0 else v[i])
+        return total
+
+    def search(pos, room, total):
+        nonlocal best_value, best
+        state["nodes"] += 1
+        if state["nodes"] & 1023 == 0 and time.perf_counter() > deadline:
+            state["timed_out"] = True
+        if state["timed_out"]:
+            return
+        if total > best_value + 1e-12:
+            best_value = total
+            best = {seq[i] for i in range(pos) if taken[i]}
+        if pos == n or total + bound(pos, room) <= best_value + 1e-12:
+            return
+        if w[pos] <= room + 1e-9 and all(taken[p] for p in need[pos]):
+            taken[pos] = 1
+            search(pos + 1, room - w[pos], total + v[pos])
+            taken[pos] = 0
+        search(pos + 1, room, total)
+
+    search(0, cap, 0.0)
+    return best, not state["timed_out"]
+
+
+def _solve_day(method, cands, order, value, weight, cap, preds, done, deadline):
+    """
+    Returns (chosen items, method used, optimal). Days without candidates report "none".
+    """
+    if not cands:
+        return set(), "none", True
+    if method == "score_greedy":
+        return _score_greedy(cands, value, weight, cap, preds, done), method, False
+    if method in ("auto", "dp"):
+        parent = _forest_preds(cands, preds, done)
+        cells = len(cands) * (int(cap * HOUR_UNITS) + 1)
+        if parent is not None and cells <= DP_MAX_CELLS:
+            return _dp([c for c in order if c in cands], parent, value, weight, cap), "dp", True
+        if method == "dp":
+            raise ValueError(
+                "method 'dp' needs at most one open prerequisite per task and "
+                f"tasks x quarter-hours <= {DP_MAX_CELLS}"
+            )
+    greedy = _greedy(cands, value, weight, cap, preds, done)
+    if method == "greedy" or (method == "auto" and len(cands) > BNB_MAX_ITEMS):
+        return greedy, "greedy", False
+    if len(cands) > BNB_MAX_ITEMS:
+        raise ValueError(f"method 'bnb' handles at most {BNB_MAX_ITEMS} candidate tasks per day")
+    chosen, finished = _bnb(cands, order, value, weight, cap, preds, done, deadline, greedy)
+    return chosen, "bnb", finished
+
+
+def _budgets(hours_per_day, days):
+    if isinstance(hours_per_day, list):
+        if days is not None and days != len(hours_per_day):
+            raise ValueError("days must match the length of hours_per_day")
+        budgets = hours_per_day
+    else:
+        days = 1 if days is None else days
+        if isinstance(days, bool) or not isinstance(days, int) or not 1 <= days <= MAX_DAYS:
+            raise ValueError(f"days must be an integer between 1 and {MAX_DAYS}")
+        budgets = [hours_per_day] * days
+    if not budgets or len(budgets) > MAX_DAYS:
+        raise ValueError(f"hours_per_day must cover 1 to {MAX_DAYS} days")
+    for b in budgets:
+        if isinstance(b, bool) or not isinstance(b, (int, float)) or not 0 <= b <= 24:
+            raise ValueError("hours_per_day must be numbers between 0 and 24")
+    return [float(b) for b in budgets]
+
+
+def optimize_days(
+    tasks, hours_per_day, days=None, strategy="smart_balance", custom_weights=None, engine="auto",
+    method="auto", time_budget_ms=DEFAULT_TIME_BUDGET_MS, as_of=None,
+):
+    """
+    Input: tasks and scoring options as for calculate_scores (as_of: the first day of the
+      horizon and the date scores are computed for, default today; echoed as meta['as_of']);
+      hours_per_day: one budget for
+      every day of `days` (default 1) or a list with one budget per day; method: see METHODS;
+      time_budget_ms: total search time allowed for bnb (shared between the days).
+    Returns: {"days": [{"day", "date", "budget_hours", "used_hours", "total_score", "tasks"}],
+              "unscheduled": [ids], "meta": {...}}. Day tasks come in execution order.
+    meta["optimal"] is true when every day was solved exactly; days are solved one after
+    another, so it does not claim the best total over the whole horizon.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method '{method}', expected one of {', '.join(METHODS)}")
+    if isinstance(time_budget_ms, bool) or not isinstance(time_budget_ms, (int, float)) or time_budget_ms <= 0:
+        raise ValueError("time_budget_ms must be a positive number")
+    budgets = _budgets(hours_per_day, days)
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000.0
+
+    model = _dependency_model(tasks, strategy, custom_weights, engine, as_of)
+    table, cols, ids = model["table"], model["cols"], model["ids"]
+    components, members_by_rank, node_rows = model["components"], model["members_by_rank"], model["node_rows"]
+    offsets, targets = model["offsets"], model["targets"]
+
+    value = [sum(cols["score"][node_rows[v]] for v in members) for members in components]
+    weight = [sum(table.hours[node_rows[v]] for v in members) for members in components]
+    preds = [[] for _ in components]
+    for c in range(len(components)):
+        for k in range(offsets[c], offsets[c + 1]):
+            preds[targets[k]].append(c)
+    # execution order: topological, best-ranked ready component first
+    order = _execution_order(members_by_rank, offsets, targets, model["priority"])
+    position = {c: i for i, c in enumerate(order)}
+
+    done = set()
+    today = model["today"]
+    result_days, methods, optimal = [], [], True
+    for day, cap in enumerate(budgets):
+        cands = _candidates([c for c in order if c not in done], weight, cap, done, preds)
+        days_left = len(budgets) - day
+        day_deadline = time.perf_counter() + max(0.0, deadline - time.perf_counter()) / days_left
+        chosen, used_method, exact = _solve_day(method, cands, order, value, weight, cap, preds, done, day_deadline)
+        done |= chosen
+        methods.append(used_method)
+        optimal = optimal and exact
+
+        entries = []
+        for c in sorted(chosen, key=position.__getitem__):
+            for v in members_by_rank[c]:
+                r = node_rows[v]
+                entries.append(
+                    {
+                        "id": ids[v],
+                        "title": table.titles[r],
+                        "score": round(cols["score"][r], 4),
+                        "estimated_hours": table.hours[r],
+                        "dependencies": table.dependencies(r),
+                    }
+                )
+        result_days.append(
+            {
+                "day": day + 1,
+                "date": (today + timedelta(days=day)).isoformat(),
+                "budget_hours": cap,
+                "used_hours": round(sum(weight[c] for c in chosen), 4),
+                "total_score": round(sum(value[c] for c in chosen), 4),
+                "tasks": entries,
+            }
+        )
+
+    meta = _model_meta(model, strategy)
+    meta.update(
+        method=method,
+        methods_used=methods,
+        optimal=optimal,
+        total_score=round(sum(value[c] for c in done), 4),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+    return {
+        "days": result_days,
+        "unscheduled": [ids[v] for c in order if c not in done for v in members_by_rank[c]],
+        "meta": meta,
+    }
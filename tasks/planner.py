@@ -0,0 +1,293 @@
+"""
+Dependency-aware execution planning.
+
+build_plan() scores tasks exactly like calculate_scores, then orders them so
+that every task comes after the tasks it depends on:
+
+- Strongly connected components (circular dependencies) are collapsed into a
+  single node; their members are scheduled back to back.
+- Kahn's topological sort always takes the ready node that ranks best in the
+  analysis ranking (a heap of rank positions): O((V + E) log V).
+- One reverse-topological pass computes transitive blocking counts by merging
+  fixed-size reachability sketches (exact for small downstream sets, estimated
+  for large ones; exact counts would need per-node traversals), one forward
+  pass earliest starts and the critical path (longest chain of
+  estimated_hours), and one more reverse pass the slack of every node.
+
+Tarjan's algorithm already returns the components in reverse topological
+order, so the DP passes walk that list without a separate sort.
+"""
+import heapq
+from array import array
+from random import Random
+
+from .scoring import (
+    _build_cycle_meta,
+    _page_bounds,
+    _resolve_as_of,
+    _resolve_weights,
+    _score_table,
+    _select_engine,
+    strongly_connected_components,
+)
+from .snapshot import build_table
+
+SKETCH_SIZE = 32  # transitive blocking counts are exact below this many downstream tasks
+_HASH_SPACE = 2.0 ** 64
+
+
+def _node_rows(table):
+    """
+    Representative row (last occurrence) of each graph node, in TaskTable.graph() node order.
+    """
+    seen = bytearray(len(table.names))
+    rows = array("q")
+    for j in table.row_names:
+        if not seen[j]:
+            seen[j] = 1
+            rows.append(table.name_rows[j])
+    return rows
+
+
+def _condense(adj, components):
+    """
+    Collapses each component into one node. Returns (comp_of, offsets, targets):
+    the component of every node and the deduplicated component edges as CSR arrays.
+    """
+    comp_of = array("q", [0]) * len(adj)
+    for c, members in enumerate(components):
+        for v in members:
+            comp_of[v] = c
+    offsets = array("q", [0])
+    targets = array("q")
+    last_source = array("q", [-1]) * len(components)
+    for c, members in enumerate(components):
+        for v in members:
+            for w in adj[v]:
+                d = comp_of[w]
+                if d != c and last_source[d] != c:
+                    last_source[d] = c
+                    targets.append(d)
+        offsets.append(len(targets))
+    return comp_of, offsets, targets
+
+
+def _downstream_counts(components, offsets, targets, k=SKETCH_SIZE):
+    """
+    Number of tasks transitively blocked by each component, excluding its own members.
+    One pass in reverse topological order (Tarjan's output: successors first) merges
+    bottom-k sketches: every task gets a fixed random 64-bit hash and a component keeps
+    the k smallest hashes of itself plus everything downstream. Counts are exact while a
+    downstream set holds fewer than k tasks and estimated as (k - 1) / (k-th smallest hash,
+    scaled to [0, 1)) above that (relative standard error about 1 / sqrt(k - 2)).
+    A sketch is released once every component that depends on it has been merged.
+    Returns (counts, exact flags) indexed by component.
+    """
+    n_comp = len(components)
+    rnd = Random(n_comp)
+    waiting = array("q", [0]) * n_comp  # sources still to merge each sketch
+    for d in targets:
+        waiting[d] += 1
+    sketches = [None] * n_comp
+    counts = array("q", [0]) * n_comp
+    exact = bytearray(n_comp)
+    for c in range(n_comp):
+        below = set()
+        for j in range(offsets[c], offsets[c + 1]):
+            d = targets[j]
+            below.update(sketches[d])
+            waiting[d] -= 1
+            if not waiting[d]:
+                sketches[d] = None
+        mine = {rnd.getrandbits(64) for _ in components[c]}
+        if len(below) < k:
+            counts[c] = len(below)
+            exact[c] = 1
+            if waiting[c]:
+                below |= mine
+                sketches[c] = below if len(below) <= k else sorted(below)[:k]
+        else:
+            # one sort serves both the estimate (own members skipped) and the sketch passed upstream
+            ranked = sorted(below | mine)[:k + len(mine)]
+            kth = [h for h in ranked if h not in mine][k - 1]
+            counts[c] = round((k - 1) / (kth / _HASH_SPACE))
+            if waiting[c]:
+                sketches[c] = ranked[:k]
+    return counts, exact
+
+
+def _execution_order(members_by_rank, offsets, targets, priority):
+    """
+    Kahn's algorithm over the condensed graph, always taking the ready component whose
+    best member ranks best. members_by_rank: component members sorted by priority.
+    Returns the component indices in execution order.
+    """
+    indegree = array("q", [0]) * len(members_by_rank)
+    for d in targets:
+        indegree[d] += 1
+    ready = [(priority[members[0]], c) for c, members in enumerate(members_by_rank) if not indegree[c]]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, c = heapq.heappop(ready)
+        order.append(c)
+        for k in range(offsets[c], offsets[c + 1]):
+            d = targets[k]
+            indegree[d] -= 1
+            if not indegree[d]:
+                heapq.heappush(ready, (priority[members_by_rank[d][0]], d))
+    return order
+
+
+def _dependency_model(tasks, strategy, custom_weights, engine, as_of=None):
+    """
+    Scores tasks like calculate_scores and condenses their dependency graph.
+    Returns a dict: table, warnings_map, engine, today (the reference date), as_of (the
+    requested one), cols, ids (graph nodes), components
+    (SCCs in reverse topological order), cycle_list, cycle_memberships, comp_of,
+    offsets/targets (condensed edges), node_rows, priority (rank position per node)
+    and members_by_rank (component members sorted by priority).
+    """
+    table, warnings_map = build_table(tasks)
+    engine = _select_engine(engine, len(table))
+    weights = _resolve_weights(strategy, custom_weights)
+    today = _resolve_as_of(as_of)
+    cols = _score_table(engine, table, today, weights, table.outdegree())
+
+    ids, adj = table.graph()
+    components = strongly_connected_components(adj)
+    cycle_list, cycle_memberships = _build_cycle_meta(table, (ids, adj), components)
+    comp_of, offsets, targets = _condense(adj, components)
+
+    node_rows = _node_rows(table)
+    rank_of_row = array("q", [0]) * len(table)
+    for pos, r in enumerate(cols["order"]):
+        rank_of_row[r] = pos
+    priority = [rank_of_row[r] for r in node_rows]
+    return {
+        "table": table,
+        "warnings_map": warnings_map,
+        "engine": engine,
+        "today": today,
+        "as_of": as_of,
+        "cols": cols,
+        "ids": ids,
+        "components": components,
+        "cycle_list": cycle_list,
+        "cycle_memberships": cycle_memberships,
+        "comp_of": comp_of,
+        "offsets": offsets,
+        "targets": targets,
+        "node_rows": node_rows,
+        "priority": priority,
+        "members_by_rank": [sorted(members, key=priority.__getitem__) for members in components],
+    }
+
+
+def _model_meta(model, strategy):
+    meta = {"cycles": model["cycle_list"], "strategy_used": strategy, "engine": model["engine"]}
+    if model["as_of"] is not None:
+        meta["as_of"] = model["today"].isoformat()
+    flat_warnings = [{"task_id": tid, "warnings": msgs} for tid, msgs in model["warnings_map"].items() if msgs]
+    if flat_warnings:
+        meta["warnings_summary"] = flat_warnings
+    return meta
+
+
+def build_plan(tasks, strategy="smart_balance", custom_weights=None, engine="auto", top_k=None, as_of=None):
+    """
+    Input: tasks and options as for calculate_scores (as_of: the date scores are computed for,
+    default today, echoed as meta['as_of']); top_k limits the returned plan entries.
+    Returns: {"plan": [...], "critical_path": {"tasks", "total_hours"}, "meta": {...}}.
+    One plan entry per distinct task id, in execution order:
+      position, id, title, score, tier, rank (position in the score ranking), dependencies,
+      transitive_blocks, transitive_blocks_exact, earliest_start_hours, slack_hours,
+      on_critical_path, cycle_ids.
+    transitive_blocks counts the distinct tasks that wait on a task directly or indirectly;
+    above SKETCH_SIZE it is an estimate (transitive_blocks_exact is false).
+    Members of a circular dependency share their collapsed node's start, slack and counts.
+    """
+    _, limit = _page_bounds(top_k, None)
+    model = _dependency_model(tasks, strategy, custom_weights, engine, as_of)
+    table, cols, ids, components = model["table"], model["cols"], model["ids"], model["components"]
+    comp_of, offsets, targets = model["comp_of"], model["offsets"], model["targets"]
+    node_rows, priority, members_by_rank = model["node_rows"], model["priority"], model["members_by_rank"]
+    n_comp = len(components)
+    hours = table.hours
+
+    size = array("q", (len(members) for members in components))
+    work = array("d", (sum(hours[node_rows[v]] for v in members) for members in components))
+
+    downstream, exact = _downstream_counts(components, offsets, targets)
+
+    # forward pass: earliest start/finish and the predecessor on the longest chain
+    start = array("d", [0.0]) * n_comp
+    finish = array("d", [0.0]) * n_comp
+    best_pred = array("q", [-1]) * n_comp
+    for c in range(n_comp - 1, -1, -1):
+        finish[c] = start[c] + work[c]
+        for k in range(offsets[c], offsets[c + 1]):
+            d = targets[k]
+            if best_pred[d] < 0 or finish[c] > start[d]:
+                start[d] = finish[c]
+                best_pred[d] = c
+
+    total_hours = max(finish) if n_comp else 0.0
+    critical = bytearray(n_comp)
+    if n_comp:
+        c = max(range(n_comp), key=finish.__getitem__)
+        chain = []
+        while c >= 0:
+            critical[c] = 1
+            chain.append(c)
+            c = best_pred[c]
+        chain.reverse()
+    else:
+        chain = []
+
+    # backward pass: latest finish that does not delay the end of the plan
+    latest_finish = array("d", [total_hours]) * n_comp
+    for c in range(n_comp):
+        for k in range(offsets[c], offsets[c + 1]):
+            d = targets[k]
+            latest_start = latest_finish[d] - work[d]
+            if latest_start < latest_finish[c]:
+                latest_finish[c] = latest_start
+
+    order = [v for c in _execution_order(members_by_rank, offsets, targets, priority) for v in members_by_rank[c]]
+
+    plan = []
+    for position, v in enumerate(order if limit is None else order[:limit], start=1):
+        r = node_rows[v]
+        c = comp_of[v]
+        plan.append(
+            {
+                "position": position,
+                "id": ids[v],
+                "title": table.titles[r],
+                "score": round(cols["score"][r], 4),
+                "tier": cols["tier"][r],
+                "rank": priority[v] + 1,
+                "dependencies": table.dependencies(r),
+                "transitive_blocks": size[c] - 1 + downstream[c],
+                "transitive_blocks_exact": bool(exact[c]),
+                "earliest_start_hours": round(start[c], 4),
+                "slack_hours": round(latest_finish[c] - finish[c], 4),
+                "on_critical_path": bool(critical[c]),
+                "cycle_ids": model["cycle_memberships"].get(ids[v], []),
+            }
+        )
+
+    meta = _model_meta(model, strategy)
+    meta["total_tasks"] = len(ids)
+    meta["collapsed_nodes"] = sum(1 for members in components if len(members) > 1)
+    if top_k is not None:
+        meta["top_k"] = top_k
+    return {
+        "plan": plan,
+        "critical_path": {
+            "tasks": [ids[v] for c in chain for v in members_by_rank[c]],
+            "total_hours": round(total_hours, 4),
+        },
+        "meta": meta,
+    }
@@ -0,0 +1,318 @@
+"""
+Per-client analysis results for /api/tasks/suggest/.
+
+Every analysis stores the suggestion payload of the client that ran it
+(top 3 tasks plus meta, already encoded as the response body) under the
+client id (cache.client_id: the X-Client-Token hash or the session key,
+which an analysis starts for clients that have neither).
+suggest_tasks returns those bytes as they are, so serving a suggestion costs
+one lookup whatever the size of the analysis. Entries expire TTL seconds
+after they were stored.
+
+Payloads are kept in compact form: bodies above COMPRESS_MIN_BYTES are
+zlib-compressed (level 1) and prefixed with a codec byte. Three backends:
+
+- "local":         in-process LRU; each worker process sees only its own clients.
+- "sqlite":        a SQLite file (WAL mode) shared by every process that can reach it.
+- "shared_memory": a fixed table of slots in a memory-mapped file (under /dev/shm by
+                   default), shared by the processes of one host without a server.
+
+Configured with settings.TASK_RESULT_STORE, e.g.
+    {"BACKEND": "local", "TTL": 86400, "MAX_ENTRIES": 4096}
+    {"BACKEND": "sqlite", "PATH": "/var/lib/tasks/results.sqlite3"}
+    {"BACKEND": "shared_memory", "PATH": "/dev/shm/task-results", "SLOTS": 4096, "SLOT_BYTES": 65536}
+"""
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_CONFIG = {
+    "BACKEND": "local",
+    "TTL": 24 * 3600,
+    "MAX_ENTRIES": 4096,
+    "PATH": None,
+    "SLOTS": 4096,
+    "SLOT_BYTES": 64 * 1024,
+}
+COMPRESS_MIN_BYTES = 512
+_RAW, _ZLIB = b"\x00", b"\x01"
+
+
+def pack(body):
+    """
+    Compact stored form of a response body: a codec byte, then the body or its zlib stream.
+    """
+    if len(body) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < len(body):
+            return _ZLIB + compressed
+    return _RAW + body
+
+
+def unpack(data):
+    if data[:1] == _ZLIB:
+        return zlib.decompress(data[1:])
+    return bytes(data[1:])
+
+
+class LocalResultStore:
+    """
+    Thread-safe in-process LRU of packed payloads with expiry times.
+    """
+
+    name = "local"
+
+    def __init__(self, ttl=DEFAULT_CONFIG["TTL"], max_entries=DEFAULT_CONFIG["MAX_ENTRIES"]):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, client):
+        with self._lock:
+            entry = self._data.get(client)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._data[client]
+                return None
+            self._data.move_to_end(client)
+            return entry[1]
+
+    def set(self, client, data):
+        with self._lock:
+            self._data.pop(client, None)
+            self._data[client] = (time.time() + self.ttl, data)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteResultStore:
+    """
+    Payloads in a SQLite table, one connection per thread. Expired rows are skipped on
+    read and deleted every PURGE_EVERY writes.
+    """
+
+    name = "sqlite"
+    PURGE_EVERY = 256
+
+    def __init__(self, path, ttl=DEFAULT_CONFIG["TTL"]):
+        self.path = os.fspath(path)
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS task_results (client TEXT PRIMARY KEY, expires REAL NOT NULL, body BLOB NOT NULL)"
+        )
+
+    def _connection(self):
+        # per thread, and never inherited through fork
+        pid, connection = getattr(self._local, "connection", (None, None))
+        if pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = (os.getpid(), connection)
+        return connection
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM task_results WHERE expires > ?", (time.time(),)).fetchone()[0]
+
+    def get(self, client):
+        row = self._connection().execute(
+            "SELECT body FROM task_results WHERE client = ? AND expires > ?", (client, time.time())
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, client, data):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO task_results (client, expires, body) VALUES (?, ?, ?)",
+            (client, time.time() + self.ttl, data),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            connection.execute("DELETE FROM task_results WHERE expires <= ?", (time.time(),))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM task_results")
+
+
+class SharedMemoryResultStore:
+    """
+    Open-addressing table of fixed-size slots in a shared memory-mapped file. A client's
+    slot is one of PROBE slots picked by double hashing its id; a write takes the
+    client's own slot, else a free or expired one, else the one expiring first. Payloads
+    larger than a slot are not stored, and clear the client's previous one. Readers and writers synchronize with flock on the
+    file, so every process of the host can use it.
+    """
+
+    name = "shared_memory"
+    MAGIC = b"TASKRES1"
+    PROBE = 8
+    _HEADER = struct.Struct("<8sII")  # magic, slots, slot size
+    _SLOT = struct.Struct("<16sdI4x")  # client digest, expiry, payload length
+
+    def __init__(self, path, ttl=DEFAULT_CONFIG["TTL"], slots=DEFAULT_CONFIG["SLOTS"], slot_bytes=DEFAULT_CONFIG["SLOT_BYTES"]):
+        import fcntl
+
+        self._fcntl = fcntl
+        self.path = os.fspath(path)
+        self.ttl = ttl
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.max_payload = slot_bytes - self._SLOT.size
+        size = self._HEADER.size + slots * slot_bytes
+        self._lock = threading.Lock()  # flock does not exclude threads sharing the descriptor
+        self._pid = None
+        with self._locked(exclusive=True):
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, self._HEADER.pack(self.MAGIC, slots, slot_bytes), 0)
+            header = os.pread(self._fd, self._HEADER.size, 0)
+        if len(header) < self._HEADER.size or self._HEADER.unpack(header) != (self.MAGIC, slots, slot_bytes):
+            os.close(self._fd)
+            raise ValueError(f"{self.path} is not a result store with {slots} slots of {slot_bytes} bytes")
+        self._map = mmap.mmap(self._fd, size)
+
+    @contextmanager
+    def _locked(self, exclusive):
+        if self._pid != os.getpid():
+            # forked processes share the open file, and with it the flock: open their own
+            if self._pid is not None:
+                os.close(self._fd)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_EX if exclusive else self._fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    def _digest(self, client):
+        return hashlib.blake2b(client.encode("utf-8"), digest_size=16).digest()
+
+    def _positions(self, digest):
+        # double hashing: the second half of the digest gives the probe step
+        start = int.from_bytes(digest[:8], "little") % self.slots
+        step = 1 + int.from_bytes(digest[8:], "little") % max(1, self.slots - 1)
+        for k in range(min(self.PROBE, self.slots)):
+            yield self._HEADER.size + ((start + k * step) % self.slots) * self.slot_bytes
+
+    def __len__(self):
+        now = time.time()
+        with self._lock, self._locked(exclusive=False):
+            return sum(
+                1
+                for k in range(self.slots)
+                if self._SLOT.unpack_from(self._map, self._HEADER.size + k * self.slot_bytes)[1] > now
+            )
+
+    def get(self, client):
+        digest = self._digest(client)
+        now = time.time()
+        with self._lock, self._locked(exclusive=False):
+            for position in self._positions(digest):
+                key, expires, length = self._SLOT.unpack_from(self._map, position)
+                if key == digest and expires > now:
+                    start = position + self._SLOT.size
+                    return self._map[start:start + length]
+        return None
+
+    def set(self, client, data):
+        digest = self._digest(client)
+        now = time.time()
+        with self._lock, self._locked(exclusive=True):
+            if len(data) > self.max_payload:
+                # not stored: drop the client's previous payload rather than serve a stale one
+                for position in self._positions(digest):
+                    if self._SLOT.unpack_from(self._map, position)[0] == digest:
+                        self._SLOT.pack_into(self._map, position, bytes(16), 0.0, 0)
+                return
+            target = None
+            for position in self._positions(digest):
+                key, expires, _ = self._SLOT.unpack_from(self._map, position)
+                if key == digest:
+                    target = position
+                    break
+                if target is None or expires < target_expires:
+                    target, target_expires = position, expires
+            start = target + self._SLOT.size
+            self._map[start:start + len(data)] = data
+            self._SLOT.pack_into(self._map, target, digest, now + self.ttl, len(data))
+
+    def clear(self):
+        with self._lock, self._locked(exclusive=True):
+            blank = bytes(self._SLOT.size)
+            for k in range(self.slots):
+                position = self._HEADER.size + k * self.slot_bytes
+                self._map[position:position + self._SLOT.size] = blank
+
+
+class ResultStore:
+    """
+    Packs and unpacks payloads in front of a backend.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def put(self, client, body):
+        self.backend.set(client, pack(body))
+
+    def get(self, client):
+        data = self.backend.get(client)
+        return unpack(data) if data is not None else None
+
+    def clear(self):
+        self.backend.clear()
+
+
+def _default_path(filename):
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"{filename}-{os.getuid() if hasattr(os, 'getuid') else 0}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """
+    Process-wide ResultStore built from settings.TASK_RESULT_STORE on first use.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from django.conf import settings
+
+                config = dict(DEFAULT_CONFIG, **getattr(settings, "TASK_RESULT_STORE", {}))
+                ttl = config["TTL"]
+                if config["BACKEND"] == "local":
+                    backend = LocalResultStore(ttl, config["MAX_ENTRIES"])
+                elif config["BACKEND"] == "sqlite":
+                    backend = SQLiteResultStore(config["PATH"] or settings.BASE_DIR / "task_results.sqlite3", ttl)
+                elif config["BACKEND"] == "shared_memory":
+                    backend = SharedMemoryResultStore(
+                        config["PATH"] or _default_path("task-results"), ttl, config["SLOTS"], config["SLOT_BYTES"]
+                    )
+                else:
+                    raise ValueError(f"unknown TASK_RESULT_STORE backend '{config['BACKEND']}'")
+                _store = ResultStore(backend)
+    return _store
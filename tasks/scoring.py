@@ -1,6 +1,23 @@
-from datetime import date, datetime
+from datetime import date
 from math import exp
+from array import array
 from collections import defaultdict, deque
+import heapq
+
+from .components import (  # noqa: F401
+    BUILTIN_COMPONENTS,
+    MAX_PAST_DUE_DAYS_FOR_BOOST,
+    TaskColumns,
+    _urgency,
+    breakdown_names,
+    evaluate,
+    resolve_components,
+    weighted_sum,
+)
+from .dates import parse_date as _parse_date  # noqa: F401
+from .explain import ExplainContext, Lazy, explanation, task_warnings
+from .instrumentation import NULL_TIMINGS
+from .table import NO_DUE_DATE, coerce_dependencies, coerce_task
 
 # default weight presets for strategies
 STRATEGY_PRESETS = {
@@ -10,325 +27,587 @@ STRATEGY_PRESETS = {
     "fastest_wins": {"urgency": 0.15, "importance": 0.15, "dependencies": 0.1, "effort": 0.6},
 }
 
-MAX_PAST_DUE_DAYS_FOR_BOOST = 30
+# scoring engines; "auto" switches to numpy for task lists of at least VECTORIZE_THRESHOLD
+ENGINES = ("auto", "python", "numpy")
+VECTORIZE_THRESHOLD = 5000
 
+# keys of an analyzed task, in output order ("comparison" only with compare)
+OUTPUT_FIELDS = (
+    "id", "title", "due_date", "estimated_hours", "importance", "dependencies", "score", "tier",
+    "score_breakdown", "explanation", "warnings", "comparison",
+)
 
-def _parse_date(value):
-    if value is None:
-        return None
-    if isinstance(value, date):
-        return value
-    try:
-        return datetime.fromisoformat(value).date()
-    except Exception:
-        try:
-            return datetime.strptime(value, "%Y-%m-%d").date()
-        except Exception:
-            return None
 
-
-def detect_cycles(tasks):
+def _dependency_graph(tasks):
     """
-    tasks: list of dicts with 'id' and 'dependencies' like ['t1','t2']
-    Returns list of cycles (each cycle is list of task ids)
+    Interns task ids to integer indices (first occurrence wins) and builds
+    adjacency lists with edges pointing from a dependency to the tasks waiting on it.
+    Returns (ids, adj).
     """
-    graph = defaultdict(list)
-    ids = set()
+    index = {}
+    ids = []
     for t in tasks:
         tid = t.get("id")
-        ids.add(tid)
+        if tid not in index:
+            index[tid] = len(ids)
+            ids.append(tid)
+    adj = [[] for _ in ids]
     for t in tasks:
-        tid = t.get("id")
-        deps = t.get("dependencies") or []
-        for d in deps:
-            if d in ids:
-                graph[d].append(tid)
-    visited = {}
+        v = index[t.get("id")]
+        for d in coerce_dependencies(t.get("dependencies"))[0]:
+            u = index.get(d)
+            if u is not None:
+                adj[u].append(v)
+    return ids, adj
+
+
+def strongly_connected_components(adj):
+    """
+    Iterative Tarjan: O(V+E) time, explicit work stack instead of recursion,
+    so arbitrarily deep dependency chains are safe.
+    adj: sequence of neighbour index sequences (lists, or a CSRAdjacency).
+    Returns list of components (lists of node indices) in reverse topological order.
+    """
+    n = len(adj)
+    index = array("q", [-1]) * n
+    low = array("q", [0]) * n
+    on_stack = bytearray(n)
     stack = []
-    cycles = []
-
-    def dfs(node, path):
-        if node in visited:
-            return visited[node]
-        visited[node] = 0
-        path.append(node)
-        for neigh in graph.get(node, []):
-            if visited.get(neigh, None) == 0:
-                try:
-                    idx = path.index(neigh)
-                    cycles.append(path[idx:] + [neigh])
-                except ValueError:
-                    pass
-            elif visited.get(neigh, None) is None:
-                dfs(neigh, path)
-        visited[node] = 1
-        path.pop()
-
-    for node in ids:
-        if visited.get(node, None) is None:
-            dfs(node, [])
-    unique = []
-    seen = set()
-    for c in cycles:
-        key = tuple(c)
-        if key not in seen:
-            unique.append(list(dict.fromkeys(c)))
-            seen.add(key)
-    return unique
-
-
-# Overwrite the existing calculate_scores function with this version
-def calculate_scores(tasks, strategy="smart_balance", custom_weights=None):
+    components = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, iter(adj[root]))]
+        while work:
+            v, neighbours = work[-1]
+            for w in neighbours:
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append((w, iter(adj[w])))
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[v] < low[parent]:
+                        low[parent] = low[v]
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = 0
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+    return components
+
+
+def _example_cycle(adj, members):
     """
-    Input: tasks: list of dicts. Each task should include:
-      id, title, due_date (YYYY-MM-DD or None), importance (1-10), estimated_hours (float/int), dependencies (list)
-    Returns: dict with 'analyzed_tasks' and 'meta'
+    Shortest cycle through the first member of an SCC (BFS restricted to the component).
     """
-    today = date.today()
-    # container for validation/warnings
-    warnings_map = defaultdict(list)
+    start = members[0]
+    allowed = set(members)
+    parent = {start: None}
+    queue = deque([start])
+    while queue:
+        v = queue.popleft()
+        for w in adj[v]:
+            if w == start:
+                cycle = []
+                while v is not None:
+                    cycle.append(v)
+                    v = parent[v]
+                cycle.reverse()
+                return cycle
+            if w in allowed and w not in parent:
+                parent[w] = v
+                queue.append(w)
+    return [start]
+
+
+def find_cycle_groups(tasks):
+    """
+    tasks: list of dicts with 'id' and 'dependencies' like ['t1','t2']
+    Returns one entry per strongly connected component that contains a cycle:
+      {"members": [task ids in input order], "cycle": [one example cycle]}
+    Groups are ordered by the position of their first member in the input.
+    """
+    return _cycle_groups(*_dependency_graph(tasks))
 
-    # validate and normalize tasks
-    normalized = []
-    for i, t in enumerate(tasks):
-        nt = dict(t)
-        nt.setdefault("id", f"t{ i+1 }")
-        nt.setdefault("title", nt["id"])
 
-        orig_imp = nt.get("importance", None)
-        nt.setdefault("importance", 5)
-        try:
-            nt["importance"] = max(1, min(10, int(nt.get("importance", 5))))
-            if orig_imp is not None:
-                try:
-                    if int(orig_imp) != nt["importance"]:
-                        warnings_map[nt["id"]].append(
-                            f"importance value '{orig_imp}' normalized to {nt['importance']}"
-                        )
-                except Exception:
-                    warnings_map[nt["id"]].append(
-                        f"importance value '{orig_imp}' is invalid and defaulted to {nt['importance']}"
-                    )
-        except Exception:
-            nt["importance"] = 5
-            warnings_map[nt["id"]].append(
-                f"importance value '{orig_imp}' is invalid and defaulted to 5"
-            )
+def _cycle_groups(ids, adj, components=None):
+    """
+    components: strongly_connected_components(adj), when the caller already has them.
+    """
+    groups = []
+    for component in components if components is not None else strongly_connected_components(adj):
+        if len(component) == 1 and component[0] not in adj[component[0]]:
+            continue
+        members = sorted(component)
+        groups.append(members)
+    groups.sort(key=lambda members: members[0])
+    return [
+        {
+            "members": [ids[v] for v in members],
+            "cycle": [ids[v] for v in _example_cycle(adj, members)],
+        }
+        for members in groups
+    ]
 
-        orig_hours = nt.get("estimated_hours", None)
-        try:
-            nt["estimated_hours"] = float(nt.get("estimated_hours", 2.0))
-            if nt["estimated_hours"] < 0:
-                nt["estimated_hours"] = 2.0
-                warnings_map[nt["id"]].append(
-                    f"estimated_hours '{orig_hours}' was negative and set to 2.0"
-                )
-            else:
-                if orig_hours is not None and float(orig_hours) != nt["estimated_hours"]:
-                    pass
-        except Exception:
-            nt["estimated_hours"] = 2.0
-            warnings_map[nt["id"]].append(
-                f"estimated_hours value '{orig_hours}' is invalid and defaulted to 2.0"
-            )
 
-        nt["due_date_parsed"] = _parse_date(nt.get("due_date"))
+def detect_cycles(tasks):
+    """
+    tasks: list of dicts with 'id' and 'dependencies' like ['t1','t2']
+    Returns list of cycles (each cycle is list of task ids), one per cycle group
+    """
+    return [g["cycle"] for g in find_cycle_groups(tasks)]
 
-        deps = nt.get("dependencies") or []
-        if not isinstance(deps, list):
-            try:
-                if isinstance(deps, str):
-                    deps = [s.strip() for s in deps.split(",") if s.strip()]
-                    warnings_map[nt["id"]].append(
-                        f"dependencies value was a string and coerced to list: {deps}"
-                    )
-                else:
-                    deps = list(deps)
-                    warnings_map[nt["id"]].append(
-                        "dependencies value coerced to list"
-                    )
-            except Exception:
-                deps = []
-                warnings_map[nt["id"]].append(
-                    "dependencies value invalid; treated as empty list"
-                )
-        nt["dependencies"] = deps
-
-        normalized.append(nt)
-
-    id_set = {t["id"] for t in normalized}
-
-    for t in normalized:
-        for d in t.get("dependencies", []):
-            if d not in id_set:
-                warnings_map[t["id"]].append(f"dependency '{d}' not found in provided tasks")
-    importance_scores = {}
-    urgency_scores = {}
-    effort_raw = {}
-    dependencies_outdegree = defaultdict(int)
-
-    for t in normalized:
-        for d in t["dependencies"]:
-            if d in id_set:
-                dependencies_outdegree[d] += 1
-
-    for t in normalized:
-        tid = t["id"]
-        importance_scores[tid] = t["importance"] / 10.0
-
-        dd = t["due_date_parsed"]
-        if dd is None:
-            urgency_scores[tid] = 0.0
-        else:
-            days = (dd - today).days
-            if days < 0:
-                urgency_scores[tid] = min(
-                    1.0,
-                    1.0 + min(-days, MAX_PAST_DUE_DAYS_FOR_BOOST) / MAX_PAST_DUE_DAYS_FOR_BOOST,
-                )
-            else:
-                max_horizon = 60.0
-                urgency_scores[tid] = max(0.0, 1.0 - (days / max_horizon))
-                urgency_scores[tid] = min(1.0, urgency_scores[tid])
-
-        effort_raw[tid] = 1.0 / (1.0 + t["estimated_hours"])
-
-    min_e = min(effort_raw.values()) if effort_raw else 0.0
-    max_e = max(effort_raw.values()) if effort_raw else 1.0
-    effort_scores = {}
-    if max_e - min_e < 1e-9:
-        for k, v in effort_raw.items():
-            effort_scores[k] = 0.5
-    else:
-        for k, v in effort_raw.items():
-            effort_scores[k] = (v - min_e) / (max_e - min_e)
-
-    if dependencies_outdegree:
-        min_d = min(dependencies_outdegree.values()) if dependencies_outdegree else 0
-        max_d = max(dependencies_outdegree.values()) if dependencies_outdegree else 1
-    else:
-        min_d = 0
-        max_d = 1
-    dependencies_scores = {}
-    for t in normalized:
-        v = dependencies_outdegree.get(t["id"], 0)
-        if max_d - min_d < 1e-9:
-            dependencies_scores[t["id"]] = 0.0
-        else:
-            dependencies_scores[t["id"]] = (v - min_d) / (max_d - min_d)
 
+def _normalize_task(t, i, warnings_map):
+    """
+    Validates and normalizes one raw task dict (i is its input position, used for default ids).
+    Coercion warnings are appended to warnings_map[task id]. Returns a normalized dict
+    (id, title, due_date, importance, estimated_hours, due_date_parsed, dependencies).
+    """
+    tid, title, due_date, importance, hours, due_date_parsed, deps = coerce_task(t, i, warnings_map)
+    return {
+        "id": tid,
+        "title": title,
+        "due_date": due_date,
+        "importance": importance,
+        "estimated_hours": hours,
+        "due_date_parsed": due_date_parsed,
+        "dependencies": deps,
+    }
+
+
+def _resolve_weights(strategy, custom_weights):
     weights = custom_weights or STRATEGY_PRESETS.get(strategy, STRATEGY_PRESETS["smart_balance"])
     wsum = sum(weights.values())
     if abs(wsum - 1.0) > 1e-6:
         weights = {k: v / wsum for k, v in weights.items()}
+    return weights
+
 
-    cycles = detect_cycles(normalized)
+def _resolve_comparison(compare):
+    """
+    compare: "all" (every preset) or a list of preset names and/or
+    {"name": ..., "weights": {...}} custom weight vectors.
+    Returns [(name, resolved weights)].
+    """
+    if compare == "all":
+        compare = list(STRATEGY_PRESETS)
+    if not isinstance(compare, list) or not compare:
+        raise ValueError("compare must be \"all\" or a non-empty list of strategies")
+    strategies = []
+    for entry in compare:
+        if isinstance(entry, str):
+            if entry not in STRATEGY_PRESETS:
+                raise ValueError(f"unknown strategy '{entry}' in compare")
+            name, weights = entry, _resolve_weights(entry, None)
+        elif isinstance(entry, dict) and isinstance(entry.get("name"), str) and isinstance(entry.get("weights"), dict):
+            name = entry["name"]
+            try:
+                weights = _resolve_weights(name, entry["weights"])
+            except (TypeError, ZeroDivisionError):
+                raise ValueError(f"invalid weights for '{name}' in compare")
+        else:
+            raise ValueError("compare entries must be strategy names or {\"name\", \"weights\"} objects")
+        if any(name == other for other, _ in strategies):
+            raise ValueError(f"duplicate strategy '{name}' in compare")
+        strategies.append((name, weights))
+    return strategies
+
+
+def _rank_strategies(table, cols, strategies):
+    """
+    Scores every row under each (name, weights) pair from the shared component
+    columns (one weighted sum per strategy, the same arithmetic as the engines)
+    and ranks them like a full analysis with that strategy would.
+    Returns {name: {"score": [...], "rank": [...]}} indexed by row, ranks from 1.
+    """
+    n = len(table)
+    importance, hours = table.importance, table.hours
+    names = cols.get("components", BUILTIN_COMPONENTS)
+    ranked = {}
+    for name, weights in strategies:
+        score = weighted_sum(cols, names, weights)
+        rounded = [round(x, 4) for x in score]
+        rank = array("q", [0]) * n
+        for pos, r in enumerate(sorted(range(n), key=lambda r: (-rounded[r], -importance[r], hours[r])), start=1):
+            rank[r] = pos
+        ranked[name] = {"score": score, "rank": rank}
+    return ranked
+
+
+def _tier(score):
+    if score >= 0.75:
+        return "High"
+    if score >= 0.45:
+        return "Medium"
+    return "Low"
+
+
+def _score_python(table, today, weights, outdegree, limit=None, timings=NULL_TIMINGS, components=None):
+    """
+    Reference engine: computes each component (tasks/components.py, the built-ins when
+    components is None) as a python list and sums them with the weights.
+    outdegree: per-name reference counts (TaskTable.outdegree()).
+    timings: instrumentation.Timings; the final ordering is recorded as phase "sort".
+    Returns a dict of per-row columns (see _iter_output): one per component, 'score',
+    'tier', 'components' (the component names, in summation order) and 'order', the row
+    indices of the best `limit` tasks (all tasks when limit is None).
+    """
+    n = len(table)
+    importance, hours = table.importance, table.hours
+    components = components or resolve_components()
+    names = [c.name for c in components]
+    cols = evaluate(components, TaskColumns(table, today, outdegree))
+    cols["score"] = weighted_sum(cols, names, weights)
+    cols["tier"] = [_tier(score) for score in cols["score"]]
+    cols["components"] = names
+
+    with timings.phase("sort"):
+        rounded = array("d", [round(s, 4) for s in cols["score"]])
+
+        def rank_key(i):
+            return (-rounded[i], -importance[i], hours[i])
+
+        if limit is None or limit >= n:
+            cols["order"] = sorted(range(n), key=rank_key)
+        else:
+            # heap selection; nsmallest is stable, so ties resolve exactly like sorted()
+            cols["order"] = heapq.nsmallest(limit, range(n), key=rank_key)
+    return cols
+
+
+def _resolve_as_of(as_of):
+    """
+    Reference date of an analysis: as_of (a date or "YYYY-MM-DD"), today when None.
+    """
+    if as_of is None:
+        return date.today()
+    day = _parse_date(as_of) if isinstance(as_of, (str, date)) else None
+    if day is None:
+        raise ValueError(f"invalid as_of '{as_of}', expected a YYYY-MM-DD date")
+    return day
+
+
+def _page_bounds(top_k, cursor):
+    """
+    Validates the top_k/cursor pair. The cursor is the offset of the next page,
+    as returned in meta['next_cursor']. Returns (offset, limit).
+    """
+    if top_k is None:
+        if cursor is not None:
+            raise ValueError("cursor requires top_k")
+        return 0, None
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        raise ValueError("top_k must be a positive integer")
+    offset = 0
+    if cursor is not None:
+        try:
+            offset = int(cursor)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid cursor '{cursor}'")
+        if offset < 0:
+            raise ValueError(f"invalid cursor '{cursor}'")
+    return offset, offset + top_k
 
+
+def _ranks_from_top(top_k, cursor, fields):
+    """
+    Whether an analysis with these options returns full rows from rank 1 on, i.e. its first
+    tasks are the ones suggest_tasks serves (call after the options were validated).
+    """
+    return fields is None and _page_bounds(top_k, cursor)[0] == 0
+
+
+def _select_engine(engine, n):
+    from importlib.util import find_spec
+
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+    if engine == "auto":
+        if n >= VECTORIZE_THRESHOLD and find_spec("numpy") is not None:
+            return "numpy"
+        return "python"
+    if engine == "numpy" and find_spec("numpy") is None:
+        raise ValueError("engine 'numpy' requested but numpy is not installed")
+    return engine
+
+
+def _score_table(engine, table, today, weights, outdegree, limit=None, timings=NULL_TIMINGS, components=None):
+    """
+    Runs the selected engine ("python" or "numpy") over a TaskTable; see _score_python.
+    """
+    if engine == "numpy":
+        from .vectorized import score_numpy
+
+        return score_numpy(table, today, weights, outdegree, limit, timings, components)
+    return _score_python(table, today, weights, outdegree, limit, timings, components)
+
+
+def _build_cycle_meta(table, graph=None, components=None):
+    """
+    graph: table.graph() and components: its SCCs, when the caller already has them.
+    Returns (cycle meta list, {task id: [cycle ids]}).
+    """
+    ids, adj = graph or table.graph()
     cycle_memberships = defaultdict(list)
     cycle_list = []
-    if cycles:
-        for idx, c in enumerate(cycles, start=1):
-            cycle_list.append(
-                {
-                    "cycle_id": idx,
-                    "tasks": c,
-                    "message": "circular dependency detected",
-                }
+    for idx, group in enumerate(_cycle_groups(ids, adj, components), start=1):
+        cycle_list.append(
+            {
+                "cycle_id": idx,
+                "tasks": group["cycle"],
+                "members": group["members"],
+                "message": "circular dependency detected",
+            }
+        )
+        for tid in group["members"]:
+            cycle_memberships[tid].append(idx)
+    return cycle_list, cycle_memberships
+
+
+def _resolve_fields(fields):
+    """
+    fields: None (every field), a list of OUTPUT_FIELDS names or a comma-separated string.
+    Returns None or the set of fields to build; "id" is always included.
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = [name.strip() for name in fields.split(",") if name.strip()]
+    if not isinstance(fields, list) or not all(isinstance(name, str) for name in fields):
+        raise ValueError("fields must be a list of field names")
+    for name in fields:
+        if name not in OUTPUT_FIELDS:
+            raise ValueError(f"unknown field '{name}', expected some of {', '.join(OUTPUT_FIELDS)}")
+    return frozenset(fields) | {"id"}
+
+
+def _iter_output(
+    table, cols, rows, today, weights, outdegree, cycle_memberships, warnings_map, comparison=None,
+    hoist_weights=False, fields=None, lazy=False,
+):
+    """
+    Yields the output dict of each row in `rows`, built only when requested.
+    outdegree: per-name reference counts, indexed through table.row_names.
+    comparison: _rank_strategies() result, added to each row as {name: {score, rank, tier}}.
+    hoist_weights: leave the (identical) weights out of every score_breakdown.
+    fields: _resolve_fields() result; only those keys are built (in the usual key order).
+    lazy: explanation and warnings are explain.Lazy objects, formatted on first use.
+    """
+    want = OUTPUT_FIELDS if fields is None else fields
+    w_title, w_due, w_hours, w_importance, w_deps, w_score, w_tier, w_breakdown, w_explanation, w_warnings = (
+        name in want for name in OUTPUT_FIELDS[1:11]
+    )
+    w_comparison = comparison is not None and "comparison" in want
+    rounded_weights = {k: round(v, 4) for k, v in weights.items()}
+    breakdown = breakdown_names(cols.get("components", BUILTIN_COMPONENTS))
+    today_ord = today.toordinal()
+    offsets = table.dep_offsets
+    for i in rows:
+        tid = table.ids[i]
+        row = {"id": tid}
+        if w_title:
+            row["title"] = table.titles[i]
+        if w_due:
+            row["due_date"] = table.due_dates[i]
+        if w_hours:
+            row["estimated_hours"] = table.hours[i]
+        if w_importance:
+            row["importance"] = table.importance[i]
+        if w_deps:
+            row["dependencies"] = table.dependencies(i)
+        if w_score:
+            row["score"] = round(cols["score"][i], 4)
+        if w_tier:
+            row["tier"] = cols["tier"][i]
+        if w_breakdown:
+            row["score_breakdown"] = {name: round(cols[name][i], 4) for name in breakdown}
+            if not hoist_weights:
+                row["score_breakdown"]["weights"] = dict(rounded_weights)
+        if w_explanation:
+            due = table.due[i]
+            args = (
+                due - today_ord if due != NO_DUE_DATE else None,
+                outdegree[table.row_names[i]],
+                table.hours[i],
+                table.importance[i],
+                offsets[i + 1] > offsets[i],
             )
-            for tid in set(c):
-                cycle_memberships[tid].append(idx)
+            row["explanation"] = Lazy(explanation, *args) if lazy else explanation(*args)
+        if w_warnings:
+            cycle_ids = cycle_memberships.get(tid)
+            warnings = warnings_map.get(tid)
+            if not cycle_ids and not warnings:
+                row["warnings"] = []
+            elif lazy:
+                row["warnings"] = Lazy(task_warnings, cycle_ids, warnings or [])
+            else:
+                row["warnings"] = task_warnings(cycle_ids, warnings or [])
+        if w_comparison:
+            row["comparison"] = {
+                name: {"score": round(ranked["score"][i], 4), "rank": ranked["rank"][i], "tier": _tier(ranked["score"][i])}
+                for name, ranked in comparison.items()
+            }
+        yield row
 
-    if cycle_list:
-        meta = {"cycles": cycle_list, "strategy_used": strategy}
-    else:
-        meta = {"cycles": [], "strategy_used": strategy}
+
+def _analyze(
+    tasks, strategy="smart_balance", custom_weights=None, engine="auto", top_k=None, cursor=None, compare=None,
+    timings=None, hoist_weights=False, components=None, fields=None, lazy=False, as_of=None,
+    aggregate_warnings=False,
+):
+    """
+    iter_scores, also returning the explain.ExplainContext of the analysis: (rows, meta, context).
+    """
+    timings = timings or NULL_TIMINGS
+    today = _resolve_as_of(as_of)
+    offset, limit = _page_bounds(top_k, cursor)
+    fields = _resolve_fields(fields)
+    strategies = _resolve_comparison(compare) if compare is not None else None
+    weights = _resolve_weights(strategy, custom_weights)
+    active = resolve_components(components, [weights] + [w for _, w in strategies or ()])
+
+    with timings.phase("normalize"):
+        from .snapshot import build_table
+
+        table, warnings_map = build_table(tasks)
+        engine = _select_engine(engine, len(table))
+        outdegree = table.outdegree()
+
+    with timings.phase("score"):
+        cols = _score_table(engine, table, today, weights, outdegree, limit, timings, active)
+
+    comparison = None
+    if strategies is not None:
+        with timings.phase("compare"):
+            if engine == "numpy":
+                from .vectorized import rank_strategies_numpy
+
+                comparison = rank_strategies_numpy(table, cols, strategies)
+            else:
+                comparison = _rank_strategies(table, cols, strategies)
+
+    with timings.phase("cycles"):
+        cycle_list, cycle_memberships = _build_cycle_meta(table)
+    meta = {"cycles": cycle_list, "strategy_used": strategy, "engine": engine}
 
     flat_warnings = []
     for tid, msgs in warnings_map.items():
         if msgs:
             flat_warnings.append({"task_id": tid, "warnings": msgs})
     if flat_warnings:
-        meta["warnings_summary"] = flat_warnings
-
-    out = []
-    for t in normalized:
-        tid = t["id"]
-        s_imp = importance_scores[tid]
-        s_urg = min(1.0, urgency_scores[tid])
-        s_eff = effort_scores[tid]
-        s_dep = dependencies_scores[tid]
-
-        score = (
-            weights.get("urgency", 0) * s_urg
-            + weights.get("importance", 0) * s_imp
-            + weights.get("dependencies", 0) * s_dep
-            + weights.get("effort", 0) * s_eff
-        )
-
-        tier = "Low"
-        if score >= 0.75:
-            tier = "High"
-        elif score >= 0.45:
-            tier = "Medium"
-
-        reasons = []
-        if t["due_date_parsed"]:
-            days = (t["due_date_parsed"] - today).days
-            if days < 0:
-                reasons.append(f"Past due by {-days} day(s) → urgency boosted")
-            elif days <= 3:
-                reasons.append(f"Due in {days} day(s) → urgent")
-            else:
-                reasons.append(f"Due in {days} day(s)")
+        if aggregate_warnings:
+            meta["warnings"] = warnings_map.summary()
         else:
-            reasons.append("No due date")
-
-        if t["dependencies"]:
-            reasons.append(f"Blocks {dependencies_outdegree.get(tid, 0)} task(s)")
-        if t["estimated_hours"] <= 2:
-            reasons.append("Quick win (low estimated hours)")
-        if t["importance"] >= 8:
-            reasons.append("High importance")
-
-        explanation = "; ".join(reasons)
-
-        warnings = []
-        if tid in cycle_memberships:
-            cycle_ids = cycle_memberships[tid]
-            if len(cycle_ids) == 1:
-                warnings.append(
-                    f"Task is part of a circular dependency (cycle #{cycle_ids[0]})."
-                )
-            else:
-                warnings.append(
-                    f"Task is part of multiple circular dependencies (cycles {', '.join(map(str, cycle_ids))})."
-                )
-        warnings.extend(warnings_map.get(tid, []))
+            meta["warnings_summary"] = flat_warnings
+    if timings.enabled:
+        timings.count("tasks", len(table))
+        timings.count("edges", len(table.dep_targets))
+        timings.count("cycles", len(cycle_list))
+        timings.count("warnings", len(flat_warnings))
+
+    if top_k is not None:
+        meta["top_k"] = top_k
+        meta["total_tasks"] = len(table)
+        meta["next_cursor"] = str(limit) if limit < len(table) else None
+    if strategies is not None:
+        meta["comparison"] = {
+            "strategies": [name for name, _ in strategies],
+            "weights": {name: {k: round(v, 4) for k, v in w.items()} for name, w in strategies},
+        }
+
+    if hoist_weights:
+        meta["weights"] = {k: round(v, 4) for k, v in weights.items()}
+    if as_of is not None:
+        meta["as_of"] = today.isoformat()
+    if components:
+        meta["components"] = {name: spec if isinstance(spec, str) else spec["formula"] for name, spec in components.items()}
+
+    rows = _iter_output(
+        table, cols, cols["order"][offset:], today, weights, outdegree, cycle_memberships, warnings_map,
+        comparison, hoist_weights, fields, lazy,
+    )
+    context = ExplainContext(table, cols, weights, today, outdegree, cycle_memberships, warnings_map, strategy)
+    return rows, meta, context
 
-        out.append(
-            {
-                "id": tid,
-                "title": t.get("title"),
-                "due_date": t.get("due_date"),
-                "estimated_hours": t.get("estimated_hours"),
-                "importance": t.get("importance"),
-                "dependencies": t.get("dependencies"),
-                "score": round(score, 4),
-                "tier": tier,
-                "score_breakdown": {
-                    "urgency": round(s_urg, 4),
-                    "importance": round(s_imp, 4),
-                    "effort": round(s_eff, 4),
-                    "dependencies": round(s_dep, 4),
-                    "weights": {k: round(v, 4) for k, v in weights.items()},
-                },
-                "explanation": explanation,
-                "warnings": warnings,
-            }
-        )
 
-    out_sorted = sorted(
-        out,
-        key=lambda x: (-x["score"], -x["importance"], x["estimated_hours"]),
+def iter_scores(
+    tasks, strategy="smart_balance", custom_weights=None, engine="auto", top_k=None, cursor=None, compare=None,
+    timings=None, hoist_weights=False, components=None, fields=None, lazy=False, as_of=None,
+    aggregate_warnings=False,
+):
+    """
+    Lazy form of calculate_scores (same arguments). tasks may be any iterable,
+    e.g. a generator over an NDJSON stream; it is consumed once.
+    timings: an instrumentation.Timings to record phases (normalize, score, sort,
+    compare, cycles) and counts (tasks, edges, cycles, warnings) into.
+    Returns (rows, meta): rows is an iterator over the ranked task dicts,
+    each built only when the iterator reaches it.
+    """
+    rows, meta, _ = _analyze(
+        tasks, strategy, custom_weights, engine, top_k, cursor, compare, timings, hoist_weights, components, fields, lazy,
+        as_of, aggregate_warnings,
     )
-    return {"analyzed_tasks": out_sorted, "meta": meta}
+    return rows, meta
+
+
+def calculate_scores(
+    tasks, strategy="smart_balance", custom_weights=None, engine="auto", top_k=None, cursor=None, compare=None,
+    hoist_weights=False, components=None, fields=None, lazy=False, as_of=None, aggregate_warnings=False,
+):
+    """
+    Input: tasks: list of dicts. Each task should include:
+      id, title, due_date (YYYY-MM-DD or None), importance (1-10), estimated_hours (float/int), dependencies (list)
+      An open snapshot.TaskSnapshot is accepted too; it is analyzed without normalizing again.
+    engine: "python", "numpy" or "auto" (numpy above VECTORIZE_THRESHOLD tasks when installed).
+      Both engines produce identical scores and ordering.
+    top_k: only rank and build output for the best top_k tasks (heap selection instead of a full sort).
+      cursor: meta['next_cursor'] of a previous call, to fetch the following page.
+    compare: "all" or a list of preset names / {"name", "weights"} objects. Every task then also
+      carries 'comparison': {name: {score, rank, tier}}, its rank over all tasks under each of them,
+      computed from the same component scores (no re-normalization or cycle detection).
+    hoist_weights: report the strategy weights once as meta['weights'] instead of in every
+      task's score_breakdown.
+    components: {name: formula} custom scoring components (see tasks/components.py), weighted
+      through custom_weights / compare like the built-in ones; a built-in name replaces that
+      component. Every task's score_breakdown lists them too.
+    fields: list (or comma-separated string) of OUTPUT_FIELDS to build for every task; "id" is
+      always included. Default: all of them.
+    lazy: 'explanation' and 'warnings' are explain.Lazy objects, formatted only when read or
+      serialized (tasks.serializers renders them).
+    as_of: reference date (a date or "YYYY-MM-DD") for urgency and days until due instead of
+      today, e.g. for reproducible results; echoed as meta['as_of'].
+    aggregate_warnings: report meta['warnings'], one {code, count, sample_ids, example} entry per
+      warning code (see tasks/validation.py), instead of every task's messages in meta['warnings_summary'].
+    Returns: dict with 'analyzed_tasks' and 'meta'
+    """
+    rows, meta = iter_scores(
+        tasks, strategy=strategy, custom_weights=custom_weights, engine=engine, top_k=top_k, cursor=cursor,
+        compare=compare, hoist_weights=hoist_weights, components=components, fields=fields, lazy=lazy,
+        as_of=as_of, aggregate_warnings=aggregate_warnings,
+    )
+    return {"analyzed_tasks": list(rows), "meta": meta}
+
+
+if __name__ == "__main__":
+    from tasks.cli import main
+
+    raise SystemExit(main())
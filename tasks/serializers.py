@@ -0,0 +1,194 @@
+"""
+Request decoding and response encoding for the API.
+
+JSON goes through the fastest installed backend: orjson, else msgspec, else
+the stdlib json module. All of them produce the same documents: values the
+fast encoders do not handle natively (dates, Decimal, UUID, lazy strings) go
+through DjangoJSONEncoder, so e.g. datetimes keep Django's format, and
+explain.Lazy values are rendered to their string or list. One
+difference: orjson writes NaN/Infinity as null where the stdlib writes the
+non-standard NaN/Infinity literals.
+
+MessagePack output needs msgspec or msgpack; MSGPACK_AVAILABLE tells whether
+one is installed.
+
+The analyze request body is described once (ANALYZE_REQUEST_FIELDS). With
+msgspec that description becomes a typed decoder, so parsing and validating
+the envelope and the shape of every task happen in one pass over the bytes;
+the other backends check the same types on the decoded object.
+"""
+import json
+from importlib.util import find_spec
+from typing import Union
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .explain import Lazy
+
+if find_spec("orjson") is not None:
+    import orjson
+
+    BACKEND = "orjson"
+elif find_spec("msgspec") is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+if find_spec("msgspec") is not None:
+    import msgspec
+else:
+    msgspec = None
+
+if msgspec is None and find_spec("msgpack") is not None:
+    import msgpack
+else:
+    msgpack = None
+
+MSGPACK_AVAILABLE = msgspec is not None or msgpack is not None
+# msgspec.DecodeError is not a ValueError
+_BackendDecodeError = msgspec.DecodeError if msgspec is not None else ValueError
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+_django_encoder_default = DjangoJSONEncoder().default
+
+
+def _django_default(obj):
+    if isinstance(obj, Lazy):
+        return obj.value()
+    return _django_encoder_default(obj)
+
+
+class _JSONEncoder(DjangoJSONEncoder):
+    def default(self, obj):
+        return _django_default(obj)
+
+
+# name, accepted types, default; None is accepted for every field and means "use the default"
+ANALYZE_REQUEST_FIELDS = (
+    ("tasks", (list, dict), None),  # legacy clients nest {"tasks": {"tasks": [...]}}
+    ("project", (str,), None),
+    ("snapshot", (str,), None),
+    ("strategy", (str,), "smart_balance"),
+    ("weights", (dict,), None),
+    ("engine", (str,), "auto"),
+    ("top_k", (int,), None),
+    ("cursor", (str, int), None),
+    ("compare", (str, list), None),
+    ("debug_timing", (bool,), False),
+    ("hoist_weights", (bool,), False),
+    ("components", (dict,), None),
+    ("fields", (list, str), None),
+    ("as_of", (str,), None),
+    ("aggregate_warnings", (bool,), False),
+)
+
+
+class DecodeError(ValueError):
+    """
+    The input is not valid JSON.
+    """
+
+
+def dumps(obj):
+    """
+    JSON document as UTF-8 bytes.
+    """
+    if BACKEND == "orjson":
+        try:
+            return orjson.dumps(obj, default=_django_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except (TypeError, orjson.JSONEncodeError):
+            pass  # e.g. integers beyond 64 bits or non-string keys: the stdlib handles them
+    elif BACKEND == "msgspec":
+        try:
+            return _msgspec_encoder.encode(obj)
+        except (TypeError, OverflowError, msgspec.EncodeError):
+            pass
+    return json.dumps(obj, cls=_JSONEncoder).encode("utf-8")
+
+
+def loads(data):
+    """
+    Parses a JSON document from bytes or str. Raises DecodeError on invalid input.
+    """
+    try:
+        if BACKEND == "orjson":
+            return orjson.loads(data)
+        if BACKEND == "msgspec":
+            return msgspec.json.decode(data)
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("utf-8")
+        return json.loads(data)
+    except (ValueError, _BackendDecodeError) as e:
+        raise DecodeError(str(e))
+
+
+def dumps_msgpack(obj):
+    """
+    MessagePack document as bytes. Raises ValueError when neither msgspec nor msgpack is installed.
+    """
+    if msgspec is not None:
+        return _msgpack_encoder.encode(obj)
+    if msgpack is not None:
+        return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+    raise ValueError("MessagePack output requires msgspec or msgpack to be installed")
+
+
+def _msgpack_default(obj):
+    return _django_default(obj)
+
+
+if msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder(enc_hook=_django_default)
+    _msgpack_encoder = msgspec.msgpack.Encoder(enc_hook=_django_default)
+    # tasks keep free-form values: coerce_task turns dirty fields into warnings, not errors
+    _AnalyzeRequest = msgspec.defstruct(
+        "AnalyzeRequest",
+        [
+            (name, list[dict] | dict | None if name == "tasks" else Union[types + (type(None),)], None)
+            for name, types, _ in ANALYZE_REQUEST_FIELDS
+        ],
+    )
+    _request_decoder = msgspec.json.Decoder(_AnalyzeRequest)
+
+
+def _type_name(types):
+    names = {list: "a list", dict: "an object", str: "a string", int: "an integer", bool: "a boolean"}
+    return " or ".join(names[t] for t in types)
+
+
+def decode_analyze_request(body):
+    """
+    Parses and validates an analyze request body (bytes). Returns a dict with every field of
+    ANALYZE_REQUEST_FIELDS (defaults filled in) plus "has_tasks" (whether "tasks" was sent).
+    Raises DecodeError on invalid JSON and ValueError on a field of the wrong type.
+    """
+    if not body:
+        body = b"{}"
+    if msgspec is not None:
+        try:
+            request = _request_decoder.decode(body)
+        except msgspec.ValidationError as e:
+            raise ValueError(str(e))
+        except msgspec.DecodeError as e:
+            raise DecodeError(str(e))
+        payload = {name: getattr(request, name) for name, _, _ in ANALYZE_REQUEST_FIELDS}
+    else:
+        payload = loads(body)
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        for name, types, _ in ANALYZE_REQUEST_FIELDS:
+            value = payload.get(name)
+            if value is None:
+                continue
+            if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+                raise ValueError(f"{name} must be {_type_name(types)}")
+    result = {
+        name: default if payload.get(name) is None else payload[name] for name, _, default in ANALYZE_REQUEST_FIELDS
+    }
+    tasks = result["tasks"]
+    if isinstance(tasks, dict):
+        tasks = result["tasks"] = tasks.get("tasks")
+        if not isinstance(tasks, list):
+            raise ValueError("tasks must be a list")
+    result["has_tasks"] = tasks is not None
+    return result
@@ -0,0 +1,480 @@
+"""
+What-if simulations.
+
+simulate_scenarios() scores a base task list once and then evaluates each
+scenario, a list of overlays such as "t3's deadline slips a week" or "t7 no
+longer depends on t2", as a diff against the base. The scenarios never copy
+the task list:
+
+- An overlay changes a few rows. Built-in urgency and importance only read
+  their own row. Dependencies reads the reference counts of the ids whose
+  dependents changed. Effort and dependencies are min-max normalized over
+  all tasks, and their bounds are tracked as multisets. A scenario that
+  leaves the bounds alone only rescores the rows it touches.
+- New ranks come from bisecting the base's sorted rank keys. Rows the
+  overlay did not touch keep their relative order. A row's rank moves by
+  the number of rescored rows that crossed it, which can be counted between
+  the old and new keys of the rescored rows.
+- Only a scenario that moves a normalization bound rescores every task
+  ("rescaled"). This happens, for example, when the longest task gets
+  shorter.
+- Dependency changes are checked against the base's strongly connected
+  components. A search from the dependent finds cycles closed by added
+  dependencies. The components that lost an internal edge are re-split to
+  find tasks a removal takes out of every cycle.
+
+Every reported score and rank equals that of a full analysis of the
+modified task list. Only the built-in components are supported, and ids
+must be unique (like IncrementalAnalyzer).
+"""
+from bisect import bisect_left
+from collections import Counter
+from datetime import date
+from math import inf, isfinite
+
+from .components import BUILTIN_COMPONENTS, _urgency, evaluate, registered_components, weighted_sum
+from .scoring import (
+    _resolve_as_of,
+    _resolve_weights,
+    _score_table,
+    _select_engine,
+    _tier,
+    resolve_components,
+    strongly_connected_components,
+)
+from .snapshot import build_table
+from .table import NO_DUE_DATE, coerce_task
+from .validation import TaskWarnings
+
+MAX_SCENARIOS = 256
+DEFAULT_MAX_CHANGES = 50
+OVERLAY_FIELDS = (
+    "id", "importance", "estimated_hours", "due_date", "delay_days", "dependencies", "add_dependencies",
+    "remove_dependencies",
+)
+
+_WARNING_FIELDS = {
+    "importance": "importance", "hours": "estimated_hours", "due_date": "due_date", "dependencies": "dependencies",
+}
+
+
+class _Multiset:
+    """
+    Counts of the values a min-max normalization runs over, for bounds under removals and additions.
+    """
+
+    def __init__(self, values):
+        self.counts = Counter(values)
+        self.ordered = sorted(self.counts)
+
+    def bounds(self, removed, added):
+        """
+        (min, max) after taking away the `removed` Counter and adding the `added` values;
+        None when nothing is left.
+        """
+        lo = next((v for v in self.ordered if self.counts[v] > removed[v]), None)
+        hi = next((v for v in reversed(self.ordered) if self.counts[v] > removed[v]), None)
+        if added:
+            lo = min(added) if lo is None else min(lo, min(added))
+            hi = max(added) if hi is None else max(hi, max(added))
+        return None if lo is None else (lo, hi)
+
+
+class _OverlayColumns:
+    """
+    The TaskColumns attributes the built-in components read, over a scenario's full columns.
+    """
+
+    def __init__(self, table, outdegree, importance, hours, days):
+        self.table = table
+        self.outdegree = outdegree
+        self.importance = importance
+        self.hours = hours
+        self.days = days
+        self.blocks = [float(outdegree[j]) for j in table.row_names]
+
+    def __len__(self):
+        return len(self.importance)
+
+
+class _Base:
+    """
+    The base analysis: table, component columns, rank keys in sorted order, the bounds of the
+    normalized components and the dependency graph's components.
+    """
+
+    def __init__(self, table, cols, weights, today):
+        self.table = table
+        self.cols = cols
+        self.weights = weights
+        self.today = today.toordinal()
+        n = len(table)
+        self.row_of = {}
+        for i, tid in enumerate(table.ids):
+            self.row_of[tid] = i
+            self.row_of.setdefault(str(tid), i)
+        self.outdegree = table.outdegree()
+        self.names_known = table.name_rows
+        score, importance, hours = cols["score"], table.importance, table.hours
+        self.keys = [(-round(score[i], 4), -importance[i], hours[i], i) for i in range(n)]
+        order = sorted(range(n), key=self.keys.__getitem__)
+        self.sorted_keys = [self.keys[i] for i in order]
+        self.rank = [0] * n
+        for position, i in enumerate(order, start=1):
+            self.rank[i] = position
+        self.finite = all(isfinite(h) for h in hours)
+        self.effort = _Multiset([1.0 / (1.0 + h) for h in hours]) if self.finite else None
+        self.blocks = _Multiset(table.known_outdegrees(self.outdegree))
+        self._graph = None
+
+    @property
+    def graph(self):
+        """
+        (adj, strongly connected components, component of each node, cyclic component flags),
+        built on first use.
+        Graph nodes are rows: ids are unique.
+        """
+        if self._graph is None:
+            _, adj = self.table.graph()
+            components = strongly_connected_components(adj)
+            comp_of = [0] * len(adj)
+            for c, members in enumerate(components):
+                for v in members:
+                    comp_of[v] = c
+            cyclic = [len(members) > 1 or members[0] in adj[members[0]] for members in components]
+            self._graph = (adj, components, comp_of, cyclic)
+        return self._graph
+
+
+def _parse_overlay(base, overlay, changes, where):
+    """
+    Applies one overlay to `changes` ({row: [importance, hours, due ordinal, raw due_date,
+    dependency ids]}, the row's current values in this scenario).
+    """
+    if not isinstance(overlay, dict):
+        raise ValueError(f"{where} must be an object")
+    unknown = [key for key in overlay if key not in OVERLAY_FIELDS]
+    if unknown:
+        raise ValueError(f"{where}: unknown field '{unknown[0]}', expected some of {', '.join(OVERLAY_FIELDS)}")
+    tid = overlay.get("id")
+    row = base.row_of.get(tid) if isinstance(tid, (str, int)) and not isinstance(tid, bool) else None
+    if row is None:
+        raise ValueError(f"{where}: task '{tid}' is not in the base tasks")
+    table = base.table
+    current = changes.get(row)
+    if current is None:
+        current = [table.importance[row], table.hours[row], table.due[row], table.due_dates[row], table.dependencies(row)]
+    importance, hours, due, due_date, deps = current
+
+    # overlaid values go through the input coercion, but anything it would warn about is an error here
+    fields = {key: overlay[key] for key in ("importance", "estimated_hours", "due_date", "dependencies") if key in overlay}
+    warnings = TaskWarnings()
+    _, _, _, new_importance, new_hours, parsed, new_deps = coerce_task(dict(fields, id=table.ids[row]), 0, warnings)
+    if warnings.by_code:
+        field = _WARNING_FIELDS[next(iter(warnings.by_code)).rsplit("_", 1)[0]]
+        raise ValueError(f"{where}: invalid {field} value '{fields[field]}'")
+    if "importance" in fields:
+        importance = new_importance
+    if "estimated_hours" in fields:
+        hours = new_hours
+    if "due_date" in fields:
+        due_date = fields["due_date"]
+        due = parsed.toordinal() if parsed is not None else NO_DUE_DATE
+    if "dependencies" in fields:
+        deps = new_deps
+    if "delay_days" in overlay:
+        days = overlay["delay_days"]
+        if isinstance(days, bool) or not isinstance(days, int):
+            raise ValueError(f"{where}: delay_days must be an integer")
+        if due == NO_DUE_DATE:
+            raise ValueError(f"{where}: task '{tid}' has no due date to delay")
+        due += days
+        if not 1 <= due <= date.max.toordinal():
+            raise ValueError(f"{where}: delay_days moves the due date out of range")
+        due_date = date.fromordinal(due).isoformat()
+    for key in ("add_dependencies", "remove_dependencies"):
+        if key in overlay and (not isinstance(overlay[key], list) or not all(isinstance(d, (str, int)) for d in overlay[key])):
+            raise ValueError(f"{where}: {key} must be a list of task ids")
+    if "remove_dependencies" in overlay:
+        removed = set(overlay["remove_dependencies"])
+        deps = [d for d in deps if d not in removed]
+    if "add_dependencies" in overlay:
+        deps = deps + [d for d in overlay["add_dependencies"] if d not in deps]
+    if not all(isinstance(d, (str, int)) for d in deps):
+        raise ValueError(f"{where}: dependencies must be task ids")
+    changes[row] = [importance, hours, due, due_date, deps]
+
+
+def _dependency_deltas(base, changes):
+    """
+    {name index: reference count change} of known ids, and the (dependency row, dependent row)
+    edges added and removed, from the rows whose dependency lists changed.
+    """
+    table = base.table
+    deltas = Counter()
+    added, removed = [], []
+    for row, (_, _, _, _, deps) in changes.items():
+        old = Counter(table.dependencies(row))
+        new = Counter(deps)
+        if old == new:
+            continue
+        for name, count in (new - old).items():
+            u = base.row_of.get(name)
+            if u is not None and table.ids[u] == name:
+                deltas[table.row_names[u]] += count
+                added.append((u, row))
+        for name, count in (old - new).items():
+            u = base.row_of.get(name)
+            if u is not None and table.ids[u] == name:
+                deltas[table.row_names[u]] -= count
+                if name not in new:
+                    removed.append((u, row))
+    return {j: d for j, d in deltas.items() if d}, added, removed
+
+
+def _score_row(base, importance, hours, due, count, effort_bounds, block_bounds):
+    """
+    Score of one row from its inputs, with the arithmetic of the built-in python components.
+    """
+    days = inf if due == NO_DUE_DATE else float(due) - base.today
+    values = {
+        "urgency": 0.0 if days == inf else _urgency(days),
+        "importance": float(importance) / 10.0,
+    }
+    lo, hi = block_bounds if block_bounds is not None else (0, 1)
+    values["dependencies"] = 0.0 if hi - lo < 1e-9 else (float(count) - lo) / (hi - lo)
+    lo, hi = effort_bounds
+    values["effort"] = 0.5 if hi - lo < 1e-9 else (1.0 / (1.0 + float(hours)) - lo) / (hi - lo)
+    score = None
+    for name in BUILTIN_COMPONENTS:
+        term = base.weights.get(name, 0) * values[name]
+        score = term if score is None else score + term
+    return score
+
+
+def _rank_diff(base, new_keys):
+    """
+    new_keys: {row: new rank key} of the rescored rows.
+    Returns ({row: new rank}, number of rows whose rank changed).
+    """
+    sorted_keys = base.sorted_keys
+    old_sorted = sorted(base.keys[r] for r in new_keys)
+    new_sorted = sorted(new_keys.values())
+    ranks = {}
+    for row, key in new_keys.items():
+        untouched_before = bisect_left(sorted_keys, key) - bisect_left(old_sorted, key)
+        ranks[row] = untouched_before + bisect_left(new_sorted, key) + 1
+    moved = sum(1 for row, rank in ranks.items() if rank != base.rank[row])
+
+    # an untouched row with key k moves by (#rescored rows now before k) - (#before it in the base);
+    # that difference only changes at the old and new keys of the rescored rows
+    events = sorted([(key, 0) for key in old_sorted] + [(key, 1) for key in new_sorted])
+    shift = 0
+    for (key, kind), following in zip(events, events[1:] + [(None, None)]):
+        shift += 1 if kind == 1 else -1
+        if shift and following[0] is not None:
+            # untouched base rows strictly between this event and the next one
+            between = bisect_left(sorted_keys, following[0]) - bisect_left(sorted_keys, key)
+            between -= bisect_left(old_sorted, following[0]) - bisect_left(old_sorted, key)
+            moved += between
+    return ranks, moved
+
+
+def _full_rescore(base, changes, deltas):
+    """
+    Scores and ranks every row of the scenario (a normalization bound moved).
+    Returns (scores, ranks) as lists by row.
+    """
+    table, cols = base.table, base.cols
+    n = len(table)
+    importance = [float(v) for v in table.importance]
+    hours = [float(v) for v in table.hours]
+    due = list(table.due)
+    for row, (imp, h, d, _, _) in changes.items():
+        importance[row], hours[row], due[row] = float(imp), float(h), d
+    days = [inf if d == NO_DUE_DATE else float(d) - base.today for d in due]
+    outdegree = list(base.outdegree)
+    for j, d in deltas.items():
+        outdegree[j] += d
+    builtins = [registered_components()[name] for name in BUILTIN_COMPONENTS]
+    values = evaluate(builtins, _OverlayColumns(table, outdegree, importance, hours, days))
+    scores = weighted_sum(values, cols["components"], base.weights)
+    imp_raw = list(table.importance)
+    for row, (imp, _, _, _, _) in changes.items():
+        imp_raw[row] = imp
+    keys = [(-round(scores[i], 4), -imp_raw[i], hours[i], i) for i in range(n)]
+    ranks = [0] * n
+    for position, i in enumerate(sorted(range(n), key=keys.__getitem__), start=1):
+        ranks[i] = position
+    return scores, ranks
+
+
+def _cycle_changes(base, added, removed):
+    """
+    {"created": [{"task", "dependency"}], "released": [ids]} for the scenario's edge changes:
+    added dependencies that close a cycle, and tasks a removal takes out of every cycle.
+    """
+    if not added and not removed:
+        return None
+    adj, components, comp_of, cyclic = base.graph
+    extra, dropped = {}, set(removed)
+    for u, v in added:
+        extra.setdefault(u, []).append(v)
+
+    def neighbours(v):
+        for w in adj[v]:
+            if (v, w) not in dropped:
+                yield w
+        yield from extra.get(v, ())
+
+    # components come in reverse topological order, so base edges never lead to a higher
+    # component index: below the lowest component with an added edge, nothing leads back
+    floor = min((comp_of[u] for u in extra), default=len(components))
+
+    def reaches(start, target):
+        bound = min(floor, comp_of[target])
+        seen, stack = {start}, [start] if comp_of[start] >= bound else []
+        while stack:
+            x = stack.pop()
+            if x == target:
+                return True
+            for w in neighbours(x):
+                if w not in seen and comp_of[w] >= bound:
+                    seen.add(w)
+                    stack.append(w)
+        return False
+
+    ids = base.table.ids
+    # the new edge u -> v closes a cycle when v reaches u
+    created = [
+        {"task": ids[v], "dependency": ids[u]}
+        for u, v in added
+        if not (comp_of[u] == comp_of[v] and cyclic[comp_of[u]]) and reaches(v, u)
+    ]
+    released = []
+    for c in sorted({comp_of[u] for u, v in removed if comp_of[u] == comp_of[v] and cyclic[comp_of[u]]}):
+        members = components[c]
+        local = {v: k for k, v in enumerate(members)}
+        sub = [[local[w] for w in neighbours(v) if w in local] for v in members]
+        still = set()
+        for part in strongly_connected_components(sub):
+            if len(part) > 1 or part[0] in sub[part[0]]:
+                still.update(members[k] for k in part)
+        for v in sorted(set(members) - still):
+            # without the component's lost edges, added ones may still close a cycle through v
+            if not (extra and any(reaches(w, v) for w in neighbours(v))):
+                released.append(ids[v])
+    if not created and not released:
+        return None
+    return {"created": created, "released": released}
+
+
+def _simulate(base, scenario, position, max_changes):
+    if not isinstance(scenario, dict) or not isinstance(scenario.get("overlays"), list):
+        raise ValueError(f"scenario {position} must be an object with an \"overlays\" list")
+    name = scenario.get("name", f"scenario {position + 1}")
+    changes = {}
+    for k, overlay in enumerate(scenario["overlays"]):
+        _parse_overlay(base, overlay, changes, f"scenario {position} overlay {k}")
+    table, cols = base.table, base.cols
+    deltas, added, removed = _dependency_deltas(base, changes)
+
+    # bounds of the normalized components after the overlays
+    finite = base.finite and all(isfinite(c[1]) for c in changes.values())
+    effort_bounds = rescaled = None
+    if finite:
+        effort_removed = Counter(1.0 / (1.0 + table.hours[row]) for row in changes)
+        effort_bounds = base.effort.bounds(effort_removed, [1.0 / (1.0 + c[1]) for c in changes.values()])
+        rescaled = effort_bounds != base.effort.bounds(Counter(), [])
+    name_rows = table.name_rows
+    block_removed = Counter(base.outdegree[j] for j in deltas if base.outdegree[j] > 0 and name_rows[j] >= 0)
+    block_added = [base.outdegree[j] + d for j, d in deltas.items() if base.outdegree[j] + d > 0 and name_rows[j] >= 0]
+    block_bounds = base.blocks.bounds(block_removed, block_added)
+    rescaled = rescaled or not finite or block_bounds != base.blocks.bounds(Counter(), [])
+
+    score, importance = cols["score"], table.importance
+    if rescaled:
+        scores, ranks = _full_rescore(base, changes, deltas)
+        rows = [i for i in range(len(table)) if scores[i] != score[i]]
+        moved = sum(1 for i in range(len(table)) if ranks[i] != base.rank[i])
+        new_score, new_rank = scores.__getitem__, ranks.__getitem__
+    else:
+        rescored = dict.fromkeys(changes)
+        for j in deltas:
+            rescored[name_rows[j]] = None
+        scores, keys = {}, {}
+        for row in rescored:
+            imp, hours, due = changes[row][:3] if row in changes else (importance[row], table.hours[row], table.due[row])
+            count = base.outdegree[table.row_names[row]] + deltas.get(table.row_names[row], 0)
+            scores[row] = _score_row(base, imp, hours, due, count, effort_bounds, block_bounds)
+            keys[row] = (-round(scores[row], 4), -imp, hours, row)
+        ranks, moved = _rank_diff(base, keys)
+        rows = [row for row in rescored if scores[row] != score[row]]
+        new_score, new_rank = scores.__getitem__, ranks.__getitem__
+
+    rows.sort(key=lambda i: (-abs(new_rank(i) - base.rank[i]), new_rank(i)))
+    result = {
+        "name": name,
+        "changed": len(rows),
+        "moved": moved,
+        "rescaled": bool(rescaled),
+        "changes": [
+            {
+                "id": table.ids[i],
+                "rank": [base.rank[i], new_rank(i)],
+                "score": [round(score[i], 4), round(new_score(i), 4)],
+                "tier": [cols["tier"][i], _tier(new_score(i))],
+            }
+            for i in rows[:max_changes]
+        ],
+    }
+    cycles = _cycle_changes(base, added, removed)
+    if cycles is not None:
+        result["cycles"] = cycles
+    return result
+
+
+def simulate_scenarios(
+    tasks, scenarios, strategy="smart_balance", custom_weights=None, engine="auto", as_of=None,
+    max_changes=DEFAULT_MAX_CHANGES,
+):
+    """
+    Input: tasks and options as for calculate_scores (ids must be unique); scenarios: list of
+      {"name": ..., "overlays": [{"id": ..., <fields>}, ...]} where the fields are importance,
+      estimated_hours, due_date, dependencies (replacing the task's values, coerced like any
+      input), delay_days (moves the due date), add_dependencies and remove_dependencies.
+      Overlays of one scenario apply in order; scenarios are independent of each other.
+    max_changes: tasks listed per scenario.
+    Returns {"scenarios": [...], "meta": {...}}; per scenario: name, changed (tasks whose score
+      changed), moved (tasks whose rank changed, including the ones pushed by others), rescaled
+      (a normalization bound moved, so every task was rescored), changes (the changed tasks with
+      [before, after] rank, score and tier, largest rank changes first) and, when dependencies
+      changed, cycles: {"created": [{"task", "dependency"}], "released": [ids]}.
+    """
+    if not isinstance(scenarios, list) or not scenarios:
+        raise ValueError("scenarios must be a non-empty list")
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"at most {MAX_SCENARIOS} scenarios are allowed")
+    if isinstance(max_changes, bool) or not isinstance(max_changes, int) or max_changes < 0:
+        raise ValueError("max_changes must be a non-negative integer")
+    today = _resolve_as_of(as_of)
+    weights = _resolve_weights(strategy, custom_weights)
+    active = resolve_components(None, [weights])
+    if [c.name for c in active] != list(BUILTIN_COMPONENTS):
+        raise ValueError("simulations support the built-in components only")
+
+    table, _ = build_table(tasks)
+    if table.representative_rows() is not None:
+        raise ValueError("simulations need unique task ids")
+    engine = _select_engine(engine, len(table))
+    cols = _score_table(engine, table, today, weights, table.outdegree(), None, components=active)
+    base = _Base(table, cols, weights, today)
+    results = [_simulate(base, scenario, position, max_changes) for position, scenario in enumerate(scenarios)]
+    meta = {
+        "as_of": today.isoformat(),
+        "strategy_used": strategy,
+        "engine": engine,
+        "total_tasks": len(table),
+        "scenarios": len(results),
+    }
+    return {"scenarios": results, "meta": meta}
@@ -0,0 +1,353 @@
+"""
+Binary task snapshots.
+
+A snapshot is a normalized TaskTable (and its normalization warnings) saved
+in a file that opens with mmap and is read without parsing or copying:
+loading a large project takes a header read instead of JSON decoding and
+per-task coercion. calculate_scores() and the other analyses accept an open
+TaskSnapshot wherever they take a task list.
+
+Layout (little-endian; every section starts at an 8-byte boundary):
+
+    header      MAGIC, version, row count, name count, edge count
+    sections    (offset, length) in bytes of each entry of SECTIONS
+    data        the sections
+
+The numeric columns are the TaskTable arrays as they are in memory:
+importance int8, hours float64, due (date ordinal) int32, and the int64
+row_names / dep_offsets / dep_targets (CSR dependencies) / name_rows. Ids and
+dependency ids are one interned table (names); names, titles and the raw
+due_date values are value columns: a kind byte, int64 offsets and a UTF-8
+blob per column, strings stored as is and other JSON values JSON-encoded.
+Warnings are a JSON object: the [task id, messages] pairs and the per-code
+summary entries of the TaskWarnings.
+
+Files are written to a temporary name and renamed, so readers never see a
+partial snapshot. `python manage.py build_snapshot` converts JSON or NDJSON
+task files; get_snapshot() opens the ones in settings.TASK_SNAPSHOT_DIR by
+name for {"snapshot": "name"} analyze requests.
+"""
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Sequence
+from functools import cached_property
+
+from .table import TaskTable
+from .validation import TaskWarnings
+
+MAGIC = b"TASKSNAP"
+VERSION = 2
+SNAPSHOT_SUFFIX = ".tasksnap"
+MAX_OPEN_SNAPSHOTS = 4
+_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+_HEADER = struct.Struct("<8sIIqqq")
+_SECTION = struct.Struct("<qq")
+
+# value column kinds
+_STR, _NONE, _JSON = 0, 1, 2
+
+# name, array typecode ("" for raw bytes)
+SECTIONS = (
+    ("importance", "b"),
+    ("hours", "d"),
+    ("due", "i"),
+    ("row_names", "q"),
+    ("dep_offsets", "q"),
+    ("dep_targets", "q"),
+    ("name_rows", "q"),
+    ("names.kinds", "B"),
+    ("names.offsets", "q"),
+    ("names.data", ""),
+    ("titles.kinds", "B"),
+    ("titles.offsets", "q"),
+    ("titles.data", ""),
+    ("due_dates.kinds", "B"),
+    ("due_dates.offsets", "q"),
+    ("due_dates.data", ""),
+    ("warnings", ""),
+)
+
+
+class ValueColumn(Sequence):
+    """
+    Read-only sequence over a value column; items are decoded on access.
+    """
+
+    def __init__(self, kinds, offsets, data):
+        self._kinds = kinds
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def _decode(self, i):
+        kind = self._kinds[i]
+        if kind == _NONE:
+            return None
+        raw = self._data[self._offsets[i]:self._offsets[i + 1]]
+        if kind == _STR:
+            return str(raw, "utf-8", "surrogatepass")
+        return json.loads(bytes(raw))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._decode(k) for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("value column index out of range")
+        return self._decode(i)
+
+    def __iter__(self):
+        return map(self._decode, range(len(self)))
+
+
+class RowIds(Sequence):
+    """
+    The id of every row, looked up through the interned name table.
+    """
+
+    def __init__(self, names, row_names):
+        self._names = names
+        self._row_names = row_names
+
+    def __len__(self):
+        return len(self._row_names)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._names[j] for j in self._row_names[i]]
+        return self._names[self._row_names[i]]
+
+    def __iter__(self):
+        names = self._names
+        return (names[j] for j in self._row_names)
+
+
+def _encode_values(values):
+    """
+    (kinds, offsets, data) of a value column. Raises ValueError for values JSON cannot encode.
+    """
+    kinds = bytearray(len(values))
+    offsets = array("q", [0])
+    chunks = []
+    size = 0
+    for i, value in enumerate(values):
+        if value is None:
+            kinds[i] = _NONE
+            raw = b""
+        elif type(value) is str:
+            raw = value.encode("utf-8", "surrogatepass")
+        else:
+            kinds[i] = _JSON
+            try:
+                raw = json.dumps(value, allow_nan=True, separators=(",", ":")).encode("utf-8")
+            except TypeError as e:
+                raise ValueError(f"cannot store {type(value).__name__} value in a snapshot: {e}")
+        chunks.append(raw)
+        size += len(raw)
+        offsets.append(size)
+    return kinds, offsets, b"".join(chunks)
+
+
+def _check_byteorder():
+    if sys.byteorder != "little":
+        raise ValueError("task snapshots are little-endian; this platform is not")
+
+
+def write_snapshot(path, table, warnings_map=None):
+    """
+    Saves a TaskTable (TaskTable.build(tasks)) and its warnings_map to path.
+    Raises ValueError when an id, title or due_date value cannot be JSON-encoded.
+    """
+    warnings_map = warnings_map if warnings_map is not None else TaskWarnings()
+    warnings = {
+        "tasks": [[tid, messages] for tid, messages in warnings_map.items()],
+        "codes": warnings_map.summary() if isinstance(warnings_map, TaskWarnings) else [],
+    }
+    columns = {
+        "importance": table.importance,
+        "hours": table.hours,
+        "due": table.due,
+        "row_names": table.row_names,
+        "dep_offsets": table.dep_offsets,
+        "dep_targets": table.dep_targets,
+        "name_rows": table.name_rows,
+    }
+    for name, values in (("names", table.names), ("titles", table.titles), ("due_dates", table.due_dates)):
+        columns[name + ".kinds"], columns[name + ".offsets"], columns[name + ".data"] = _encode_values(values)
+    try:
+        columns["warnings"] = json.dumps(warnings, separators=(",", ":")).encode("utf-8")
+    except TypeError as e:
+        raise ValueError(f"cannot store warnings in a snapshot: {e}")
+
+    _check_byteorder()
+    position = _HEADER.size + _SECTION.size * len(SECTIONS)
+    layout = []
+    for name, _ in SECTIONS:
+        columns[name] = memoryview(columns[name]).cast("B")
+        position += -position % 8
+        layout.append((position, len(columns[name])))
+        position += len(columns[name])
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, 0, len(table), len(table.names), len(table.dep_targets)))
+            for offset, length in layout:
+                f.write(_SECTION.pack(offset, length))
+            for (name, _), (offset, _) in zip(SECTIONS, layout):
+                f.write(bytes(offset - f.tell()))
+                f.write(columns[name])
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class TaskSnapshot:
+    """
+    An opened snapshot: .table is a TaskTable whose columns are views of the mapped file,
+    .warnings_map its TaskWarnings. Usable as a context manager; the mapping is released
+    on close() once no analysis result still refers to it.
+    """
+
+    def __init__(self, path):
+        _check_byteorder()
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise ValueError(f"{self.path} is not a task snapshot")
+        try:
+            self._sections = self._read_header()
+        except ValueError:
+            self._mmap.close()
+            raise
+        self.table = self._build_table()
+
+    def _read_header(self):
+        buf = self._mmap
+        if len(buf) < _HEADER.size or buf[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a task snapshot")
+        _, version, _, n, n_names, n_edges = _HEADER.unpack_from(buf, 0)
+        if version != VERSION:
+            raise ValueError(f"{self.path}: unsupported snapshot version {version}")
+        if len(buf) < _HEADER.size + _SECTION.size * len(SECTIONS):
+            raise ValueError(f"{self.path} is truncated")
+        expected = {
+            "importance": n, "hours": n, "due": n, "row_names": n, "dep_offsets": n + 1, "dep_targets": n_edges,
+            "name_rows": n_names, "names.kinds": n_names, "names.offsets": n_names + 1,
+            "titles.kinds": n, "titles.offsets": n + 1, "due_dates.kinds": n, "due_dates.offsets": n + 1,
+        }
+        layout = []
+        for k, (name, typecode) in enumerate(SECTIONS):
+            offset, length = _SECTION.unpack_from(buf, _HEADER.size + k * _SECTION.size)
+            if offset < 0 or length < 0 or offset + length > len(buf):
+                raise ValueError(f"{self.path} is truncated")
+            if typecode and length != expected[name] * array(typecode).itemsize:
+                raise ValueError(f"{self.path}: section {name} has the wrong size")
+            layout.append((name, typecode, offset, length))
+        # views only once the layout checked out, so a failed open can unmap the file
+        view = memoryview(buf)
+        sections = {}
+        for name, typecode, offset, length in layout:
+            section = view[offset:offset + length]
+            sections[name] = section.cast(typecode) if typecode else section
+        return sections
+
+    def _build_table(self):
+        s = self._sections
+        table = TaskTable()
+        for name in ("importance", "hours", "due", "row_names", "dep_offsets", "dep_targets", "name_rows"):
+            setattr(table, name, s[name])
+        table.names = ValueColumn(s["names.kinds"], s["names.offsets"], s["names.data"])
+        table.titles = ValueColumn(s["titles.kinds"], s["titles.offsets"], s["titles.data"])
+        table.due_dates = ValueColumn(s["due_dates.kinds"], s["due_dates.offsets"], s["due_dates.data"])
+        table.ids = RowIds(table.names, table.row_names)
+        table.freeze()
+        return table
+
+    @cached_property
+    def warnings_map(self):
+        warnings_map = TaskWarnings()
+        warnings = json.loads(bytes(self._sections["warnings"]))
+        for tid, messages in warnings["tasks"]:
+            warnings_map[tid] = messages
+        warnings_map.by_code = {entry["code"]: entry for entry in warnings["codes"]}
+        return warnings_map
+
+    def __len__(self):
+        return len(self.table)
+
+    def close(self):
+        self.table = None
+        self._sections = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # rows or an ExplainContext still use the columns; the mapping goes with them
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_snapshot(path):
+    """
+    Maps the snapshot at path. Raises OSError when it cannot be read and ValueError when it
+    is not a valid snapshot.
+    """
+    return TaskSnapshot(path)
+
+
+def build_table(tasks):
+    """
+    (table, warnings_map) of a task iterable (TaskTable.build) or of an open TaskSnapshot.
+    """
+    if isinstance(tasks, TaskSnapshot):
+        if tasks.table is None:
+            raise ValueError("snapshot is closed")
+        return tasks.table, tasks.warnings_map
+    return TaskTable.build(tasks)
+
+
+_open = {}
+_open_lock = threading.Lock()
+
+
+def get_snapshot(name):
+    """
+    The snapshot <name>.tasksnap of settings.TASK_SNAPSHOT_DIR, kept open (at most
+    MAX_OPEN_SNAPSHOTS) and reopened when the file is replaced.
+    Raises ValueError for an invalid name and FileNotFoundError when there is no such snapshot.
+    """
+    from django.conf import settings
+
+    if not isinstance(name, str) or not _NAME.match(name):
+        raise ValueError(f"invalid snapshot name '{name}'")
+    directory = getattr(settings, "TASK_SNAPSHOT_DIR", None)
+    if directory is None:
+        raise FileNotFoundError("no TASK_SNAPSHOT_DIR configured")
+    path = os.path.join(directory, name + SNAPSHOT_SUFFIX)
+    stat = os.stat(path)
+    version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _open_lock:
+        entry = _open.pop(name, None)
+        if entry is None or entry[0] != version:
+            entry = (version, open_snapshot(path))
+        _open[name] = entry
+        while len(_open) > MAX_OPEN_SNAPSHOTS:
+            _open.pop(next(iter(_open)))
+        return entry[1]
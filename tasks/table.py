@@ -0,0 +1,370 @@
+"""
+Compact normalized task representation.
+
+TaskTable is a struct-of-arrays: one typed array per numeric field, task ids
+interned to integer name indices, and dependencies stored as CSR
+(offset/target) arrays over the same name table. Unknown dependency ids are
+interned too, so the original dependency lists can be rebuilt for output.
+The scoring engines read these arrays directly (numpy wraps them zero-copy).
+"""
+from array import array
+from datetime import date
+
+from .dates import NO_DUE_DATE, parse_date
+from .validation import TaskWarnings
+
+
+_MAX_EXACT = 2 ** 53  # ints converted to float without an OverflowError check
+_INF_NAN = frozenset(("inf", "+inf", "-inf", "infinity", "+infinity", "-infinity", "nan", "+nan", "-nan"))
+
+
+def _is_int_literal(value):
+    """
+    Whether int() accepts the string: optional whitespace and sign, decimal digits
+    with single underscores between them (str methods rather than re, which is slow to import).
+    """
+    s = value.strip()
+    if s[:1] in ("+", "-"):
+        s = s[1:]
+    return s.replace("_", "").isdecimal() and s[0] != "_" and s[-1] != "_" and "__" not in s
+
+
+def _int_value(value):
+    """
+    int(value), or None where int() raises. Ints, floats, strings and None take
+    type-dispatched paths; only other types go through int() and its exceptions.
+    """
+    kind = type(value)
+    if kind is int:
+        return value
+    if kind is float:
+        return int(value) if value - value == 0 else None  # inf - inf and nan - nan are nan
+    if kind is str and not _is_int_literal(value):
+        return None
+    if value is None:
+        return None
+    try:  # also strings beyond sys.get_int_max_str_digits()
+        return int(value)
+    except Exception:
+        return None
+
+
+def _float_value(value):
+    """
+    float(value), or None where float() raises; see _int_value.
+    """
+    kind = type(value)
+    if kind is float:
+        return value
+    if kind is int and -_MAX_EXACT < value < _MAX_EXACT:
+        return float(value)
+    if value is None:
+        return None
+    if kind is str:
+        s = value.strip()
+        if not any(map(str.isdecimal, s)) and s.lower() not in _INF_NAN:
+            return None
+    try:
+        return float(value)
+    except Exception:
+        return None
+
+
+def coerce_dependencies(deps):
+    """
+    Coerces a raw dependencies value to a list: comma-separated strings are split,
+    other iterables listed, anything else dropped.
+    Returns (list, warning): warning is None or a (code, message) pair (see validation.WARNINGS).
+    """
+    deps = deps or []
+    if isinstance(deps, list):
+        return deps, None
+    if isinstance(deps, str):
+        deps = [s.strip() for s in deps.split(",") if s.strip()]
+        return deps, ("dependencies_string", f"dependencies value was a string and coerced to list: {deps}")
+    try:
+        return list(deps), ("dependencies_coerced", "dependencies value coerced to list")
+    except Exception:
+        return [], ("dependencies_invalid", "dependencies value invalid; treated as empty list")
+
+
+def _check_due_date(tid, due_date, parsed, warnings_map):
+    if parsed is None and due_date is not None and due_date != "":
+        warnings_map.add(
+            tid, "due_date_invalid", f"due_date value '{due_date}' could not be parsed; treated as no due date"
+        )
+
+
+def coerce_task(t, i, warnings_map, parse_dates=True):
+    """
+    Validates and normalizes the fields of one raw task dict (i is its input position, used for default ids).
+    Coercion warnings are added to warnings_map (a validation.TaskWarnings) under the task id.
+    Returns (id, title, due_date, importance, estimated_hours, due_date_parsed, dependencies)
+    where due_date is the raw input value. With parse_dates=False due_date_parsed is None
+    (the caller parses the column in bulk and checks it).
+    """
+    if not isinstance(t, dict):
+        raise ValueError(f"task at position {i} is not an object")
+    tid = t["id"] if "id" in t else f"t{ i+1 }"
+    title = t["title"] if "title" in t else tid
+
+    raw = t["importance"] if "importance" in t else 5
+    value = raw if type(raw) is int else _int_value(raw)
+    if value is None:
+        importance = 5
+        warnings_map.add(tid, "importance_invalid", f"importance value '{raw}' is invalid and defaulted to 5")
+    else:
+        importance = max(1, min(10, value))
+        if value != importance:
+            warnings_map.add(tid, "importance_normalized", f"importance value '{raw}' normalized to {importance}")
+
+    raw = t["estimated_hours"] if "estimated_hours" in t else 2.0
+    hours = raw if type(raw) is float else _float_value(raw)
+    if hours is None:
+        hours = 2.0
+        warnings_map.add(tid, "hours_invalid", f"estimated_hours value '{raw}' is invalid and defaulted to 2.0")
+    elif hours < 0:
+        hours = 2.0
+        warnings_map.add(tid, "hours_negative", f"estimated_hours '{raw}' was negative and set to 2.0")
+
+    deps, warning = coerce_dependencies(t.get("dependencies"))
+    if warning:
+        warnings_map.add(tid, *warning)
+
+    due_date = t.get("due_date")
+    due_date_parsed = None
+    if parse_dates:
+        due_date_parsed = parse_date(due_date)
+        _check_due_date(tid, due_date, due_date_parsed, warnings_map)
+    return tid, title, due_date, importance, hours, due_date_parsed, deps
+
+
+class TaskTable:
+    """
+    Rows are tasks in input order. Per row: ids, titles, due_dates (raw input),
+    importance (int8), hours (float64), due (date ordinal, NO_DUE_DATE if none),
+    row_names (index into names). Dependencies of row i are
+    names[dep_targets[dep_offsets[i]:dep_offsets[i + 1]]].
+    name_rows maps a name to the last row carrying that id, or -1 for ids that
+    only appear as (unknown) dependencies.
+    """
+
+    __slots__ = (
+        "ids", "titles", "due_dates", "importance", "hours", "due", "row_names",
+        "dep_offsets", "dep_targets", "names", "name_rows", "_index",
+    )
+
+    def __init__(self):
+        self.ids = []
+        self.titles = []
+        self.due_dates = []
+        self.importance = array("b")
+        self.hours = array("d")
+        self.due = array("i")
+        self.row_names = array("q")
+        self.dep_offsets = array("q", [0])
+        self.dep_targets = array("q")
+        self.names = []
+        self.name_rows = array("q")
+        self._index = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, tasks, errors=None):
+        """
+        Normalizes raw task dicts (any iterable, consumed once) into a table.
+        Returns (table, warnings_map) with warnings_map a validation.TaskWarnings keyed by task id.
+        errors: a list to collect (position, code, message) of the tasks that cannot be
+        normalized into, leaving them out; by default they raise ValueError.
+        """
+        warnings_map = TaskWarnings()
+        table = cls()
+        due = table.due
+        seen = {}  # as in dates.due_ordinals: each distinct due_date string is parsed once
+        for i, t in enumerate(tasks):
+            if errors is None:
+                table.append(*coerce_task(t, i, warnings_map, parse_dates=False))
+            elif not isinstance(t, dict):
+                errors.append((i, "not_an_object", f"task at position {i} is not an object"))
+                continue
+            else:
+                try:
+                    table.append(*coerce_task(t, i, warnings_map, parse_dates=False))
+                except (TypeError, ValueError):
+                    errors.append(
+                        (i, "invalid_id", f"task at position {i}: ids and dependencies must be strings or numbers")
+                    )
+                    continue
+            # the due date is checked right after the task's coercion warnings, the order of
+            # coerce_task(parse_dates=True) and so of IncrementalAnalyzer
+            value = table.due_dates[-1]
+            ordinal = seen.get(value) if value.__class__ is str else None
+            if ordinal is None:
+                day = parse_date(value)
+                ordinal = day.toordinal() if day is not None else NO_DUE_DATE
+                if value.__class__ is str:
+                    seen[value] = ordinal
+            if ordinal == NO_DUE_DATE:
+                _check_due_date(table.ids[-1], value, None, warnings_map)
+            else:
+                due[-1] = ordinal
+        table.freeze()
+
+        names, name_rows, targets, offsets, ids = (
+            table.names, table.name_rows, table.dep_targets, table.dep_offsets, table.ids
+        )
+        for i in range(len(ids)):
+            for k in range(offsets[i], offsets[i + 1]):
+                j = targets[k]
+                if name_rows[j] < 0:
+                    warnings_map.add(
+                        ids[i], "dependency_not_found", f"dependency '{names[j]}' not found in provided tasks"
+                    )
+        if table.representative_rows() is not None:
+            rows_per_name = [0] * len(names)
+            for j in table.row_names:
+                rows_per_name[j] += 1
+            for j, count in enumerate(rows_per_name):
+                if count > 1:
+                    warnings_map.add(
+                        names[j], "duplicate_id",
+                        f"task id '{names[j]}' is used by {count} tasks; scoring uses the values of the last one",
+                    )
+        return table, warnings_map
+
+    @classmethod
+    def from_normalized(cls, tasks):
+        """
+        Table over already normalized task dicts (see scoring._normalize_task).
+        """
+        table = cls()
+        for t in tasks:
+            table.append(
+                t["id"], t["title"], t["due_date"], t["importance"], t["estimated_hours"],
+                t["due_date_parsed"], t["dependencies"],
+            )
+        table.freeze()
+        return table
+
+    def _intern(self, name):
+        j = self._index.get(name)
+        if j is None:
+            j = self._index[name] = len(self.names)
+            self.names.append(name)
+            self.name_rows.append(-1)
+        return j
+
+    def append(self, tid, title, due_date, importance, hours, due_date_parsed, deps):
+        row = len(self.ids)
+        try:
+            j = self._intern(tid)
+            targets = [self._intern(d) for d in deps]
+        except TypeError:
+            raise ValueError(f"task ids and dependencies must be strings or numbers (task '{tid}')")
+        self.ids.append(tid)
+        self.titles.append(title)
+        self.due_dates.append(due_date)
+        self.importance.append(importance)
+        self.hours.append(hours)
+        self.due.append(due_date_parsed.toordinal() if due_date_parsed is not None else NO_DUE_DATE)
+        self.row_names.append(j)
+        self.name_rows[j] = row
+        self.dep_targets.extend(targets)
+        self.dep_offsets.append(len(self.dep_targets))
+
+    def freeze(self):
+        """
+        Drops the interning dict once the table is complete.
+        """
+        self._index = None
+
+    # -- row accessors -----------------------------------------------------
+
+    def dependencies(self, i):
+        names = self.names
+        return [names[j] for j in self.dep_targets[self.dep_offsets[i]:self.dep_offsets[i + 1]]]
+
+    def due_date_parsed(self, i):
+        due = self.due[i]
+        return None if due == NO_DUE_DATE else date.fromordinal(due)
+
+    def representative_rows(self):
+        """
+        Row whose values each row's id-keyed factors use: duplicated ids take the
+        last row's values. None when ids are unique (every row represents itself).
+        """
+        if len(self.ids) == sum(1 for r in self.name_rows if r >= 0):
+            return None
+        name_rows = self.name_rows
+        return [name_rows[j] for j in self.row_names]
+
+    def outdegree(self):
+        """
+        Per name: number of dependency references to it (from any row).
+        """
+        counts = [0] * len(self.names)
+        for j in self.dep_targets:
+            counts[j] += 1
+        return counts
+
+    def known_outdegrees(self, counts):
+        """
+        Out-degrees > 0 of ids that have a row (the values min/max normalization runs over).
+        """
+        name_rows = self.name_rows
+        return [c for j, c in enumerate(counts) if c and name_rows[j] >= 0]
+
+    def graph(self):
+        """
+        (ids, adj) over distinct ids in first-occurrence order, edges from a
+        dependency to the tasks waiting on it (see scoring.find_cycle_groups).
+        adj is a CSRAdjacency.
+        """
+        names = self.names
+        node_of = array("q", [-1]) * len(names)
+        ids = []
+        for j in self.row_names:
+            if node_of[j] < 0:
+                node_of[j] = len(ids)
+                ids.append(names[j])
+
+        # counting sort of the (dependency -> dependent) edges by source node
+        targets, offsets, row_names = self.dep_targets, self.dep_offsets, self.row_names
+        degree = array("q", [0]) * (len(ids) + 1)
+        for k in range(len(targets)):
+            u = node_of[targets[k]]
+            if u >= 0:
+                degree[u + 1] += 1
+        for u in range(len(ids)):
+            degree[u + 1] += degree[u]
+        fill = array("q", degree)
+        edges = array("q", [0]) * degree[len(ids)]
+        for i in range(len(row_names)):
+            v = node_of[row_names[i]]
+            for k in range(offsets[i], offsets[i + 1]):
+                u = node_of[targets[k]]
+                if u >= 0:
+                    edges[fill[u]] = v
+                    fill[u] += 1
+        return ids, CSRAdjacency(degree, edges)
+
+
+class CSRAdjacency:
+    """
+    Read-only adjacency lists stored as offsets/targets arrays; adj[v] is the
+    neighbour slice of node v.
+    """
+
+    __slots__ = ("offsets", "targets")
+
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, v):
+        return self.targets[self.offsets[v]:self.offsets[v + 1]]
@@ -1,5 +1,49 @@
-from django.test import TestCase
-from .scoring import calculate_scores, detect_cycles
+import asyncio
+import json
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from importlib.util import find_spec
+from io import StringIO
+from random import Random
+from unittest import skipUnless
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from .admission import AdmissionQueue, Overloaded, run_analysis
+from .batch import analyze_batch
+from .cli import main as cli_main
+from .cache import LocalLRUCache, analysis_key, get_analysis_cache
+from .components import register_component, unregister_component
+from .dates import NO_DUE_DATE, due_ordinals, parse_cache_info, parse_date
+from .incremental import IncrementalAnalyzer
+from .explain import Lazy, get_explain_store
+from .forecast import forecast_scores
+from .formula import FormulaError, compile_formula
+from .instrumentation import NULL_TIMINGS, Timings, histograms
+from .models import Task
+from .optimizer import optimize_days
+from .planner import build_plan
+from .scoring import STRATEGY_PRESETS, calculate_scores, detect_cycles, find_cycle_groups, iter_scores
+from .results import LocalResultStore, ResultStore, SharedMemoryResultStore, SQLiteResultStore, pack, unpack
+from .simulation import simulate_scenarios
+from .serializers import MSGPACK_AVAILABLE, DecodeError, decode_analyze_request, dumps, loads
+from .snapshot import open_snapshot, write_snapshot
+from .table import TaskTable, _float_value, _int_value
+from .validation import MAX_SAMPLE_IDS, validate_tasks
 
 class ScoringTests(TestCase):
 
@@ -14,6 +58,14 @@ class ScoringTests(TestCase):
         self.assertIn('b', scores)
         self.assertTrue(scores['a'] > 0)
 
+    def test_cycle_detection_coerces_dependencies(self):
+        tasks = [
+            {"id": "a", "dependencies": "b, c"},
+            {"id": "b", "dependencies": ("a",)},
+            {"id": "c", "dependencies": 7},
+        ]
+        self.assertEqual(detect_cycles(tasks), [["a", "b"]])
+
     def test_cycle_detection(self):
         tasks = [
             {"id":"t1","dependencies":["t2"]},
@@ -31,3 +83,1644 @@ class ScoringTests(TestCase):
         t = res['analyzed_tasks'][0]
         self.assertEqual(t['importance'], 5)
         self.assertIn('score_breakdown', t)
+
+
+class EngineTests(TestCase):
+
+    def _tasks(self):
+        return [
+            {"id":"a","due_date":"2000-01-01","importance":5,"estimated_hours":2,"dependencies":[]},
+            {"id":"b","due_date":"2099-01-01","importance":10,"estimated_hours":1,"dependencies":["a"]},
+            {"id":"c","importance":"high","estimated_hours":-4,"dependencies":"a, b"},
+            {"id":"d","due_date":"not a date","importance":7,"estimated_hours":8,"dependencies":["zz"]},
+            {"id":"a","importance":3,"estimated_hours":0.5,"dependencies":["c"]},
+        ]
+
+    @skipUnless(find_spec("numpy"), "numpy not installed")
+    def test_numpy_engine_matches_python(self):
+        for strategy in STRATEGY_PRESETS:
+            py = calculate_scores(self._tasks(), strategy=strategy, engine="python")
+            np_ = calculate_scores(self._tasks(), strategy=strategy, engine="numpy")
+            self.assertEqual(py['analyzed_tasks'], np_['analyzed_tasks'])
+            self.assertEqual(np_['meta']['engine'], "numpy")
+
+    def test_auto_engine_small_input_uses_python(self):
+        res = calculate_scores(self._tasks())
+        self.assertEqual(res['meta']['engine'], "python")
+
+    def test_unknown_engine_rejected(self):
+        with self.assertRaises(ValueError):
+            calculate_scores(self._tasks(), engine="gpu")
+
+
+class CycleDetectionTests(TestCase):
+
+    def test_deep_chain_does_not_recurse(self):
+        n = 5000
+        tasks = [{"id": f"n{i}", "dependencies": [f"n{i+1}"]} for i in range(n - 1)]
+        tasks.append({"id": f"n{n-1}", "dependencies": ["n0"]})
+        groups = find_cycle_groups(tasks)
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(len(groups[0]['members']), n)
+        self.assertEqual(len(groups[0]['cycle']), n)
+
+    def test_cycle_group_reported_once(self):
+        tasks = [
+            {"id":"a","dependencies":["b","c"]},
+            {"id":"b","dependencies":["a","c"]},
+            {"id":"c","dependencies":["a"]},
+            {"id":"d","dependencies":["d"]},
+            {"id":"e","dependencies":["a"]},
+        ]
+        res = calculate_scores(tasks)
+        cycles = res['meta']['cycles']
+        self.assertEqual([c['members'] for c in cycles], [["a", "b", "c"], ["d"]])
+        self.assertEqual(cycles[1]['tasks'], ["d"])
+        self.assertTrue(set(cycles[0]['tasks']) <= {"a", "b", "c"})
+        warnings = {t['id']: t['warnings'] for t in res['analyzed_tasks']}
+        self.assertEqual(warnings['e'], [])
+        self.assertIn("cycle #1", warnings['c'][0])
+
+
+class TopKTests(TestCase):
+
+    def _tasks(self):
+        tasks = []
+        for i in range(40):
+            tasks.append({
+                "id": f"t{i}",
+                "due_date": "2099-01-01" if i % 3 else None,
+                "importance": (i * 7) % 10 + 1,
+                "estimated_hours": (i % 4) + 1,
+                "dependencies": [f"t{i-1}"] if i % 5 == 0 and i else [],
+            })
+        return tasks
+
+    def test_pages_match_full_ranking(self):
+        full = calculate_scores(self._tasks())['analyzed_tasks']
+        pages, cursor = [], None
+        while True:
+            res = calculate_scores(self._tasks(), top_k=6, cursor=cursor)
+            pages.extend(res['analyzed_tasks'])
+            cursor = res['meta']['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(pages, full)
+        self.assertEqual(res['meta']['total_tasks'], 40)
+
+    def test_invalid_top_k(self):
+        with self.assertRaises(ValueError):
+            calculate_scores(self._tasks(), top_k=0)
+        with self.assertRaises(ValueError):
+            calculate_scores(self._tasks(), cursor="3")
+
+    def test_analyze_endpoint_top_k(self):
+        resp = self.client.post(
+            "/api/tasks/analyze/",
+            data=json.dumps({"tasks": self._tasks(), "top_k": 3}),
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual(len(body['analyzed_tasks']), 3)
+        self.assertEqual(body['meta']['next_cursor'], "3")
+
+
+class StrategyComparisonTests(TestCase):
+
+    def _tasks(self):
+        return [
+            {
+                "id": f"t{i}",
+                "due_date": (date.today() + timedelta(days=(i * 11) % 50 - 10)).isoformat() if i % 4 else None,
+                "importance": (i * 7) % 10 + 1,
+                "estimated_hours": (i * 3) % 9,
+                "dependencies": [f"t{(i * 5) % 30}"] if i % 3 == 0 else [],
+            }
+            for i in range(30)
+        ]
+
+    def _check(self, engine):
+        result = calculate_scores(self._tasks(), engine=engine, compare="all")
+        self.assertEqual(result['meta']['comparison']['strategies'], list(STRATEGY_PRESETS))
+        for name in STRATEGY_PRESETS:
+            expected = calculate_scores(self._tasks(), strategy=name, engine="python")['analyzed_tasks']
+            ranked = sorted(result['analyzed_tasks'], key=lambda t: t['comparison'][name]['rank'])
+            self.assertEqual([t['id'] for t in ranked], [t['id'] for t in expected])
+            self.assertEqual([t['comparison'][name]['score'] for t in ranked], [t['score'] for t in expected])
+            self.assertEqual([t['comparison'][name]['tier'] for t in ranked], [t['tier'] for t in expected])
+
+    def test_ranks_match_single_strategy_runs(self):
+        self._check("python")
+
+    @skipUnless(find_spec("numpy"), "numpy not installed")
+    def test_numpy_ranks_match_single_strategy_runs(self):
+        self._check("numpy")
+
+    def test_custom_weight_vectors(self):
+        weights = {"urgency": 1, "importance": 1, "dependencies": 0, "effort": 0}
+        result = calculate_scores(self._tasks(), compare=["high_impact", {"name": "mine", "weights": weights}], top_k=3)
+        expected = calculate_scores(self._tasks(), custom_weights=weights)['analyzed_tasks']
+        self.assertEqual(len(result['analyzed_tasks']), 3)
+        for task in result['analyzed_tasks']:
+            self.assertEqual(set(task['comparison']), {"high_impact", "mine"})
+            self.assertEqual(expected[task['comparison']['mine']['rank'] - 1]['id'], task['id'])
+        self.assertEqual(result['meta']['comparison']['weights']['mine']['urgency'], 0.5)
+
+    def test_invalid_compare(self):
+        for compare in ([], ["nope"], ["high_impact", "high_impact"], [{"name": "x"}], "some"):
+            with self.assertRaises(ValueError):
+                calculate_scores(self._tasks(), compare=compare)
+
+    def test_endpoint(self):
+        response = Client().post(
+            "/api/tasks/analyze/", data=json.dumps({"tasks": self._tasks(), "compare": ["deadline_driven"]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("deadline_driven", response.json()['analyzed_tasks'][0]['comparison'])
+
+        response = Client().post(
+            "/api/tasks/analyze/?compare=nope", data="\n".join(json.dumps(t) for t in self._tasks()),
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class StreamingTests(TestCase):
+
+    def _tasks(self):
+        return [
+            {"id":"a","due_date":"2000-01-01","importance":5,"estimated_hours":2,"dependencies":["b"]},
+            {"id":"b","due_date":"2099-01-01","importance":10,"estimated_hours":1,"dependencies":["a"]},
+            {"id":"c","importance":"high","estimated_hours":3,"dependencies":[]},
+        ]
+
+    def _ndjson(self):
+        return "\n".join(json.dumps(t) for t in self._tasks()) + "\n"
+
+    def test_ndjson_request_matches_json_request(self):
+        resp = self.client.post(
+            "/api/tasks/analyze/?strategy=high_impact", data=self._ndjson(), content_type="application/x-ndjson"
+        )
+        self.assertEqual(resp.status_code, 200)
+        expected = calculate_scores(self._tasks(), strategy="high_impact")
+        self.assertEqual(resp.json(), expected)
+
+    def test_streaming_response_has_meta_trailer(self):
+        resp = self.client.post(
+            "/api/tasks/analyze/?stream=1",
+            data=json.dumps({"tasks": self._tasks()}),
+            content_type="application/json",
+        )
+        self.assertTrue(resp.streaming)
+        lines = [json.loads(l) for l in b"".join(resp.streaming_content).decode().splitlines()]
+        expected = calculate_scores(self._tasks())
+        self.assertEqual(lines[:-1], expected['analyzed_tasks'])
+        self.assertEqual(lines[-1], {"meta": expected['meta']})
+
+    def test_ndjson_invalid_line(self):
+        resp = self.client.post(
+            "/api/tasks/analyze/", data='{"id": "a"}\n{oops\n', content_type="application/x-ndjson"
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("line 2", resp.json()['error'])
+
+
+class TaskStoreTests(TestCase):
+
+    def _bulk(self, tasks, project="p1"):
+        return self.client.post(
+            "/api/tasks/store/bulk/",
+            data=json.dumps({"project": project, "tasks": tasks}),
+            content_type="application/json",
+        )
+
+    def test_bulk_upsert_creates_then_updates(self):
+        tasks = [
+            {"id":"a","title":"A","due_date":"2099-01-01","importance":7,"estimated_hours":3,"dependencies":[]},
+            {"id":"b","title":"B","importance":"bad","dependencies":"a"},
+        ]
+        body = self._bulk(tasks).json()
+        self.assertEqual((body['created'], body['updated']), (2, 0))
+        tasks[0]["importance"] = 9
+        tasks.append({"id":"c","dependencies":["a"]})
+        body = self._bulk(tasks).json()
+        self.assertEqual((body['created'], body['updated']), (1, 2))
+        stored = Task.objects.for_project("p1").get(external_id="a")
+        self.assertEqual(stored.importance, 9)
+        self.assertEqual(Task.objects.for_project("p1").get(external_id="b").dependencies, ["a"])
+
+    def test_stored_tasks_in_insertion_order(self):
+        self._bulk([{"id": tid} for tid in ("m", "z", "a")])
+        self._bulk([{"id": "b"}, {"id": "z", "importance": 9}])
+        qs = Task.objects.for_project("p1")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual([t["id"] for t in qs.iter_task_dicts()], ["m", "z", "a", "b"])
+        self.assertIn("ORDER BY", queries[0]["sql"])
+        self.assertEqual([t["id"] for t in qs.order_by("external_id").iter_task_dicts()], ["a", "b", "m", "z"])
+
+    def test_crud(self):
+        resp = self.client.post(
+            "/api/tasks/store/?project=p2",
+            data=json.dumps({"id":"x","title":"X","due_date":"2099-02-01"}),
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 201)
+        resp = self.client.patch(
+            "/api/tasks/store/x/?project=p2", data=json.dumps({"importance": 2}), content_type="application/json"
+        )
+        self.assertEqual(resp.json()['task']['importance'], 2)
+        self.assertEqual(resp.json()['task']['due_date'], "2099-02-01")
+        self.assertEqual(self.client.delete("/api/tasks/store/x/?project=p2").status_code, 200)
+        self.assertEqual(self.client.get("/api/tasks/store/x/?project=p2").status_code, 404)
+
+    def test_analyze_by_reference(self):
+        tasks = [
+            {"id":"a","title":"A","due_date":"2099-01-01","importance":7,"estimated_hours":3,"dependencies":[]},
+            {"id":"b","title":"B","due_date":"2000-01-01","importance":4,"estimated_hours":1,"dependencies":["a"]},
+        ]
+        self._bulk(tasks)
+        resp = self.client.post(
+            "/api/tasks/analyze/", data=json.dumps({"project": "p1"}), content_type="application/json"
+        )
+        self.assertEqual(resp.json(), calculate_scores(tasks))
+
+
+class TaskTableTests(TestCase):
+
+    def test_build_interns_ids_and_stores_dependencies_as_csr(self):
+        table, warnings = TaskTable.build([
+            {"id": "a", "dependencies": ["b", "x"], "estimated_hours": 3, "due_date": "2025-01-02"},
+            {"id": "b", "importance": 12},
+        ])
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.dependencies(0), ["b", "x"])
+        self.assertEqual(table.dependencies(1), [])
+        self.assertEqual(list(table.importance), [5, 10])
+        self.assertEqual(table.due_date_parsed(0), date(2025, 1, 2))
+        self.assertIsNone(table.due_date_parsed(1))
+        self.assertEqual(table.outdegree(), [0, 1, 1])
+        self.assertEqual(table.known_outdegrees(table.outdegree()), [1])
+        self.assertIn("dependency 'x' not found in provided tasks", warnings["a"])
+
+    def test_duplicate_ids_use_last_row(self):
+        table, _ = TaskTable.build([{"id": "a"}, {"id": "b"}, {"id": "a"}])
+        self.assertEqual(table.representative_rows(), [2, 1, 2])
+        ids, adj = table.graph()
+        self.assertEqual(ids, ["a", "b"])
+        self.assertEqual(len(adj), 2)
+
+    def test_graph_edges_point_from_dependency_to_dependent(self):
+        table, _ = TaskTable.build([{"id": "a", "dependencies": ["b"]}, {"id": "b", "dependencies": ["a", "zz"]}])
+        ids, adj = table.graph()
+        self.assertEqual([list(adj[v]) for v in range(len(ids))], [[1], [0]])
+
+
+class DateParsingTests(TestCase):
+
+    def test_formats(self):
+        self.assertEqual(parse_date("2025-03-01"), date(2025, 3, 1))
+        self.assertEqual(parse_date("2025-3-1"), date(2025, 3, 1))
+        self.assertEqual(parse_date("2025-03-01T23:30:00+02:00"), date(2025, 3, 1))
+        self.assertEqual(parse_date("2025-03-01T23:30:00Z"), date(2025, 3, 1))
+        self.assertEqual(parse_date(date(2025, 3, 1)), date(2025, 3, 1))
+        self.assertEqual(parse_date(1740787200), date(2025, 3, 1))
+        self.assertEqual(parse_date(1740787200000), date(2025, 3, 1))
+        self.assertEqual(parse_date("2024-02-29"), date(2024, 2, 29))
+        self.assertEqual(parse_date("2000-02-29"), date(2000, 2, 29))
+
+    def test_invalid_values_parse_to_none(self):
+        for value in ("2025-02-30", "2023-02-29", "1900-02-29", "2025-04-31", "0000-01-01", "0000-02-29", "soon", "", True, 1.5, ["2025-03-01"], 10 ** 30):
+            self.assertIsNone(parse_date(value), value)
+
+    def test_failures_are_memoized(self):
+        parse_date("definitely not a date")
+        hits = parse_cache_info().hits
+        self.assertIsNone(parse_date("definitely not a date"))
+        self.assertEqual(parse_cache_info().hits, hits + 1)
+
+    def test_bulk_ordinals_match_single_parser(self):
+        values = ["2025-03-01", None, "bad", "2025-03-01", 1740787200, ["x"], "2025-03-01T01:00:00-05:00"]
+        expected = [parse_date(v).toordinal() if parse_date(v) else NO_DUE_DATE for v in values]
+        self.assertEqual(list(due_ordinals(values)), expected)
+
+
+class IncrementalAnalyzerTests(TestCase):
+
+    def _random_task(self, rnd, tid, ids):
+        task = {"id": tid, "dependencies": [rnd.choice(ids + ["missing"]) for _ in range(rnd.randint(0, 2))]}
+        if rnd.random() < 0.9:
+            task["importance"] = rnd.choice([1, 4, 8, 10, 15, "high"])
+        if rnd.random() < 0.9:
+            task["estimated_hours"] = rnd.choice([0, 0.5, 2, 3, 8, 40, -1])
+        if rnd.random() < 0.8:
+            task["due_date"] = (date.today() + timedelta(days=rnd.randint(-60, 90))).isoformat()
+        elif rnd.random() < 0.5:
+            task["due_date"] = rnd.choice(["soon", "2025-02-30"])
+        return task
+
+    def _assert_equivalent(self, analyzer, top_k=None):
+        expected = calculate_scores(analyzer.tasks(), engine="python", top_k=top_k)
+        got = analyzer.result(top_k=top_k)
+        self.assertEqual(got['meta'].pop('engine'), "incremental")
+        expected['meta'].pop('engine')
+        self.assertEqual(got, expected)
+
+    def test_random_deltas_match_full_recompute(self):
+        for seed in range(25):
+            rnd = Random(seed)
+            ids = [f"t{i}" for i in range(rnd.randint(1, 30))]
+            analyzer = IncrementalAnalyzer([self._random_task(rnd, tid, ids) for tid in ids])
+            self._assert_equivalent(analyzer)
+            for step in range(10):
+                current = [t["id"] for t in analyzer.tasks()]
+                deletes = rnd.sample(current, min(len(current), rnd.randint(0, 2)))
+                remaining = [tid for tid in current if tid not in deletes]
+                updates = []
+                for tid in rnd.sample(remaining, min(len(remaining), rnd.randint(0, 2))):
+                    full = self._random_task(rnd, tid, current)
+                    keys = rnd.sample(sorted(full), rnd.randint(1, len(full)))
+                    updates.append(dict({k: full[k] for k in keys}, id=tid))
+                inserts = [self._random_task(rnd, f"n{seed}_{step}_{i}", current) for i in range(rnd.randint(0, 2))]
+                analyzer.apply(inserts=inserts, updates=updates, deletes=deletes)
+                self._assert_equivalent(analyzer)
+            self._assert_equivalent(analyzer, top_k=3)
+
+    def test_single_edit_rescores_only_affected(self):
+        tasks = [{"id": f"t{i}", "estimated_hours": 1 + i % 3, "dependencies": ["t0"] if i % 2 else []} for i in range(20)]
+        analyzer = IncrementalAnalyzer(tasks)
+        stats = analyzer.apply(updates=[{"id": "t4", "importance": 9}])
+        self.assertEqual(stats, {"rescored": 1, "rescaled": False, "cycles_recomputed": False})
+        stats = analyzer.apply(updates=[{"id": "t5", "estimated_hours": 100}])
+        self.assertTrue(stats['rescaled'])
+        self._assert_equivalent(analyzer)
+
+    def test_invalid_due_date_warning_order(self):
+        # a task whose only warning is due_date_invalid is listed in input order
+        tasks = [{"id": "a", "importance": "high"}, {"id": "b", "due_date": "soon"}, {"id": "c", "importance": 15}]
+        analyzer = IncrementalAnalyzer(tasks)
+        self._assert_equivalent(analyzer)
+        summary = calculate_scores(tasks)['meta']['warnings_summary']
+        self.assertEqual([w['task_id'] for w in summary], ["a", "b", "c"])
+
+    def test_invalid_delta_rejected(self):
+        analyzer = IncrementalAnalyzer([{"id": "a"}])
+        with self.assertRaises(ValueError):
+            analyzer.apply(inserts=[{"id": "a"}])
+        with self.assertRaises(ValueError):
+            analyzer.apply(deletes=["zz"])
+
+
+class AnalysisCacheTests(TestCase):
+
+    def setUp(self):
+        get_analysis_cache().clear()
+
+    def _post(self, client, payload):
+        return client.post("/api/tasks/analyze/", data=payload, content_type="application/json")
+
+    def test_identical_payloads_hit_cache(self):
+        first = self._post(self.client, '{"tasks": [{"id": "a", "importance": 7}], "strategy": "high_impact"}')
+        second = self._post(self.client, '{"strategy":"high_impact","tasks":[{"importance":7,"id":"a"}]}')
+        self.assertEqual(first.content, second.content)
+        stats = self.client.get("/api/tasks/cache/stats/").json()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_suggest_is_scoped_per_client(self):
+        alice, bob = Client(HTTP_X_CLIENT_TOKEN="alice"), Client()
+        session = SessionStore()
+        session.create()
+        bob.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        self._post(alice, json.dumps({"tasks": [{"id": "alice-task"}]}))
+        self._post(bob, json.dumps({"tasks": [{"id": "bob-task"}]}))
+        self.assertEqual(alice.get("/api/tasks/suggest/").json()['suggested_tasks'][0]['id'], "alice-task")
+        self.assertEqual(bob.get("/api/tasks/suggest/").json()['suggested_tasks'][0]['id'], "bob-task")
+        self.assertEqual(Client().get("/api/tasks/suggest/").status_code, 400)
+
+    def test_only_analyses_start_a_session(self):
+        # a cookie-keeping client without a token, like the bundled UI
+        browser = Client()
+        self.assertEqual(browser.get("/api/tasks/suggest/").status_code, 400)
+        self.assertEqual(browser.get("/api/tasks/a/explain/").status_code, 404)
+        self.assertEqual(Session.objects.count(), 0)
+        response = self._post(browser, json.dumps({"tasks": [{"id": "a"}, {"id": "b", "importance": 9}]}))
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(browser.get("/api/tasks/suggest/").json()['suggested_tasks'][0]['id'], "b")
+        self._post(browser, json.dumps({"tasks": [{"id": "c"}]}))
+        self.assertEqual(Session.objects.count(), 1)
+        self.assertEqual(browser.get("/api/tasks/suggest/").json()['suggested_tasks'][0]['id'], "c")
+
+    def test_later_pages_keep_the_top_suggestion(self):
+        tasks = [{"id": f"t{i}", "importance": 1 + i % 10, "estimated_hours": 1 + i % 4} for i in range(12)]
+        ranked = [t["id"] for t in calculate_scores(tasks)["analyzed_tasks"]]
+        for path in ("/api/tasks/analyze/", "/api/tasks/async/analyze/"):
+            client = Client(HTTP_X_CLIENT_TOKEN="pages" + path)
+            for body in ({"top_k": 5}, {"top_k": 5, "cursor": "5"}, {"fields": ["id"]}, {"top_k": 5, "cursor": "5"}):
+                response = client.post(path, data=json.dumps(dict(body, tasks=tasks)), content_type="application/json")
+                self.assertEqual(response.status_code, 200)
+                suggested = [t["id"] for t in client.get("/api/tasks/suggest/").json()["suggested_tasks"]]
+                self.assertEqual(suggested, ranked[:3], msg=(path, body))
+            self.assertIn("explanation", client.get("/api/tasks/suggest/").json()["suggested_tasks"][0])
+
+    def test_key_depends_on_date(self):
+        tasks = [{"id": "a"}]
+        self.assertNotEqual(
+            analysis_key(tasks, "smart_balance", None, today=date(2025, 1, 1)),
+            analysis_key(tasks, "smart_balance", None, today=date(2025, 1, 2)),
+        )
+
+    def test_lru_eviction(self):
+        lru = LocalLRUCache(max_entries=2, max_bytes=10)
+        lru.set("a", b"1234")
+        lru.set("b", b"1234")
+        lru.get("a")
+        lru.set("c", b"1234")
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("a"), b"1234")
+        lru.set("d", b"12345678")
+        self.assertEqual(len(lru), 1)
+        self.assertLessEqual(lru.nbytes, 10)
+
+
+class BatchAnalysisTests(TestCase):
+
+    def setUp(self):
+        self.projects = {
+            f"p{i}": [{"id": f"t{j}", "importance": (i + j) % 10 + 1, "dependencies": [f"t{j - 1}"] if j else []} for j in range(i + 1)]
+            for i in range(12)
+        }
+
+    def test_matches_single_project_analysis(self):
+        for workers in (1, 2):
+            results, meta = analyze_batch(self.projects, top_k=3, workers=workers, chunk_tasks=10)
+            self.assertEqual(list(results), list(self.projects))
+            self.assertEqual(meta["failed"], 0)
+            for name, tasks in self.projects.items():
+                self.assertEqual(results[name], calculate_scores(tasks, top_k=3))
+
+    def test_as_of(self):
+        results, _ = analyze_batch(self.projects, workers=1, as_of="2026-03-01")
+        for name, tasks in self.projects.items():
+            self.assertEqual(results[name], calculate_scores(tasks, as_of="2026-03-01"))
+        with self.assertRaises(ValueError):
+            analyze_batch(self.projects, workers=1, as_of="2026-02-30")
+
+    def test_errors_are_isolated_per_project(self):
+        projects = [
+            {"name": "good", "tasks": [{"id": "a"}]},
+            {"name": "bad", "tasks": [{"id": "a"}, "not a task"]},
+            {"name": "worse", "tasks": "nope"},
+        ]
+        results, meta = analyze_batch(projects, workers=2, chunk_tasks=1)
+        self.assertIn("analyzed_tasks", results["good"])
+        self.assertIn("error", results["bad"])
+        self.assertEqual(results["worse"], {"error": "tasks must be a list"})
+        self.assertEqual(meta["failed"], 2)
+
+    def test_duplicate_names_rejected(self):
+        with self.assertRaises(ValueError):
+            analyze_batch([{"name": "a", "tasks": []}, {"name": "a", "tasks": []}])
+
+    def test_endpoint(self):
+        response = Client().post(
+            "/api/tasks/batch/", data=json.dumps({"projects": self.projects, "top_k": 1, "workers": 2}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["meta"]["projects"], 12)
+        self.assertEqual(len(body["results"]["p5"]["analyzed_tasks"]), 1)
+
+        response = Client().post("/api/tasks/batch/", data=json.dumps({"projects": 3}), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_management_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("p1", "p2"):
+                with open(os.path.join(tmp, name + ".json"), "w") as f:
+                    json.dump(self.projects[name], f)
+            out = StringIO()
+            call_command("analyze_batch", tmp, "--workers", "1", stdout=out, stderr=StringIO())
+        results = json.loads(out.getvalue())["results"]
+        self.assertEqual(results["p2"], calculate_scores(self.projects["p2"]))
+
+
+class PlannerTests(TestCase):
+
+    def _tasks(self):
+        return [
+            {"id": "a", "estimated_hours": 3, "importance": 2},
+            {"id": "b", "estimated_hours": 1, "importance": 9, "dependencies": ["a"]},
+            {"id": "c", "estimated_hours": 5, "dependencies": ["a", "d"]},
+            {"id": "d", "estimated_hours": 1, "dependencies": ["c"]},
+            {"id": "e", "estimated_hours": 1, "importance": 10},
+            {"id": "f", "estimated_hours": 2, "dependencies": ["b", "c", "missing"]},
+        ]
+
+    def test_order_respects_dependencies_and_collapses_cycles(self):
+        result = build_plan(self._tasks())
+        plan = {entry["id"]: entry for entry in result["plan"]}
+        self.assertEqual([entry["id"] for entry in result["plan"]], ["a", "b", "c", "d", "e", "f"])
+        self.assertEqual(plan["c"]["cycle_ids"], [1])
+        self.assertEqual(result["meta"]["collapsed_nodes"], 1)
+        # a blocks b, c, d and f; c and d block each other and f
+        self.assertEqual(plan["a"]["transitive_blocks"], 4)
+        self.assertEqual(plan["c"]["transitive_blocks"], 2)
+        self.assertTrue(plan["a"]["transitive_blocks_exact"])
+        self.assertEqual(result["critical_path"], {"tasks": ["a", "c", "d", "f"], "total_hours": 11.0})
+        self.assertEqual(plan["f"]["earliest_start_hours"], 9.0)
+        self.assertEqual(plan["b"]["slack_hours"], 5.0)
+        self.assertEqual(plan["e"]["slack_hours"], 10.0)
+        self.assertFalse(plan["e"]["on_critical_path"])
+
+    def test_best_ranked_ready_task_goes_first(self):
+        tasks = [{"id": f"t{i}", "importance": i + 1} for i in range(5)]
+        ranking = [t["id"] for t in calculate_scores(tasks)["analyzed_tasks"]]
+        self.assertEqual([entry["id"] for entry in build_plan(tasks)["plan"]], ranking)
+
+    def test_random_graphs(self):
+        rnd = Random(5)
+        for _ in range(10):
+            n = rnd.randint(1, 200)
+            tasks = [
+                {"id": f"t{i}", "estimated_hours": rnd.randint(0, 5),
+                 "dependencies": [f"t{rnd.randrange(n)}" for _ in range(rnd.randint(0, 3))]}
+                for i in range(n)
+            ]
+            result = build_plan(tasks, top_k=n)
+            position = {entry["id"]: entry["position"] for entry in result["plan"]}
+            cycle_of = {tid: tuple(group["members"]) for group in find_cycle_groups(tasks) for tid in group["members"]}
+            for t in tasks:
+                for d in t["dependencies"]:
+                    if d != t["id"] and (d not in cycle_of or cycle_of.get(d) != cycle_of.get(t["id"])):
+                        self.assertLess(position[d], position[t["id"]])
+            self.assertEqual(len(result["plan"]), n)
+
+    def test_endpoint(self):
+        response = Client().post(
+            "/api/tasks/plan/", data=json.dumps({"tasks": self._tasks(), "top_k": 2}), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry["id"] for entry in response.json()["plan"]], ["a", "b"])
+
+        response = Client().post("/api/tasks/plan/", data=json.dumps({"tasks": "x"}), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_as_of(self):
+        tasks = [
+            {"id": "soon", "due_date": "2026-03-03", "importance": 3},
+            {"id": "later", "due_date": "2026-06-01", "importance": 6, "dependencies": ["soon"]},
+            {"id": "open", "importance": 7},
+        ]
+        for as_of in ("2026-03-01", "2026-05-30"):
+            expected = {t["id"]: (rank, t["score"]) for rank, t in enumerate(calculate_scores(tasks, as_of=as_of)["analyzed_tasks"], 1)}
+            plan = build_plan(tasks, as_of=as_of)
+            self.assertEqual({e["id"]: (e["rank"], e["score"]) for e in plan["plan"]}, expected)
+            self.assertEqual(plan["meta"]["as_of"], as_of)
+            response = self.client.post("/api/tasks/plan/", data=json.dumps({"tasks": tasks, "as_of": as_of}), content_type="application/json")
+            self.assertEqual(response.json(), json.loads(json.dumps(plan)))
+        self.assertNotIn("as_of", build_plan(tasks)["meta"])
+        response = self.client.post("/api/tasks/plan/", data=json.dumps({"tasks": tasks, "as_of": "soon"}), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class OptimizerTests(TestCase):
+
+    def _best_day(self, tasks, cap):
+        # brute force: every dependency-closed subset that fits the budget
+        scores = {t["id"]: t["score"] for t in calculate_scores(tasks)["analyzed_tasks"]}
+        ids = [t["id"] for t in tasks]
+        deps = {t["id"]: t["dependencies"] for t in tasks}
+        hours = {t["id"]: t["estimated_hours"] for t in tasks}
+        best = 0.0
+        for mask in range(1 << len(ids)):
+            chosen = {ids[i] for i in range(len(ids)) if mask >> i & 1}
+            if sum(hours[c] for c in chosen) <= cap and all(d in chosen for c in chosen for d in deps[c]):
+                best = max(best, sum(scores[c] for c in chosen))
+        return best
+
+    def test_exact_methods_match_brute_force(self):
+        rnd = Random(13)
+        for case in range(30):
+            n = rnd.randint(1, 9)
+            max_deps = 1 if case % 2 else 2
+            tasks = [
+                {"id": f"t{i}", "importance": rnd.randint(1, 10), "estimated_hours": rnd.choice([0.25, 0.5, 1, 2, 3, 5]),
+                 "dependencies": sorted({f"t{rnd.randrange(i)}" for _ in range(rnd.randint(0, max_deps))}) if i else []}
+                for i in range(n)
+            ]
+            cap = rnd.choice([1, 2.5, 4, 8])
+            expected = self._best_day(tasks, cap)
+            methods = ("auto", "bnb", "dp") if max_deps == 1 else ("auto", "bnb")
+            for method in methods:
+                result = optimize_days(tasks, cap, method=method, time_budget_ms=5000)
+                self.assertTrue(result["meta"]["optimal"])
+                self.assertAlmostEqual(result["meta"]["total_score"], expected, places=3, msg=(case, method))
+            greedy = optimize_days(tasks, cap, method="greedy")["meta"]["total_score"]
+            self.assertLessEqual(greedy, expected + 1e-3)
+
+    def test_days_respect_budgets_and_dependencies(self):
+        rnd = Random(3)
+        tasks = [
+            {"id": f"t{i}", "importance": rnd.randint(1, 10), "estimated_hours": rnd.choice([0.5, 1, 2, 4]),
+             "dependencies": [f"t{rnd.randrange(i)}" for _ in range(rnd.randint(0, 3))] if i else []}
+            for i in range(60)
+        ]
+        tasks.append({"id": "x", "estimated_hours": 1, "dependencies": ["y"]})
+        tasks.append({"id": "y", "estimated_hours": 1, "dependencies": ["x"]})
+        budgets = [4, 6, 0, 3.5]
+        result = optimize_days(tasks, budgets)
+        deps = {t["id"]: t["dependencies"] for t in tasks}
+        day_of = {}
+        for day in result["days"]:
+            self.assertLessEqual(day["used_hours"], day["budget_hours"])
+            for entry in day["tasks"]:
+                day_of[entry["id"]] = day["day"]
+        self.assertEqual(result["days"][2]["tasks"], [])
+        self.assertEqual(day_of.get("x"), day_of.get("y"))
+        for tid, day in day_of.items():
+            for d in deps[tid]:
+                self.assertLessEqual(day_of[d], day)
+        self.assertEqual(len(day_of) + len(result["unscheduled"]), len(tasks))
+        self.assertEqual(result["meta"]["methods_used"], ["bnb", "bnb", "none", "bnb"])
+
+    def test_as_of(self):
+        tasks = [
+            {"id": "soon", "due_date": "2026-03-03", "importance": 3, "estimated_hours": 2},
+            {"id": "later", "due_date": "2026-06-01", "importance": 6, "estimated_hours": 2},
+        ]
+        result = optimize_days(tasks, 2, days=2, as_of="2026-03-01")
+        self.assertEqual([d["date"] for d in result["days"]], ["2026-03-01", "2026-03-02"])
+        self.assertEqual(result["meta"]["as_of"], "2026-03-01")
+        scores = {t["id"]: t["score"] for t in calculate_scores(tasks, as_of="2026-03-01")["analyzed_tasks"]}
+        for day in result["days"]:
+            for entry in day["tasks"]:
+                self.assertEqual(entry["score"], scores[entry["id"]])
+        response = self.client.post("/api/tasks/optimize/", data=json.dumps({"tasks": tasks, "hours_per_day": 2, "as_of": "2026-03-01"}), content_type="application/json")
+        self.assertEqual(response.json()["days"][0]["date"], "2026-03-01")
+        with self.assertRaises(ValueError):
+            optimize_days(tasks, 2, as_of="March")
+
+    def test_beats_greedy_by_score(self):
+        # one 4-hour task outscores each quick one, but four quick ones beat it
+        tasks = [{"id": "big", "importance": 10, "estimated_hours": 4}]
+        tasks += [{"id": f"q{i}", "importance": 8, "estimated_hours": 1} for i in range(4)]
+        weights = {"importance": 1}
+        best = optimize_days(tasks, 4, custom_weights=weights)
+        baseline = optimize_days(tasks, 4, custom_weights=weights, method="score_greedy")
+        self.assertEqual([t["id"] for t in baseline["days"][0]["tasks"]], ["big"])
+        self.assertEqual(sorted(t["id"] for t in best["days"][0]["tasks"]), ["q0", "q1", "q2", "q3"])
+        self.assertGreater(best["meta"]["total_score"], baseline["meta"]["total_score"])
+
+    def test_invalid_options(self):
+        tasks = [{"id": "a"}, {"id": "b", "dependencies": ["a"]}, {"id": "c", "dependencies": ["a", "b"]}]
+        for kwargs in (
+            {"hours_per_day": -1}, {"hours_per_day": 25}, {"hours_per_day": "6"}, {"hours_per_day": []},
+            {"hours_per_day": 6, "days": 0}, {"hours_per_day": [6, 6], "days": 3},
+            {"hours_per_day": 6, "method": "magic"}, {"hours_per_day": 6, "method": "dp"},
+            {"hours_per_day": 6, "time_budget_ms": 0},
+        ):
+            with self.assertRaises(ValueError, msg=kwargs):
+                optimize_days(tasks, **kwargs)
+
+    def test_endpoint(self):
+        body = {"tasks": [{"id": "a", "estimated_hours": 2}, {"id": "b", "estimated_hours": 3}], "hours_per_day": 3, "days": 2}
+        response = Client().post("/api/tasks/optimize/", data=json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["days"]), 2)
+        self.assertEqual(data["unscheduled"], [])
+
+        del body["hours_per_day"]
+        response = Client().post("/api/tasks/optimize/", data=json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class InstrumentationTests(TestCase):
+
+    def test_nested_phases_are_exclusive(self):
+        timings = Timings()
+        with timings.phase("score"):
+            with timings.phase("sort"):
+                time.sleep(0.02)
+        self.assertGreaterEqual(timings.phases["sort"], 0.02)
+        self.assertLess(timings.phases["score"], 0.01)
+        self.assertEqual(NULL_TIMINGS.phase("x").__enter__(), NULL_TIMINGS.phase("y").__enter__())
+
+    def test_debug_timing_in_meta(self):
+        records = []
+        tasks = [{"id": "a", "dependencies": ["b"]}, {"id": "b", "dependencies": ["a"]}, {"id": "c", "importance": "x"}]
+        with patch("tasks.instrumentation._sink", records.append):
+            response = Client().post(
+                "/api/tasks/analyze/", data=json.dumps({"tasks": tasks, "debug_timing": True}), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        timings = response.json()["meta"]["timings"]
+        self.assertEqual(timings["counts"], {"tasks": 3, "edges": 2, "cycles": 1, "warnings": 1})
+        for phase in ("decode", "normalize", "score", "sort", "cycles", "output"):
+            self.assertIn(phase, timings["phases_ms"])
+        self.assertIn("encode;dur=", response["Server-Timing"])
+        self.assertEqual(records[0]["endpoint"], "analyze")
+        self.assertIn("encode", records[0]["phases_ms"])
+
+        # without the flag: no timings, and the cached body never carries them
+        response = Client().post("/api/tasks/analyze/", data=json.dumps({"tasks": tasks}), content_type="application/json")
+        self.assertNotIn("timings", response.json()["meta"])
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_numpy_engine_and_stream_trailer(self):
+        lines = "\n".join(json.dumps({"id": f"t{i}", "importance": i % 10 + 1}) for i in range(20))
+        response = Client().post(
+            "/api/tasks/analyze/?stream=1&debug_timing=1", data=lines, content_type="application/x-ndjson"
+        )
+        trailer = json.loads(b"".join(response.streaming_content).decode().strip().split("\n")[-1])
+        self.assertEqual(trailer["meta"]["timings"]["counts"]["tasks"], 20)
+        if find_spec("numpy") is not None:
+            timings = Timings()
+            iter_scores([{"id": "a"}, {"id": "b"}], engine="numpy", timings=timings)
+            self.assertIn("sort", timings.phases)
+
+    def test_prometheus_endpoint(self):
+        histograms.clear()
+        Client().post("/api/tasks/analyze/", data=json.dumps({"tasks": [{"id": "a"}]}), content_type="application/json")
+        Client().get("/api/tasks/analyze/")
+        response = Client().get("/api/tasks/metrics/")
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn("# TYPE tasks_request_duration_seconds histogram", text)
+        self.assertIn('tasks_request_duration_seconds_count{method="POST",status="2xx",view="analyze_tasks"} 1', text)
+        self.assertIn('tasks_request_duration_seconds_bucket{method="GET",status="4xx",view="analyze_tasks",le="+Inf"} 1', text)
+
+        response = Client(REMOTE_ADDR="10.0.0.5").get("/api/tasks/metrics/")
+        self.assertEqual(response.status_code, 403)
+
+
+class SerializerTests(TestCase):
+
+    def test_dumps_matches_stdlib(self):
+        from django.core.serializers.json import DjangoJSONEncoder
+
+        obj = {
+            "a": [1, 2.5, "x", None, True],
+            "when": datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            "day": date(2025, 1, 2),
+            "amount": Decimal("1.50"),
+            "big": 2 ** 70,
+        }
+        self.assertEqual(json.loads(dumps(obj)), json.loads(json.dumps(obj, cls=DjangoJSONEncoder)))
+        self.assertEqual(loads(b'{"x": [1, "y"]}'), {"x": [1, "y"]})
+        with self.assertRaises(DecodeError):
+            loads(b"{not json")
+
+    def test_decode_analyze_request(self):
+        payload = decode_analyze_request(b'{"tasks": [{"id": "a"}], "top_k": 5, "extra": 1}')
+        self.assertEqual(payload["tasks"], [{"id": "a"}])
+        self.assertEqual((payload["top_k"], payload["strategy"], payload["hoist_weights"]), (5, "smart_balance", False))
+        self.assertTrue(payload["has_tasks"])
+        self.assertEqual(decode_analyze_request(b'{"tasks": {"tasks": []}}')["tasks"], [])
+        self.assertFalse(decode_analyze_request(b"")["has_tasks"])
+        for body in (b'[1, 2]', b'{"tasks": "x"}', b'{"top_k": true}', b'{"strategy": 3}', b'{"tasks": {"x": 1}}'):
+            with self.assertRaises(ValueError, msg=body):
+                decode_analyze_request(body)
+
+    def test_hoisted_weights(self):
+        tasks = [{"id": "a", "importance": 9}, {"id": "b", "dependencies": ["a"]}]
+        plain = calculate_scores(tasks)
+        hoisted = calculate_scores(tasks, hoist_weights=True)
+        self.assertEqual(hoisted["meta"]["weights"], plain["analyzed_tasks"][0]["score_breakdown"]["weights"])
+        for a, b in zip(plain["analyzed_tasks"], hoisted["analyzed_tasks"]):
+            self.assertNotIn("weights", b["score_breakdown"])
+            self.assertEqual(dict(b, score_breakdown=dict(b["score_breakdown"], weights=a["score_breakdown"]["weights"])), a)
+
+        response = Client().post(
+            "/api/tasks/analyze/", data=json.dumps({"tasks": tasks, "hoist_weights": True}), content_type="application/json"
+        )
+        self.assertIn("weights", response.json()["meta"])
+
+    def test_endpoint_errors(self):
+        for body in ("{not json", "[1]", json.dumps({"tasks": [], "top_k": "3"}), json.dumps({"strategy": "x"})):
+            response = Client().post("/api/tasks/analyze/", data=body, content_type="application/json")
+            self.assertEqual(response.status_code, 400, body)
+        response = Client().post("/api/tasks/analyze/", data="{not json", content_type="application/json")
+        self.assertEqual(response.json()["error"], "invalid json")
+
+    @skipUnless(MSGPACK_AVAILABLE, "msgspec or msgpack not installed")
+    def test_msgpack_output(self):
+        response = Client().post(
+            "/api/tasks/analyze/?format=msgpack", data=json.dumps({"tasks": [{"id": "a"}]}), content_type="application/json"
+        )
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        if find_spec("msgspec") is not None:
+            import msgspec
+
+            decoded = msgspec.msgpack.decode(response.content)
+        else:
+            import msgpack
+
+            decoded = msgpack.unpackb(response.content)
+        self.assertEqual(decoded["analyzed_tasks"][0]["id"], "a")
+
+    @skipUnless(not MSGPACK_AVAILABLE, "a MessagePack library is installed")
+    def test_msgpack_unavailable(self):
+        response = Client().post(
+            "/api/tasks/analyze/", data=json.dumps({"tasks": []}), content_type="application/json",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 406)
+
+
+class AsyncAnalysisTests(TestCase):
+
+    TASKS = [
+        {"id": "a", "importance": 9, "due_date": "2099-01-01"},
+        {"id": "b", "dependencies": ["a"], "estimated_hours": 1},
+        {"id": "c", "dependencies": ["d"]},
+        {"id": "d", "dependencies": ["c"]},
+    ]
+
+    def _queue(self, workers=1, queue=0, inline_max_bytes=0):
+        executor = ThreadPoolExecutor(max_workers=workers)
+        self.addCleanup(executor.shutdown)
+        return AdmissionQueue(executor, workers, queue, retry_after=3, inline_max_bytes=inline_max_bytes)
+
+    def _post(self, url, body, client=None):
+        client = client or Client(HTTP_X_CLIENT_TOKEN="async-test")
+        return client.post(url, data=json.dumps(body), content_type="application/json")
+
+    def test_matches_sync_view(self):
+        body = {"tasks": self.TASKS, "strategy": "deadline_driven", "top_k": 3}
+        expected = self._post("/api/tasks/analyze/", body).json()
+        for inline in (64 * 1024, 0):
+            with patch("tasks.views.get_admission_queue", return_value=self._queue(inline_max_bytes=inline)):
+                response = self._post("/api/tasks/async/analyze/", body)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected)
+        suggestion = Client(HTTP_X_CLIENT_TOKEN="async-test").get("/api/tasks/async/suggest/").json()
+        self.assertEqual([t["id"] for t in suggestion["suggested_tasks"]], [t["id"] for t in expected["analyzed_tasks"]])
+
+    def test_project_and_errors(self):
+        self._post("/api/tasks/store/bulk/", {"project": "async", "tasks": self.TASKS})
+        with patch("tasks.views.get_admission_queue", return_value=self._queue()):
+            response = self._post("/api/tasks/async/analyze/", {"project": "async"})
+            self.assertEqual(len(response.json()["analyzed_tasks"]), 4)
+            for body in ("{not json", json.dumps({"strategy": "x"}), json.dumps({"tasks": [], "top_k": "3"})):
+                response = Client().post("/api/tasks/async/analyze/", data=body, content_type="application/json")
+                self.assertEqual(response.status_code, 400, body)
+        self.assertEqual(Client().get("/api/tasks/async/analyze/").status_code, 400)
+
+    def test_full_queue_returns_503(self):
+        queue = self._queue()
+        queue.in_flight = queue.capacity
+        with patch("tasks.views.get_admission_queue", return_value=queue):
+            response = self._post("/api/tasks/async/analyze/", {"tasks": self.TASKS})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
+        self.assertEqual(queue.stats()["rejected"], 1)
+
+    def test_cancelled_request_leaves_the_queue(self):
+        queue = self._queue(workers=1, queue=1)
+        gate, ran = threading.Event(), []
+
+        async def scenario():
+            running = asyncio.ensure_future(queue.run(gate.wait, 5))
+            waiting = asyncio.ensure_future(queue.run(ran.append, "waiting"))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(Overloaded):
+                await queue.run(ran.append, "rejected")
+            waiting.cancel()  # what Django does when the client disconnects
+            with self.assertRaises(asyncio.CancelledError):
+                await waiting
+            self.assertEqual(queue.stats()["in_flight"], 1)
+            gate.set()
+            await running
+
+        asyncio.run(scenario())
+        self.assertEqual(ran, [])
+        self.assertEqual(queue.stats()["in_flight"], 0)
+
+    def test_process_executor(self):
+        executor = ProcessPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        queue = AdmissionQueue(executor, 1, 0)
+        body = json.dumps({"tasks": self.TASKS}).encode()
+        kind, encoded, suggestion = asyncio.run(run_analysis(queue, body))
+        self.assertEqual(loads(encoded)["analyzed_tasks"], calculate_scores(self.TASKS)["analyzed_tasks"])
+        self.assertEqual(len(loads(suggestion)["suggested_tasks"]), 3)
+
+
+class ScoringComponentTests(TestCase):
+
+    TASKS = [
+        {"id": "a", "importance": 9, "estimated_hours": 0.5, "due_date": "2000-01-01"},
+        {"id": "b", "importance": 3, "estimated_hours": 6, "dependencies": ["a"]},
+        {"id": "c", "importance": 6, "estimated_hours": 1, "due_date": "2999-01-01", "dependencies": ["a", "b"]},
+        {"id": "d", "estimated_hours": 0},
+    ]
+
+    def test_formula_compilation(self):
+        formula = compile_formula("clamp(1 - days / 30) if has_due_date else 0")
+        self.assertIs(compile_formula("clamp(1 - days / 30) if has_due_date else 0"), formula)
+        self.assertEqual(formula.variables, ("has_due_date", "days"))
+        self.assertEqual(formula.python(1.0, 15.0), 0.5)
+        self.assertEqual(compile_formula("hours / 0").python(2.0), float("inf"))
+        self.assertNotEqual(compile_formula("log(hours - 3)").python(1.0), compile_formula("0").python())
+        for text in (
+            "", "x + 1", "hours.real", "__import__('os')", "min", "min(hours)", "exp(hours, 2)", "[hours]",
+            "hours[0]", "lambda: 1", "'a'", "hours // 2", "clamp(x=1)", "1e999", "1 +", "a" * 600,
+        ):
+            with self.assertRaises(FormulaError, msg=text):
+                compile_formula(text)
+
+    def test_formula_components(self):
+        components = {"urgency": "1 if 0 <= days <= 7 else 0", "quick": {"formula": "-hours", "normalize": "minmax"}}
+        result = calculate_scores(
+            self.TASKS, custom_weights={"urgency": 0.5, "quick": 0.5}, components=components, engine="python"
+        )
+        self.assertEqual(result["meta"]["components"], {"urgency": "1 if 0 <= days <= 7 else 0", "quick": "-hours"})
+        by_id = {t["id"]: t for t in result["analyzed_tasks"]}
+        self.assertEqual(list(by_id["a"]["score_breakdown"])[:5], ["urgency", "importance", "effort", "dependencies", "quick"])
+        self.assertEqual(by_id["a"]["score_breakdown"]["urgency"], 0.0)  # past due, outside 0..7
+        self.assertEqual(by_id["d"]["score_breakdown"]["quick"], 1.0)
+        self.assertEqual(by_id["b"]["score_breakdown"]["quick"], 0.0)
+        self.assertEqual(by_id["d"]["score"], 0.5)
+
+        for bad in ({"weights": "1"}, {"Bad-Name": "1"}, {"x": "nope"}, {"x": {"formula": "1", "normalize": "none"}}, []):
+            with self.assertRaises(ValueError, msg=bad):
+                calculate_scores(self.TASKS, components=bad)
+
+    @skipUnless(find_spec("numpy") is not None, "numpy not installed")
+    def test_engines_agree_on_formulas(self):
+        rnd = Random(5)
+        tasks = [
+            {
+                "id": f"t{i % 180}",
+                "importance": rnd.randint(1, 10),
+                "estimated_hours": rnd.choice([0, 0.5, 2, 3, 8]),
+                "due_date": rnd.choice([None, "2000-01-01", f"2099-0{rnd.randint(1, 9)}-01", date.today().isoformat()]),
+                "dependencies": [f"t{rnd.randrange(200)}" for _ in range(rnd.randint(0, 3))],
+            }
+            for i in range(200)
+        ]
+        components = {
+            "quick": "exp(-hours / 4) if importance >= 7 else 0",
+            "urgency": "clamp(1 - days / 30)",
+            "load": {"formula": "blocks ** 0.5 + dependency_count - (days < 0) + max(hours, 3, 1) / hours", "normalize": "minmax"},
+            "odd": "log(hours - 3) + sqrt(2 - hours) + (-1) ** hours + (has_due_date and not blocks) - abs(-days)",
+        }
+        weights = {"urgency": 0.3, "importance": 0.2, "quick": 0.2, "load": 0.2, "odd": 0.1}
+        results = [
+            calculate_scores(
+                tasks, custom_weights=weights, components=components, engine=engine,
+                compare=["fastest_wins", {"name": "odd_only", "weights": {"odd": 1, "load": 1}}],
+            )
+            for engine in ("python", "numpy")
+        ]
+        self.assertEqual(results[0]["analyzed_tasks"], results[1]["analyzed_tasks"])
+
+    def test_registered_component(self):
+        register_component("title_length", lambda columns: [len(t) for t in columns.table.titles], normalize="minmax")
+        self.addCleanup(unregister_component, "title_length")
+        tasks = [{"id": "a", "title": "short"}, {"id": "b", "title": "a much longer title"}]
+        plain = calculate_scores(tasks)
+        self.assertNotIn("title_length", plain["analyzed_tasks"][0]["score_breakdown"])
+        for engine in ("python", "numpy") if find_spec("numpy") is not None else ("python",):
+            result = calculate_scores(tasks, custom_weights={"title_length": 1}, engine=engine)
+            self.assertEqual([(t["id"], t["score"]) for t in result["analyzed_tasks"]], [("b", 1.0), ("a", 0.0)])
+        with self.assertRaises(ValueError):
+            unregister_component("urgency")
+
+    def test_endpoint(self):
+        body = {"tasks": self.TASKS, "weights": {"quick": 1}, "components": {"quick": "hours <= 1"}}
+        response = Client().post("/api/tasks/analyze/", data=json.dumps(body), content_type="application/json")
+        self.assertEqual([t["score"] for t in response.json()["analyzed_tasks"]], [1.0, 1.0, 1.0, 0.0])
+        body["components"] = {"quick": "open('x')"}
+        response = Client().post("/api/tasks/analyze/", data=json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("unknown function", response.json()["error"])
+
+
+class ExplainTests(TestCase):
+
+    TASKS = [
+        {"id": "a", "title": "A", "importance": 9, "estimated_hours": 0.5, "due_date": "2000-01-01", "dependencies": ["b"]},
+        {"id": "b", "title": "B", "importance": 3, "estimated_hours": 6, "dependencies": ["a"]},
+        {"id": 7, "title": "C", "importance": 6, "estimated_hours": 1, "due_date": "2999-01-01", "dependencies": ["a", "x"]},
+    ]
+
+    def setUp(self):
+        get_analysis_cache().clear()
+        get_explain_store().clear()
+
+    def _analyze(self, client, **options):
+        body = json.dumps(dict(options, tasks=self.TASKS))
+        return client.post("/api/tasks/analyze/", data=body, content_type="application/json")
+
+    def test_fields(self):
+        full = calculate_scores(self.TASKS)["analyzed_tasks"]
+        sparse = calculate_scores(self.TASKS, fields=["score", "tier"])["analyzed_tasks"]
+        self.assertEqual(sparse, [{"id": t["id"], "score": t["score"], "tier": t["tier"]} for t in full])
+        sparse = calculate_scores(self.TASKS, fields="warnings, title", compare=["high_impact"])["analyzed_tasks"]
+        self.assertEqual(list(sparse[0]), ["id", "title", "warnings"])
+        with_comparison = calculate_scores(self.TASKS, fields=["comparison"], compare=["high_impact"])
+        self.assertEqual(list(with_comparison["analyzed_tasks"][0]), ["id", "comparison"])
+        for bad in (["score", "nope"], [1], {"score": 1}):
+            with self.assertRaises(ValueError, msg=bad):
+                calculate_scores(self.TASKS, fields=bad)
+
+    def test_lazy_explanations(self):
+        eager = calculate_scores(self.TASKS)
+        lazy = calculate_scores(self.TASKS, lazy=True)
+        row = next(t for t in lazy["analyzed_tasks"] if t["id"] == "a")
+        self.assertIsInstance(row["explanation"], Lazy)
+        self.assertIn("Past due", str(row["explanation"]))
+        self.assertEqual(len(row["warnings"]), 1)
+        self.assertEqual(lazy, eager)
+        self.assertEqual(dumps(lazy), dumps(eager))
+        restored = pickle.loads(pickle.dumps(row))
+        self.assertIs(type(restored["explanation"]), str)
+        self.assertEqual(restored["warnings"], row["warnings"])
+
+    def test_explain_endpoint(self):
+        client = Client(HTTP_X_CLIENT_TOKEN="explain")
+        self.assertEqual(client.get("/api/tasks/a/explain/").status_code, 404)
+        response = self._analyze(client, fields=["id", "score"], strategy="high_impact")
+        self.assertEqual(response.status_code, 200)
+        ranked = response.json()["analyzed_tasks"]
+        self.assertEqual(list(ranked[0]), ["id", "score"])
+
+        full = {t["id"]: t for t in calculate_scores(self.TASKS, strategy="high_impact")["analyzed_tasks"]}
+        for rank, task in enumerate(ranked, start=1):
+            detail = client.get(f"/api/tasks/{task['id']}/explain/").json()
+            self.assertEqual(detail["rank"], rank)
+            self.assertEqual(detail["score"], task["score"])
+            self.assertEqual(detail["explanation"], full[task["id"]]["explanation"])
+            self.assertEqual(detail["warnings"], full[task["id"]]["warnings"])
+            self.assertEqual(detail["strategy"], "high_impact")
+            self.assertEqual(detail["total_tasks"], 3)
+            breakdown = full[task["id"]]["score_breakdown"]
+            self.assertEqual({k: v["value"] for k, v in detail["components"].items()}, {k: breakdown[k] for k in detail["components"]})
+        detail = client.get("/api/tasks/7/explain/").json()
+        self.assertEqual(detail["id"], 7)
+        self.assertEqual(detail["inputs"]["dependencies"], ["a", "x"])
+        self.assertEqual(detail["cycles"], [])
+        self.assertEqual(client.get("/api/tasks/zzz/explain/").status_code, 404)
+        self._analyze(client, top_k=1, strategy="high_impact")
+        self.assertEqual(client.get(f"/api/tasks/{ranked[2]['id']}/explain/").json()["rank"], 3)
+
+        # a cached response points the client at the analysis that produced it
+        other = Client(HTTP_X_CLIENT_TOKEN="explain-other")
+        self.assertEqual(other.get("/api/tasks/a/explain/").status_code, 404)
+        self._analyze(other, fields=["id", "score"], strategy="high_impact")
+        self.assertEqual(other.get("/api/tasks/a/explain/").json(), client.get("/api/tasks/a/explain/").json())
+        self.assertEqual(get_analysis_cache().stats()["hits"], 1)
+
+
+class ForecastTests(TestCase):
+
+    def _tasks(self, n=300, seed=11):
+        rnd = Random(seed)
+        base = date(2026, 3, 1)
+        return [
+            {
+                "id": f"t{i % (n - 20)}",
+                "importance": rnd.randint(1, 10),
+                "estimated_hours": rnd.choice([0.5, 1, 2, 5, 8]),
+                "due_date": rnd.choice([None, (base + timedelta(days=rnd.randint(-40, 120))).isoformat()]),
+                "dependencies": [f"t{rnd.randrange(n)}" for _ in range(rnd.randint(0, 2))],
+            }
+            for i in range(n)
+        ]
+
+    def test_as_of(self):
+        tasks = [{"id": "a", "due_date": "2026-01-31"}, {"id": "b"}]
+        result = calculate_scores(tasks, as_of="2026-01-01")
+        self.assertEqual(result["meta"]["as_of"], "2026-01-01")
+        self.assertEqual(result["analyzed_tasks"][0]["score_breakdown"]["urgency"], 0.5)
+        self.assertIn("Due in 30 day(s)", result["analyzed_tasks"][0]["explanation"])
+        self.assertEqual(calculate_scores(tasks, as_of=date(2026, 1, 1)), result)
+        self.assertNotIn("as_of", calculate_scores(tasks)["meta"])
+        for bad in ("tomorrow", "2026-02-30", 20260101):
+            with self.assertRaises(ValueError, msg=bad):
+                calculate_scores(tasks, as_of=bad)
+
+    def test_forecast_matches_daily_analyses(self):
+        tasks = self._tasks()
+        components = {"soon": "clamp(1 - abs(days) / 10)", "quick": {"formula": "-hours", "normalize": "minmax"}}
+        weights = {"urgency": 0.3, "importance": 0.2, "dependencies": 0.1, "effort": 0.1, "soon": 0.2, "quick": 0.1}
+        engines = ("python", "numpy") if find_spec("numpy") is not None else ("python",)
+        for engine, options in [(e, {}) for e in engines] + [("python", {"components": components, "custom_weights": weights})]:
+            result = forecast_scores(tasks, days=45, as_of="2026-02-10", top_k=300, engine=engine, **options)
+            self.assertEqual(len(result["forecast"]), 45)
+            self.assertEqual(result["forecast"][0]["changed"], 0)
+            for step in (0, 1, 2, 20, 44):
+                entry = result["forecast"][step]
+                day = (date(2026, 2, 10) + timedelta(days=step)).isoformat()
+                self.assertEqual(entry["date"], day)
+                expected = calculate_scores(tasks, as_of=day, engine=engine, **options)["analyzed_tasks"]
+                self.assertEqual(entry["tasks"], [{"id": t["id"], "score": t["score"], "tier": t["tier"]} for t in expected])
+            self.assertTrue(all(0 < entry["changed"] < len(tasks) for entry in result["forecast"][1:]))
+
+        for bad in ({"days": 0}, {"days": 400}, {"top_k": 0}, {"as_of": "soon"}):
+            with self.assertRaises(ValueError, msg=bad):
+                forecast_scores(tasks, **bad)
+
+    def test_endpoint(self):
+        body = {"tasks": self._tasks(40), "days": 7, "as_of": "2026-03-01", "top_k": 3}
+        response = Client().post("/api/tasks/forecast/", data=json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual([entry["date"] for entry in result["forecast"]][-1], "2026-03-07")
+        self.assertEqual(len(result["forecast"][3]["tasks"]), 3)
+        self.assertEqual(result["meta"]["total_tasks"], 40)
+        body["days"] = "7"
+        response = Client().post("/api/tasks/forecast/", data=json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+        analyze = {"tasks": body["tasks"], "as_of": "2026-03-01", "top_k": 3}
+        response = Client().post("/api/tasks/analyze/", data=json.dumps(analyze), content_type="application/json")
+        self.assertEqual(
+            [t["id"] for t in response.json()["analyzed_tasks"]], [t["id"] for t in result["forecast"][0]["tasks"]]
+        )
+
+
+class ValidationTests(TestCase):
+
+    def _dirty(self):
+        tasks = [{"id": f"t{i}", "importance": "high", "dependencies": ["t0"]} for i in range(8)]
+        tasks += [
+            {"id": "a", "importance": 14, "estimated_hours": -2, "due_date": "next week"},
+            {"id": "a", "estimated_hours": "lots", "dependencies": "t1, ghost"},
+            {"id": "b", "dependencies": {"t1": True}, "due_date": ""},
+        ]
+        return tasks
+
+    def test_fast_paths_match_builtins(self):
+        def reference(convert, value):
+            try:
+                return convert(value)
+            except Exception:
+                return None
+
+        values = [
+            7, -3, 10 ** 30, True, 2.9, -0.5, float("nan"), float("inf"), "8", " +9 ", "-2", "٣", "1_0", "7.5",
+            "", "+", "high", "1e3", "inf", "-Infinity", "nAn", " 2_5 ", "2 hours", "²", None, [1], {"a": 1}, 10 ** 400,
+        ]
+        for value in values:
+            expected = reference(int, value)
+            self.assertEqual(_int_value(value), expected, msg=repr(value))
+            expected = reference(float, value)
+            got = _float_value(value)
+            if expected is not None and expected != expected:
+                self.assertNotEqual(got, got, msg=repr(value))
+            else:
+                self.assertEqual(got, expected, msg=repr(value))
+
+    def test_report(self):
+        report = validate_tasks(self._dirty() + ["not a task", {"id": ["unhashable"]}])
+        self.assertFalse(report["valid"])
+        self.assertEqual((report["total_tasks"], report["distinct_ids"]), (13, 10))
+        self.assertEqual(
+            [(e["code"], e["count"], e["sample_positions"]) for e in report["errors"]],
+            [("not_an_object", 1, [11]), ("invalid_id", 1, [12])],
+        )
+        warnings = {w["code"]: w for w in report["warnings"]}
+        self.assertEqual(warnings["importance_invalid"]["count"], 8)
+        self.assertEqual(len(warnings["importance_invalid"]["sample_ids"]), MAX_SAMPLE_IDS)
+        self.assertEqual(warnings["importance_invalid"]["example"], "importance value 'high' is invalid and defaulted to 5")
+        for code in (
+            "importance_normalized", "hours_negative", "hours_invalid", "due_date_invalid", "dependencies_string",
+            "dependencies_coerced", "dependency_not_found", "duplicate_id",
+        ):
+            self.assertEqual(warnings[code]["count"], 1, msg=code)
+        self.assertEqual(warnings["duplicate_id"]["sample_ids"], ["a"])
+        self.assertTrue(validate_tasks([{"id": "x"}])["valid"])
+
+    def test_analysis_warnings(self):
+        result = calculate_scores(self._dirty())
+        by_id = {t["id"]: t for t in result["analyzed_tasks"]}
+        self.assertIn("task id 'a' is used by 2 tasks; scoring uses the values of the last one", by_id["a"]["warnings"])
+        self.assertIn("due_date value 'next week' could not be parsed; treated as no due date", by_id["a"]["warnings"])
+        self.assertEqual(by_id["b"]["warnings"], ["dependencies value coerced to list"])
+        self.assertIn("warnings_summary", result["meta"])
+
+        aggregated = calculate_scores(self._dirty(), aggregate_warnings=True)["meta"]
+        self.assertNotIn("warnings_summary", aggregated)
+        self.assertEqual(sum(w["count"] for w in aggregated["warnings"]), 16)
+        self.assertNotIn("warnings", calculate_scores([{"id": "x"}], aggregate_warnings=True)["meta"])
+
+    def test_endpoint(self):
+        client = Client()
+        response = client.post("/api/tasks/validate/", data=json.dumps({"tasks": self._dirty()}), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["valid"])
+        self.assertEqual(response.json()["total_tasks"], 11)
+        body = "\n".join(json.dumps(t) for t in self._dirty()) + "\n[1]\n"
+        response = client.post("/api/tasks/validate/", data=body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 400)
+        response = client.post("/api/tasks/validate/", data=body[: body.rindex("[")], content_type="application/x-ndjson")
+        self.assertEqual(response.json()["warnings"], validate_tasks(self._dirty())["warnings"])
+        self.assertEqual(client.post("/api/tasks/validate/", data="{}", content_type="application/json").status_code, 400)
+
+
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        rnd = Random(11)
+        self.tasks = [
+            {
+                "id": f"t{i}",
+                "title": f"Task {i}",
+                "due_date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}" if i % 4 else None,
+                "importance": rnd.randint(1, 10),
+                "estimated_hours": rnd.choice([0.5, 2, 5, 13]),
+                "dependencies": [f"t{rnd.randrange(60)}" for _ in range(i % 3)],
+            }
+            for i in range(60)
+        ]
+        # ids, titles and due dates of other JSON types, an unknown dependency and dirty fields
+        self.tasks += [
+            {"id": 7, "title": {"text": "nested"}, "due_date": "someday", "importance": "high", "dependencies": [7, "ghost"]},
+            {"id": "t3", "title": None, "due_date": 20260301, "estimated_hours": -1},
+        ]
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "project.tasksnap")
+        write_snapshot(self.path, *TaskTable.build(self.tasks))
+
+    def tearDown(self):
+        for name in os.listdir(self.tmp):
+            os.remove(os.path.join(self.tmp, name))
+        os.rmdir(self.tmp)
+
+    def test_analysis_matches_task_list(self):
+        for engine in ("python", "numpy") if find_spec("numpy") else ("python",):
+            for options in ({}, {"top_k": 5, "compare": "all"}, {"aggregate_warnings": True}):
+                expected = calculate_scores(self.tasks, engine=engine, as_of="2026-03-01", **options)
+                with open_snapshot(self.path) as snapshot:
+                    self.assertEqual(len(snapshot), 62)
+                    result = calculate_scores(snapshot, engine=engine, as_of="2026-03-01", **options)
+                self.assertEqual(dumps(result), dumps(expected), msg=(engine, options))
+        with open_snapshot(self.path) as snapshot:
+            self.assertEqual(forecast_scores(snapshot, days=3, as_of="2026-03-01"), forecast_scores(self.tasks, days=3, as_of="2026-03-01"))
+            table = snapshot.table
+            self.assertEqual(list(table.ids[-3:]), ["t59", 7, "t3"])
+            self.assertEqual(table.titles[-2], {"text": "nested"})
+            self.assertEqual(table.due_dates[-1], 20260301)
+
+    def test_invalid_files(self):
+        for content in (b"", b"TASKSNAP", b"not a snapshot at all" * 10):
+            with open(self.path, "wb") as f:
+                f.write(content)
+            with self.assertRaises(ValueError):
+                open_snapshot(self.path)
+        write_snapshot(self.path, *TaskTable.build(self.tasks))
+        with open(self.path, "rb") as f:
+            data = f.read()
+        with open(self.path, "wb") as f:
+            f.write(data[: len(data) // 2])
+        with self.assertRaises(ValueError):
+            open_snapshot(self.path)
+        with self.assertRaises(ValueError):
+            write_snapshot(self.path, *TaskTable.build([{"id": "x", "title": object()}]))
+        self.assertEqual(sorted(os.listdir(self.tmp)), ["project.tasksnap"])
+
+    def test_management_command_and_endpoint(self):
+        json_path = os.path.join(self.tmp, "tasks.json")
+        with open(json_path, "w") as f:
+            json.dump({"tasks": self.tasks}, f)
+        ndjson_path = os.path.join(self.tmp, "tasks.ndjson")
+        with open(ndjson_path, "w") as f:
+            f.writelines(json.dumps(t) + "\n" for t in self.tasks)
+        call_command("build_snapshot", json_path, stderr=StringIO())
+        call_command("build_snapshot", ndjson_path, os.path.join(self.tmp, "lines.tasksnap"), stderr=StringIO())
+        expected = calculate_scores(self.tasks, as_of="2026-03-01")
+        for name in ("tasks", "lines"):
+            with open_snapshot(os.path.join(self.tmp, name + ".tasksnap")) as snapshot:
+                self.assertEqual(dumps(calculate_scores(snapshot, as_of="2026-03-01")), dumps(expected))
+
+        client = Client(HTTP_X_CLIENT_TOKEN="snapshot")
+        with override_settings(TASK_SNAPSHOT_DIR=self.tmp):
+            response = client.post(
+                "/api/tasks/analyze/", data=json.dumps({"snapshot": "lines", "as_of": "2026-03-01"}),
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, dumps(expected))
+            self.assertEqual(client.get("/api/tasks/t3/explain/").json()["inputs"]["estimated_hours"], 2.0)
+            for name, status in (("missing", 404), ("../lines", 400)):
+                response = client.post("/api/tasks/analyze/", data=json.dumps({"snapshot": name}), content_type="application/json")
+                self.assertEqual(response.status_code, status, msg=name)
+
+
+def _write_result(path, client, body):
+    SharedMemoryResultStore(path, slots=16, slot_bytes=4096).set(client, pack(body))
+
+
+class ResultStoreTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.tmp):
+            os.remove(os.path.join(self.tmp, name))
+        os.rmdir(self.tmp)
+
+    def _backends(self, ttl=60):
+        return [
+            LocalResultStore(ttl, max_entries=8),
+            SQLiteResultStore(os.path.join(self.tmp, "results.sqlite3"), ttl),
+            SharedMemoryResultStore(os.path.join(self.tmp, "results.shm"), ttl, slots=16, slot_bytes=4096),
+        ]
+
+    def test_backends(self):
+        big = json.dumps({"suggested_tasks": [{"id": f"t{i}", "explanation": "Due in 3 day(s)"} for i in range(40)]}).encode()
+        self.assertLess(len(pack(big)), len(big) // 3)
+        self.assertEqual(pack(b"{}"), b"\x00{}")
+        for backend in self._backends():
+            store = ResultStore(backend)
+            store.put("token:alice", big)
+            store.put("token:bob", b"{}")
+            self.assertEqual(store.get("token:alice"), big, msg=backend.name)
+            self.assertEqual(store.get("token:bob"), b"{}")
+            self.assertIsNone(store.get("token:carol"))
+            store.put("token:bob", b"[]")
+            self.assertEqual(store.get("token:bob"), b"[]")
+            self.assertEqual(len(backend), 2)
+            backend.set("token:huge", pack(os.urandom(8192)))  # larger than a shared memory slot
+            self.assertEqual(len(backend), 2 if backend.name == "shared_memory" else 3)
+            store.clear()
+            self.assertIsNone(store.get("token:alice"))
+
+    def test_oversized_payload_replaces_previous(self):
+        backend = SharedMemoryResultStore(os.path.join(self.tmp, "small.shm"), 60, slots=16, slot_bytes=1024)
+        backend.set("token:c", b"old")
+        backend.set("token:d", b"other")
+        backend.set("token:c", os.urandom(5000))
+        self.assertIsNone(backend.get("token:c"))
+        self.assertEqual(backend.get("token:d"), b"other")
+        self.assertEqual(len(backend), 1)
+        backend.set("token:c", b"new")
+        self.assertEqual(backend.get("token:c"), b"new")
+
+    def test_expiry(self):
+        for backend in self._backends(ttl=60):
+            backend.set("token:a", pack(b"{}"))
+            self.assertEqual(unpack(backend.get("token:a")), b"{}")
+            with patch("tasks.results.time.time", return_value=time.time() + 61):
+                self.assertIsNone(backend.get("token:a"), msg=backend.name)
+
+    def test_shared_across_processes(self):
+        path = os.path.join(self.tmp, "shared.shm")
+        store = ResultStore(SharedMemoryResultStore(path, slots=16, slot_bytes=4096))
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            pool.submit(_write_result, path, "token:worker", b'{"from": "child"}').result()
+        self.assertEqual(store.get("token:worker"), b'{"from": "child"}')
+        with self.assertRaises(ValueError):
+            SharedMemoryResultStore(path, slots=32, slot_bytes=4096)
+
+    def test_suggest_from_another_worker(self):
+        path = os.path.join(self.tmp, "results.sqlite3")
+        client = Client(HTTP_X_CLIENT_TOKEN="shared-store")
+        body = json.dumps({"tasks": [{"id": "a", "importance": 9}, {"id": "b"}]})
+        with patch("tasks.views.get_result_store", return_value=ResultStore(SQLiteResultStore(path))):
+            self.assertEqual(client.post("/api/tasks/analyze/", data=body, content_type="application/json").status_code, 200)
+        with patch("tasks.views.get_result_store", return_value=ResultStore(SQLiteResultStore(path))):
+            suggestion = client.get("/api/tasks/suggest/").json()
+        self.assertEqual([t["id"] for t in suggestion["suggested_tasks"]], ["a", "b"])
+
+
+class SimulationTests(TestCase):
+
+    def _tasks(self, n=120, seed=13):
+        rnd = Random(seed)
+        base = date(2026, 3, 1)
+        return [
+            {
+                "id": f"t{i}",
+                "importance": rnd.randint(1, 10),
+                "estimated_hours": rnd.choice([0.5, 1, 2, 5, 8]),
+                "due_date": rnd.choice([None, (base + timedelta(days=rnd.randint(-40, 120))).isoformat()]),
+                "dependencies": [f"t{rnd.randrange(n)}" for _ in range(rnd.randint(0, 2))],
+            }
+            for i in range(n)
+        ]
+
+    def _apply(self, tasks, overlays):
+        tasks = [dict(t) for t in tasks]
+        by_id = {t["id"]: t for t in tasks}
+        for overlay in overlays:
+            task = by_id[overlay["id"]]
+            for key in ("importance", "estimated_hours", "due_date", "dependencies"):
+                if key in overlay:
+                    task[key] = overlay[key]
+            if "delay_days" in overlay:
+                task["due_date"] = (date.fromisoformat(task["due_date"]) + timedelta(days=overlay["delay_days"])).isoformat()
+            deps = [d for d in task["dependencies"] if d not in overlay.get("remove_dependencies", ())]
+            task["dependencies"] = deps + [d for d in overlay.get("add_dependencies", ()) if d not in deps]
+        return tasks
+
+    def _ranks(self, tasks, **options):
+        result = calculate_scores(tasks, as_of="2026-03-01", **options)
+        return {t["id"]: (rank, t["score"], t["tier"]) for rank, t in enumerate(result["analyzed_tasks"], start=1)}
+
+    def test_matches_full_analyses(self):
+        tasks = self._tasks()
+        rnd = Random(5)
+        dated = [t["id"] for t in tasks if t["due_date"]]
+        scenarios = []
+        for s in range(40):
+            overlays = []
+            for _ in range(rnd.randint(1, 4)):
+                tid = f"t{rnd.randrange(len(tasks))}"
+                kind = rnd.randrange(7)
+                overlays.append([
+                    {"id": tid, "importance": rnd.randint(1, 10)},
+                    {"id": tid, "estimated_hours": rnd.choice([0.25, 1, 3, 40])},
+                    {"id": tid, "due_date": rnd.choice([None, "2026-03-02", "2026-05-20"])},
+                    {"id": rnd.choice(dated), "delay_days": rnd.randint(-10, 30)},
+                    {"id": tid, "add_dependencies": [f"t{rnd.randrange(len(tasks))}"]},
+                    {"id": tid, "remove_dependencies": list(tasks[int(tid[1:])]["dependencies"][:1])},
+                    {"id": tid, "dependencies": []},
+                ][kind])
+            scenarios.append({"name": f"s{s}", "overlays": overlays})
+        engines = ("python", "numpy") if find_spec("numpy") is not None else ("python",)
+        for engine in engines:
+            for strategy in ("smart_balance", "high_impact"):
+                result = simulate_scenarios(
+                    tasks, scenarios, strategy=strategy, engine=engine, as_of="2026-03-01", max_changes=len(tasks)
+                )
+                before = self._ranks(tasks, strategy=strategy, engine=engine)
+                self.assertTrue(any(s["rescaled"] for s in result["scenarios"]))
+                self.assertFalse(all(s["rescaled"] for s in result["scenarios"]))
+                for scenario, simulated in zip(scenarios, result["scenarios"]):
+                    after = self._ranks(self._apply(tasks, scenario["overlays"]), strategy=strategy, engine=engine)
+                    changes = {c["id"]: c for c in simulated["changes"]}
+                    expected = {tid for tid in before if before[tid][1] != after[tid][1]}
+                    self.assertLessEqual(expected, set(changes), msg=scenario)
+                    self.assertEqual(simulated["moved"], sum(1 for tid in before if before[tid][0] != after[tid][0]))
+                    for tid, change in changes.items():
+                        self.assertEqual(change["rank"], [before[tid][0], after[tid][0]], msg=scenario)
+                        self.assertEqual(change["score"], [before[tid][1], after[tid][1]], msg=scenario)
+                        self.assertEqual(change["tier"], [before[tid][2], after[tid][2]], msg=scenario)
+
+    def test_cycles_and_errors(self):
+        tasks = [
+            {"id": "a", "dependencies": ["b"]},
+            {"id": "b", "dependencies": ["c"]},
+            {"id": "c", "due_date": "2026-03-05"},
+            {"id": "d", "dependencies": ["e"]},
+            {"id": "e", "dependencies": ["d"]},
+        ]
+        result = simulate_scenarios(tasks, [
+            {"name": "loop", "overlays": [{"id": "c", "add_dependencies": ["a"]}]},
+            {"name": "untangle", "overlays": [{"id": "e", "remove_dependencies": ["d"]}]},
+            {"name": "detour", "overlays": [{"id": "e", "dependencies": ["a"]}, {"id": "c", "dependencies": ["d"]}]},
+            {"overlays": [{"id": "c", "delay_days": 1}]},
+        ], as_of="2026-03-01")
+        loop, untangle, detour, slip = result["scenarios"]
+        self.assertEqual(loop["cycles"], {"created": [{"task": "c", "dependency": "a"}], "released": []})
+        self.assertEqual(untangle["cycles"], {"created": [], "released": ["d", "e"]})
+        # d -> e is gone, but e -> a -> ... -> c -> d closes a new cycle through both
+        self.assertEqual(detour["cycles"]["released"], [])
+        self.assertEqual(slip["name"], "scenario 4")
+        self.assertNotIn("cycles", slip)
+        self.assertEqual(slip["changes"][0]["id"], "c")
+        self.assertEqual(result["meta"]["scenarios"], 4)
+
+        for scenarios in (
+            [], "x", [{"overlays": [{"id": "zz"}]}], [{"overlays": [{"id": "a", "hours": 1}]}],
+            [{"overlays": [{"id": "a", "importance": "high"}]}], [{"overlays": [{"id": "a", "delay_days": 2}]}],
+            [{"overlays": [{"id": "a", "add_dependencies": "b"}]}], [{"name": "no overlays"}],
+        ):
+            with self.assertRaises(ValueError, msg=scenarios):
+                simulate_scenarios(tasks, scenarios)
+        with self.assertRaises(ValueError):
+            simulate_scenarios(tasks + [{"id": "a"}], [{"overlays": []}])
+
+    def test_endpoint(self):
+        body = {
+            "tasks": self._tasks(30),
+            "as_of": "2026-03-01",
+            "scenarios": [{"name": "rush", "overlays": [{"id": "t7", "due_date": "2026-03-02", "importance": 10}]}],
+            "max_changes": 1,
+        }
+        response = Client().post("/api/tasks/simulate/", data=json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        scenario = response.json()["scenarios"][0]
+        self.assertEqual(scenario["changes"], [
+            {"id": "t7", "rank": scenario["changes"][0]["rank"], "score": scenario["changes"][0]["score"],
+             "tier": scenario["changes"][0]["tier"]},
+        ])
+        rushed = self._apply(body["tasks"], body["scenarios"][0]["overlays"])
+        self.assertEqual(scenario["changes"][0]["rank"][1], self._ranks(rushed)["t7"][0])
+        self.assertLess(scenario["changes"][0]["rank"][1], scenario["changes"][0]["rank"][0])
+        body["scenarios"][0]["overlays"][0]["id"] = "t99"
+        response = Client().post("/api/tasks/simulate/", data=json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("t99", response.json()["error"])
+
+
+class CommandLineTests(TestCase):
+    TASKS = [
+        {"id": "a", "importance": 9, "due_date": "2026-03-03"},
+        {"id": "b", "dependencies": ["a"], "estimated_hours": "lots"},
+        {"id": "c", "estimated_hours": 0.5},
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.tmp):
+            os.remove(os.path.join(self.tmp, name))
+        os.rmdir(self.tmp)
+
+    def _run(self, argv, stdin=b""):
+        from io import BytesIO
+
+        out = BytesIO()
+        with patch("sys.stderr", new_callable=StringIO) as err:
+            status = cli_main(argv, stdin=BytesIO(stdin), stdout=out)
+        return status, out.getvalue(), err.getvalue()
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_json_and_ndjson_inputs(self):
+        expected = calculate_scores(self.TASKS, as_of="2026-03-01", top_k=2)
+        ndjson = b"".join(dumps(t) + b"\n" for t in self.TASKS)
+        inputs = [
+            ([self._write("tasks.json", dumps(self.TASKS))], b""),
+            ([self._write("payload.json", dumps({"tasks": self.TASKS}))], b""),
+            ([self._write("tasks.ndjson", ndjson)], b""),
+            (["-"], ndjson),
+            ([], dumps(self.TASKS)),
+            ([self._write("first.jsonl", ndjson[:ndjson.index(b"\n") + 1]), "-"], b"\n".join(ndjson.splitlines()[1:])),
+        ]
+        for files, stdin in inputs:
+            status, out, err = self._run(files + ["--as-of", "2026-03-01", "--top-k", "2"], stdin)
+            self.assertEqual((status, err), (0, ""), msg=files)
+            self.assertEqual(loads(out), loads(dumps(expected)), msg=files)
+
+    def test_ndjson_output_and_options(self):
+        path = self._write("tasks.json", dumps(self.TASKS))
+        status, out, _ = self._run(
+            [path, "--ndjson", "--fields", "id,score", "--strategy", "fastest_wins", "--as-of", "2026-03-01"]
+        )
+        self.assertEqual(status, 0)
+        lines = [loads(line) for line in out.splitlines()]
+        expected = calculate_scores(self.TASKS, strategy="fastest_wins", fields="id,score", as_of="2026-03-01")
+        self.assertEqual(lines[:-1], expected["analyzed_tasks"])
+        self.assertEqual(lines[-1], {"meta": loads(dumps(expected["meta"]))})
+
+        output = os.path.join(self.tmp, "ranked.json")
+        status, out, _ = self._run([path, "-o", output, "--weights", '{"effort": 1}', "--fields", "id"])
+        self.assertEqual((status, out), (0, b""))
+        with open(output, "rb") as f:
+            self.assertEqual(loads(f.read())["analyzed_tasks"][0]["id"], "c")
+
+    def test_errors(self):
+        path = self._write("tasks.json", dumps(self.TASKS))
+        for argv, stdin, message in (
+            ([path, "--top-k", "0"], b"", "top_k"),
+            ([os.path.join(self.tmp, "missing.json")], b"", "missing.json"),
+            (["--format", "json"], b'{"id": "a"}\n{"id": "b"}', "invalid json"),
+            ([], b'{"id": "a"}\n[1]', "line 2"),
+            ([], b'"tasks"', "expected a list"),
+        ):
+            status, out, err = self._run(argv, stdin)
+            self.assertEqual(status, 1, msg=argv)
+            self.assertIn(message, err, msg=argv)
+        with patch("sys.stderr", new_callable=StringIO), self.assertRaises(SystemExit):
+            cli_main([path, "--weights", "[1]"])
+
+    def test_ndjson_errors_match_the_api(self):
+        body = b'{"id": "a"}\n\n[1]\n'
+        response = Client().post("/api/tasks/analyze/", data=body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 400)
+        status, out, err = self._run(["--format", "ndjson"], body)
+        self.assertEqual(err.strip(), "error: -: " + response.json()["error"])
+        self.assertEqual(response.json()["error"], "line 3 is not a task object")
+
+    def test_runs_without_django(self):
+        env = {k: v for k, v in os.environ.items() if k != "DJANGO_SETTINGS_MODULE"}
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = (
+            "import sys, tasks.scoring as s; "
+            "r = s.calculate_scores([{'id': 'a'}, {'id': 'b', 'importance': 9}]); "
+            "print(r['analyzed_tasks'][0]['id'], sorted(m for m in ('django', 'numpy', 'orjson') if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip(), "b []", msg=result.stderr)
+
+        result = subprocess.run(
+            [sys.executable, "-m", "tasks.scoring", "--fields", "id", "--ndjson"], cwd=root, env=env,
+            input=b'{"id": "x"}\n{"id": "y", "importance": 10}\n', capture_output=True,
+        )
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        self.assertEqual([loads(line) for line in result.stdout.splitlines()[:2]], [{"id": "y"}, {"id": "x"}])
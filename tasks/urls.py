@@ -3,5 +3,19 @@ from . import views
 
 urlpatterns = [
     path('analyze/', views.analyze_tasks, name='analyze_tasks'),
+    path('plan/', views.plan_tasks, name='plan_tasks'),
+    path('optimize/', views.optimize_plan, name='optimize_plan'),
+    path('forecast/', views.forecast_tasks, name='forecast_tasks'),
+    path('simulate/', views.simulate_tasks, name='simulate_tasks'),
+    path('validate/', views.validate_tasks_view, name='validate_tasks'),
+    path('batch/', views.analyze_batch_view, name='analyze_batch'),
     path('suggest/', views.suggest_tasks, name='suggest_tasks'),
+    path('async/analyze/', views.analyze_tasks_async, name='analyze_tasks_async'),
+    path('async/suggest/', views.suggest_tasks_async, name='suggest_tasks_async'),
+    path('cache/stats/', views.cache_stats, name='cache_stats'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('store/', views.task_store, name='task_store'),
+    path('store/bulk/', views.task_store_bulk, name='task_store_bulk'),
+    path('store/<str:task_id>/', views.task_store_detail, name='task_store_detail'),
+    path('<str:task_id>/explain/', views.explain_task, name='explain_task'),
 ]
@@ -0,0 +1,94 @@
+"""
+Task validation.
+
+Normalizing a task (table.coerce_task) never fails on a dirty field: the
+value is coerced or defaulted and a warning is recorded. Every warning has a
+machine-readable code (WARNINGS) besides its message. TaskWarnings is the
+warnings_map the normalizer fills: {task id: [messages]} as before, plus
+per-code counts and sample ids, so a summary stays small however often a
+message repeats.
+
+validate_tasks() runs only the normalization stage (no scoring) and reports
+errors (tasks that would make an analysis fail) and the aggregated warnings;
+POST /api/tasks/validate/ serves it for pre-checking large uploads.
+"""
+from collections import defaultdict
+
+MAX_SAMPLE_IDS = 5
+
+# code: meaning
+WARNINGS = {
+    "importance_normalized": "importance outside 1-10 was clamped",
+    "importance_invalid": "importance is not a number; defaulted to 5",
+    "hours_negative": "estimated_hours was negative; set to 2.0",
+    "hours_invalid": "estimated_hours is not a number; defaulted to 2.0",
+    "due_date_invalid": "due_date could not be parsed; treated as no due date",
+    "dependencies_string": "dependencies was a comma-separated string",
+    "dependencies_coerced": "dependencies was not a list and was converted to one",
+    "dependencies_invalid": "dependencies could not be read; treated as empty",
+    "dependency_not_found": "a dependency names an id no task has",
+    "duplicate_id": "several tasks share an id; scoring uses the values of the last one",
+}
+ERRORS = {
+    "not_an_object": "the task is not a JSON object",
+    "invalid_id": "the id or a dependency is not a string or number",
+}
+
+
+class TaskWarnings(defaultdict):
+    """
+    {task id: [warning messages]} that also counts every warning by code.
+    """
+
+    def __init__(self):
+        super().__init__(list)
+        # code: {code, count, sample_ids, example}, in first-seen order; built as warnings are
+        # added rather than from a second record of every warning
+        self.by_code = {}
+
+    def __reduce__(self):
+        return type(self), (), self.__dict__, None, iter(self.items())
+
+    def add(self, tid, code, message):
+        self[tid].append(message)
+        entry = self.by_code.get(code)
+        if entry is None:
+            entry = self.by_code[code] = {"code": code, "count": 0, "sample_ids": [], "example": message}
+        entry["count"] += 1
+        if len(entry["sample_ids"]) < MAX_SAMPLE_IDS:
+            entry["sample_ids"].append(tid)
+
+    def summary(self):
+        """
+        One entry per code, in first-seen order: code, count, sample_ids (up to MAX_SAMPLE_IDS)
+        and an example message.
+        """
+        return [dict(entry, sample_ids=list(entry["sample_ids"])) for entry in self.by_code.values()]
+
+
+def validate_tasks(tasks):
+    """
+    Input: tasks as for calculate_scores (any iterable, consumed once).
+    Returns {"valid", "total_tasks", "distinct_ids", "errors", "warnings"}: errors are
+    {code, count, sample_positions, example} entries for tasks an analysis would reject
+    (valid is false when there are any), warnings the TaskWarnings summary.
+    """
+    from .table import TaskTable
+
+    errors = []
+    table, warnings_map = TaskTable.build(tasks, errors=errors)
+    by_code = {}
+    for position, code, message in errors:
+        entry = by_code.get(code)
+        if entry is None:
+            entry = by_code[code] = {"code": code, "count": 0, "sample_positions": [], "example": message}
+        entry["count"] += 1
+        if len(entry["sample_positions"]) < MAX_SAMPLE_IDS:
+            entry["sample_positions"].append(position)
+    return {
+        "valid": not errors,
+        "total_tasks": len(table) + len(errors),
+        "distinct_ids": sum(1 for r in table.name_rows if r >= 0),
+        "errors": list(by_code.values()),
+        "warnings": warnings_map.summary(),
+    }
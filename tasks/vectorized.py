@@ -0,0 +1,173 @@
+"""
+Columnar numpy engine for calculate_scores.
+
+The TaskTable columns (importance, hours, due-date ordinals, dependency
+out-degree) are wrapped as arrays and every component (tasks/components.py)
+is computed with batched array operations. The arithmetic of the built-in
+components mirrors their python versions operation for operation so both
+engines give the same floats and the same ordering.
+"""
+import numpy as np
+
+from .components import (
+    BUILTIN_COMPONENTS,
+    MAX_PAST_DUE_DAYS_FOR_BOOST,
+    URGENCY_HORIZON_DAYS,
+    TaskColumns,
+    resolve_components,
+)
+from .instrumentation import NULL_TIMINGS
+from .scoring import _rank_strategies, _score_python
+
+TIERS = ("Low", "Medium", "High")
+
+
+def urgency_numpy(columns):
+    days = columns.days
+    with np.errstate(invalid="ignore"):
+        past = 1.0 + np.minimum(-days, MAX_PAST_DUE_DAYS_FOR_BOOST) / MAX_PAST_DUE_DAYS_FOR_BOOST
+        ahead = np.minimum(1.0, np.maximum(0.0, 1.0 - (days / URGENCY_HORIZON_DAYS)))
+    s_urg = np.where(days < 0, np.minimum(1.0, past), ahead)
+    s_urg[columns.has_due_date == 0] = 0.0
+    return s_urg
+
+
+def importance_numpy(columns):
+    return columns.importance / 10.0
+
+
+def dependencies_numpy(columns):
+    table = columns.table
+    counts = np.asarray(columns.outdegree, dtype=np.int64)
+    known = np.frombuffer(table.name_rows, dtype=np.int64) >= 0
+    known_counts = counts[known & (counts > 0)] if len(counts) else counts
+    if len(known_counts):
+        min_d = int(known_counts.min())
+        max_d = int(known_counts.max())
+    else:
+        min_d = 0
+        max_d = 1
+    if max_d - min_d < 1e-9:
+        return np.zeros(len(columns))
+    return (columns.blocks - min_d) / (max_d - min_d)
+
+
+def effort_numpy(columns):
+    effort_raw = 1.0 / (1.0 + columns.hours)
+    if not len(effort_raw):
+        return effort_raw
+    min_e = effort_raw.min()
+    max_e = effort_raw.max()
+    if max_e - min_e < 1e-9:
+        return np.full(len(columns), 0.5)
+    return (effort_raw - min_e) / (max_e - min_e)
+
+
+def _normalize_numpy(values, mode):
+    """
+    Same as components._normalize, over an array.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if mode == "none":
+        return values
+    values = np.where(np.isnan(values), 0.0, values)
+    if mode == "minmax":
+        finite = values[np.isfinite(values)]
+        if len(finite):
+            lo, hi = finite.min(), finite.max()
+            with np.errstate(invalid="ignore"):
+                values = np.zeros(len(values)) if hi - lo < 1e-9 else (values - lo) / (hi - lo)
+    return np.where(values <= 0.0, 0.0, np.where(values >= 1.0, 1.0, values))
+
+
+def evaluate_numpy(components, table, today, outdegree):
+    """
+    {name: normalized float64 array} of every component (see components.evaluate).
+    Components without a numpy implementation run their python one.
+    """
+    columns = TaskColumns(table, today, outdegree, numpy=True)
+    python_columns = None
+    values = {}
+    for component in components:
+        if component.numpy is not None:
+            raw = component.numpy(columns)
+        else:
+            python_columns = python_columns or TaskColumns(table, today, outdegree)
+            raw = component.python(python_columns)
+        values[component.name] = _normalize_numpy(raw, component.normalize)
+    return values
+
+
+def score_numpy(table, today, weights, outdegree, limit=None, timings=NULL_TIMINGS, components=None):
+    """
+    Same contract as scoring._score_python: returns per-row columns (one per
+    component, 'score', 'tier', 'order' and 'components', the component names).
+    The TaskTable arrays are wrapped without copying.
+    """
+    n = len(table)
+    importance = np.frombuffer(table.importance, dtype=np.int8).astype(np.int64)
+    hours = np.frombuffer(table.hours, dtype=np.float64)
+
+    # NaN/inf hours make min/max and sorting order-dependent; keep the reference semantics
+    if not np.isfinite(hours).all():
+        return _score_python(table, today, weights, outdegree, limit, timings, components)
+
+    components = components or resolve_components()
+    names = [c.name for c in components]
+    values = evaluate_numpy(components, table, today, outdegree)
+    score = None
+    for name in names:
+        term = weights.get(name, 0) * values[name]
+        score = term if score is None else score + term
+    tier_idx = (score >= 0.45).astype(np.int8) + (score >= 0.75)
+
+    with timings.phase("sort"):
+        score_list = score.tolist()
+        # python's round() is used for the sort key so ties resolve exactly like the reference engine
+        rounded = np.array([round(s, 4) for s in score_list], dtype=np.float64)
+        if limit is None or limit >= n:
+            order = np.lexsort((hours, -importance, -rounded))
+        else:
+            # every row of the top `limit` scores at least the limit-th best rounded score;
+            # lexsort is stable, so ties among the candidates keep their input order
+            threshold = np.partition(-rounded, limit - 1)[limit - 1]
+            candidates = np.flatnonzero(-rounded <= threshold)
+            order = candidates[
+                np.lexsort((hours[candidates], -importance[candidates], -rounded[candidates]))
+            ][:limit]
+
+    cols = {name: values[name].tolist() for name in names}
+    cols.update(
+        score=score_list,
+        tier=[TIERS[k] for k in tier_idx.tolist()],
+        order=order.tolist(),
+        components=names,
+    )
+    return cols
+
+
+def rank_strategies_numpy(table, cols, strategies):
+    """
+    Same contract as scoring._rank_strategies. The (n, 4) component matrix is
+    multiplied by the (4, S) weight matrix as an explicit broadcast sum, so
+    every score is the same float the single-strategy engines compute.
+    """
+    n = len(table)
+    importance = np.frombuffer(table.importance, dtype=np.int8).astype(np.int64)
+    hours = np.frombuffer(table.hours, dtype=np.float64)
+    if not np.isfinite(hours).all():
+        return _rank_strategies(table, cols, strategies)
+
+    names = cols.get("components", BUILTIN_COMPONENTS)
+    components = [np.asarray(cols[k], dtype=np.float64) for k in names]
+    weights = np.array([[w.get(k, 0) for _, w in strategies] for k in names], dtype=np.float64)
+    scores = sum(c[:, None] * w[None, :] for c, w in zip(components, weights))
+
+    ranked = {}
+    for j, (name, _) in enumerate(strategies):
+        score_list = scores[:, j].tolist()
+        rounded = np.array([round(s, 4) for s in score_list], dtype=np.float64)
+        rank = np.empty(n, dtype=np.int64)
+        rank[np.lexsort((hours, -importance, -rounded))] = np.arange(1, n + 1)
+        ranked[name] = {"score": score_list, "rank": rank.tolist()}
+    return ranked
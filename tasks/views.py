@@ -1,50 +1,682 @@
 import json
-from django.http import JsonResponse, HttpResponseBadRequest
+import time
+import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from .scoring import calculate_scores
+from .admission import Overloaded, get_admission_queue, run_analysis
+from .batch import analyze_batch, default_workers
+from .cache import analysis_key, client_id, get_analysis_cache
+from .explain import get_explain_store
+from .forecast import DEFAULT_FORECAST_DAYS, forecast_scores
+from .instrumentation import HELP_TEXTS, NULL_TIMINGS, Timings, emit, histograms
+from .models import Task
+from .ndjson import iter_ndjson_tasks
+from .optimizer import DEFAULT_TIME_BUDGET_MS, optimize_days
+from .planner import build_plan
+from .results import get_result_store
+from .scoring import _analyze, _normalize_task, _ranks_from_top
+from .serializers import (
+    MSGPACK_AVAILABLE,
+    MSGPACK_CONTENT_TYPE,
+    DecodeError,
+    decode_analyze_request,
+    dumps,
+    dumps_msgpack,
+    loads,
+)
+from .simulation import DEFAULT_MAX_CHANGES, simulate_scenarios
+from .snapshot import get_snapshot
+from .validation import TaskWarnings, validate_tasks
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+def _flag(value):
+    return value is True or value in ("1", "true")
+
+
+def _ndjson_options(query):
+    """
+    NDJSON bodies only carry tasks; analysis options come from the query string.
+    """
+    options = {
+        "strategy": query.get("strategy", "smart_balance"),
+        "engine": query.get("engine", "auto"),
+        "cursor": query.get("cursor"),
+        "weights": None,
+        "top_k": None,
+        "compare": None,
+        "hoist_weights": _flag(query.get("hoist_weights")),
+        "components": None,
+        "fields": query.get("fields"),
+        "as_of": query.get("as_of"),
+        "aggregate_warnings": _flag(query.get("aggregate_warnings")),
+    }
+    if query.get("weights"):
+        try:
+            options["weights"] = json.loads(query["weights"])
+        except ValueError:
+            raise ValueError("weights must be a json object")
+    if query.get("components"):
+        try:
+            options["components"] = json.loads(query["components"])
+        except ValueError:
+            raise ValueError("components must be a json object")
+    if query.get("top_k"):
+        try:
+            options["top_k"] = int(query["top_k"])
+        except ValueError:
+            raise ValueError("top_k must be a positive integer")
+    if query.get("compare"):
+        # "all", comma-separated preset names, or a json list (for custom weight vectors)
+        value = query["compare"]
+        if value.startswith("["):
+            try:
+                options["compare"] = json.loads(value)
+            except ValueError:
+                raise ValueError("compare must be a json list")
+        else:
+            options["compare"] = value if value == "all" else [name.strip() for name in value.split(",")]
+    return options
+
+
+ANALYZE_OPTIONS = (
+    "strategy", "weights", "engine", "top_k", "cursor", "compare", "hoist_weights", "components", "fields",
+    "as_of", "aggregate_warnings",
+)
+
+
+def _wants_stream(request):
+    return request.GET.get("stream") in ("1", "true") or NDJSON_CONTENT_TYPE in request.headers.get("Accept", "")
+
+
+def _encode(obj):
+    return dumps(obj)
+
+
+def _wants_msgpack(request):
+    return request.GET.get("format") == "msgpack" or MSGPACK_CONTENT_TYPE in request.headers.get("Accept", "")
+
+
+def _remember_last(client, result):
+    """
+    Keeps the client's suggestion payload (top 3 + meta) for suggest_tasks in the result store.
+    Returns the encoded payload.
+    """
+    suggestion = _encode({"suggested_tasks": result["analyzed_tasks"][:3], "meta": result["meta"]})
+    get_result_store().put(client, suggestion)
+    return suggestion
+
+
+def _stream_analysis(rows, meta, client, timings=NULL_TIMINGS, remember=True):
+    """
+    One ranked task per line, serialized as it is produced, then a {"meta": ...} trailer record
+    (with meta.timings when timings are enabled). remember: keep the first three rows as the
+    client's suggestion.
+    """
+    top = []
+    for row in rows:
+        if len(top) < 3:
+            top.append(row)
+        yield dumps(row) + b"\n"
+    if remember:
+        _remember_last(client, {"analyzed_tasks": top, "meta": meta})
+    if timings.enabled:
+        emit("analyze", timings)
+        meta = dict(meta, timings=timings.as_meta())
+    yield dumps({"meta": meta}) + b"\n"
 
-LAST_ANALYSIS = {
-    "result": None
-}
 
 @csrf_exempt
 def analyze_tasks(request):
     """
     POST /api/tasks/analyze/
-    body: {"tasks": [...], "strategy":"smart_balance", "weights": {...} } 
+    body: {"tasks": [...], "strategy":"smart_balance", "weights": {...}, "engine": "auto",
+           "top_k": 10, "cursor": "10", "compare": ["smart_balance", "deadline_driven"] } 
+    top_k/cursor are optional; meta.next_cursor gives the cursor for the next page.
+    compare ("all" or a list of preset names / {"name", "weights"} objects) adds every task's
+    score and rank under each of those strategies, from the same analysis pass.
+    {"project": "name", ...} without "tasks" analyzes the tasks stored for that project.
+    {"snapshot": "name", ...} analyzes the binary snapshot name.tasksnap of
+    settings.TASK_SNAPSHOT_DIR (tasks/snapshot.py) without parsing or normalizing it.
+    "components": {"name": "formula", ...} adds custom scoring components (tasks/formula.py),
+    weighted through "weights"; a built-in name ("urgency", ...) replaces that component.
+    "fields": ["id", "score", "tier"] (or ?fields=id,score,tier) only builds and returns those
+    keys of every task; GET /api/tasks/<id>/explain/ then gives the full breakdown of one task.
+    "as_of": "YYYY-MM-DD" scores against that date instead of today.
+    "aggregate_warnings": true reports meta.warnings (count and sample ids per warning code)
+    instead of every task's messages in meta.warnings_summary.
+
+    Content-Type: application/x-ndjson sends one task per line instead, with the
+    options above in the query string (?strategy=...&top_k=...&weights={...}).
+    ?stream=1 or Accept: application/x-ndjson streams the ranked tasks back one
+    per line, followed by a {"meta": {...}} trailer record.
+
+    "debug_timing": true (or ?debug_timing=1) adds meta.timings with per-phase milliseconds
+    and counts, sends the record to the timing sink and sets a Server-Timing header.
+    Such requests bypass the result cache.
+
+    "hoist_weights": true (?hoist_weights=1) reports the strategy weights once in meta.weights
+    instead of in every score_breakdown. ?format=msgpack or Accept: application/msgpack
+    returns MessagePack instead of JSON (406 when no MessagePack library is installed).
     """
     if request.method != "POST":
         return HttpResponseBadRequest(json.dumps({"error": "POST required"}), content_type="application/json")
+
+    started = time.perf_counter()
+    timings = Timings(started) if _flag(request.GET.get("debug_timing")) else NULL_TIMINGS
+    if request.content_type == NDJSON_CONTENT_TYPE:
+        try:
+            options = _ndjson_options(request.GET)
+        except ValueError as e:
+            return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+        tasks = iter_ndjson_tasks(request, loads)
+    else:
+        try:
+            payload = decode_analyze_request(request.body)
+        except DecodeError as e:
+            return HttpResponseBadRequest(json.dumps({"error": "invalid json", "detail": str(e)}), content_type="application/json")
+        except ValueError as e:
+            return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+        if payload["debug_timing"] and not timings.enabled:
+            timings = Timings(started)
+        timings.add("decode", time.perf_counter() - started)
+
+        if payload["has_tasks"]:
+            tasks = payload["tasks"]
+        elif payload["project"] is not None:
+            # analyze-by-reference: score the tasks already stored for this project
+            tasks = Task.objects.for_project(payload["project"]).iter_task_dicts()
+        elif payload["snapshot"] is not None:
+            try:
+                tasks = get_snapshot(payload["snapshot"])
+            except FileNotFoundError:
+                return JsonResponse({"error": f"snapshot '{payload['snapshot']}' not found"}, status=404)
+            except (OSError, ValueError) as e:
+                return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+        else:
+            return HttpResponseBadRequest(json.dumps({"error": "tasks must be a list"}), content_type="application/json")
+        options = {name: payload[name] for name in ANALYZE_OPTIONS}
+
+    msgpack = _wants_msgpack(request)
+    if msgpack and not MSGPACK_AVAILABLE:
+        return JsonResponse({"error": "MessagePack output requires msgspec or msgpack to be installed"}, status=406)
+
+    client = client_id(request, create=True)
+    stream = _wants_stream(request)
+    cache = get_analysis_cache()
+    key = None
+    if isinstance(tasks, list) and not stream and not timings.enabled and not msgpack:
+        key = analysis_key(tasks, options["strategy"], options["weights"], options)
+        body = cache.get(key)
+        if body is not None:
+            suggestion = cache.peek(key + ":suggest")
+            if suggestion is not None:
+                get_result_store().put(client, suggestion)
+            elif _ranks_from_top(options["top_k"], options["cursor"], options["fields"]):
+                _remember_last(client, loads(body))
+            get_explain_store().point(client, key)
+            return HttpResponse(body, content_type="application/json")
+
     try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception as e:
-        return HttpResponseBadRequest(json.dumps({"error": "invalid json", "detail": str(e)}), content_type="application/json")
+        rows, meta, context = _analyze(
+            tasks,
+            strategy=options["strategy"],
+            custom_weights=options["weights"],
+            engine=options["engine"],
+            top_k=options["top_k"],
+            cursor=options["cursor"],
+            compare=options["compare"],
+            timings=timings,
+            hoist_weights=options["hoist_weights"],
+            components=options["components"],
+            fields=options["fields"],
+            as_of=options["as_of"],
+            aggregate_warnings=options["aggregate_warnings"],
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+    get_explain_store().remember(client, key or uuid.uuid4().hex, context)
+    # the analysis works from its table from here on: drop the decoded request before the
+    # output rows and the encoded body are built, so both do not add to its peak memory
+    tasks = payload = None
+    # only full rows from rank 1 on replace the client's suggestion; later pages and
+    # fields-restricted analyses leave the previous one in place
+    remember = _ranks_from_top(options["top_k"], options["cursor"], options["fields"])
+
+    if stream:
+        return StreamingHttpResponse(_stream_analysis(rows, meta, client, timings, remember), content_type=NDJSON_CONTENT_TYPE)
+
+    with timings.phase("output"):
+        result = {"analyzed_tasks": list(rows), "meta": meta}
+    encode, content_type = (dumps_msgpack, MSGPACK_CONTENT_TYPE) if msgpack else (_encode, "application/json")
+    if timings.enabled:
+        # the body carries everything up to encoding; the sink and the header also get "encode"
+        with timings.phase("encode"):
+            body = encode(dict(result, meta=dict(meta, timings=timings.as_meta())))
+    else:
+        body = encode(result)
+    if key is not None:
+        cache.set(key, body)
+    if remember:
+        suggestion = _remember_last(client, result)
+        if key is not None:
+            cache.set(key + ":suggest", suggestion)
+    response = HttpResponse(body, content_type=content_type)
+    if timings.enabled:
+        emit("analyze", timings)
+        response["Server-Timing"] = timings.server_timing()
+    return response
 
-    tasks = payload.get("tasks") or payload
-    if isinstance(tasks, dict) and "tasks" in tasks:
-        tasks = tasks["tasks"]
-    if not isinstance(tasks, list):
-        return HttpResponseBadRequest(json.dumps({"error": "tasks must be a list"}), content_type="application/json")
 
-    strategy = payload.get("strategy", "smart_balance")
-    weights = payload.get("weights")
+@csrf_exempt
+def analyze_batch_view(request):
+    """
+    POST /api/tasks/batch/
+    body: {"projects": {"name": [tasks], ...}, "strategy": "smart_balance", "weights": {...},
+           "engine": "auto", "top_k": 10, "workers": 4, "as_of": "2025-01-01"}
+    ("projects" may also be a list of {"name": ..., "tasks": [...]}).
+    Projects are analyzed in parallel worker processes; each entry of "results" is either
+    the analyze response of that project or {"error": ...}.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest(json.dumps({"error": "POST required"}), content_type="application/json")
+    try:
+        payload = _json_body(request)
+        if not isinstance(payload, dict) or "projects" not in payload:
+            raise ValueError("projects required")
+        workers = payload.get("workers")
+        if workers is not None and (not isinstance(workers, int) or workers < 1):
+            raise ValueError("workers must be a positive integer")
+        results, meta = analyze_batch(
+            payload["projects"],
+            strategy=payload.get("strategy", "smart_balance"),
+            custom_weights=payload.get("weights"),
+            engine=payload.get("engine", "auto"),
+            top_k=payload.get("top_k"),
+            workers=min(workers or default_workers(), default_workers()),
+            as_of=payload.get("as_of"),
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+    return HttpResponse(_encode({"results": results, "meta": meta}), content_type="application/json")
+
+
+def _payload_tasks(payload):
+    """
+    The task list of a JSON body, or the stored tasks of {"project": ...} without "tasks".
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("body must be an object")
+    if "tasks" not in payload and "project" in payload:
+        return Task.objects.for_project(payload["project"]).iter_task_dicts()
+    if not isinstance(payload.get("tasks"), list):
+        raise ValueError("tasks must be a list")
+    return payload["tasks"]
+
+
+@csrf_exempt
+def plan_tasks(request):
+    """
+    POST /api/tasks/plan/
+    body: {"tasks": [...], "strategy": "smart_balance", "weights": {...}, "engine": "auto", "top_k": 50,
+           "as_of": "2025-01-01"}
+    ({"project": "name"} without "tasks" plans the stored tasks of that project).
+    Returns the tasks in a dependency-respecting execution order (best-scored ready task first),
+    with transitive blocking counts, earliest start/slack in hours and the critical path.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest(json.dumps({"error": "POST required"}), content_type="application/json")
+    try:
+        payload = _json_body(request)
+        tasks = _payload_tasks(payload)
+        plan = build_plan(
+            tasks,
+            strategy=payload.get("strategy", "smart_balance"),
+            custom_weights=payload.get("weights"),
+            engine=payload.get("engine", "auto"),
+            top_k=payload.get("top_k"),
+            as_of=payload.get("as_of"),
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+    return HttpResponse(_encode(plan), content_type="application/json")
+
+
+@csrf_exempt
+def validate_tasks_view(request):
+    """
+    POST /api/tasks/validate/
+    body: {"tasks": [...]} or NDJSON (one task per line). Normalizes the tasks without scoring them
+    and reports {"valid", "total_tasks", "distinct_ids", "errors", "warnings"}, errors and warnings
+    aggregated by code (tasks/validation.py).
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest(json.dumps({"error": "POST required"}), content_type="application/json")
+    try:
+        if request.content_type == NDJSON_CONTENT_TYPE:
+            tasks = iter_ndjson_tasks(request, loads)
+        else:
+            payload = _json_body(request)
+            if not isinstance(payload, dict) or not isinstance(payload.get("tasks"), list):
+                raise ValueError("tasks must be a list")
+            tasks = payload["tasks"]
+        report = validate_tasks(tasks)
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+    return HttpResponse(_encode(report), content_type="application/json")
+
+
+@csrf_exempt
+def forecast_tasks(request):
+    """
+    POST /api/tasks/forecast/
+    body: {"tasks": [...], "days": 30, "as_of": "2025-01-01", "top_k": 10, "strategy": "smart_balance",
+           "weights": {...}, "engine": "auto", "components": {...}}
+    ({"project": "name"} without "tasks" uses the stored tasks). Returns the top_k ranking of every
+    day from as_of (default today) on, each equal to an analysis with that as_of.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest(json.dumps({"error": "POST required"}), content_type="application/json")
+    try:
+        payload = _json_body(request)
+        tasks = _payload_tasks(payload)
+        result = forecast_scores(
+            tasks,
+            days=payload.get("days", DEFAULT_FORECAST_DAYS),
+            strategy=payload.get("strategy", "smart_balance"),
+            custom_weights=payload.get("weights"),
+            engine=payload.get("engine", "auto"),
+            as_of=payload.get("as_of"),
+            top_k=payload.get("top_k", 10),
+            components=payload.get("components"),
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+    return HttpResponse(_encode(result), content_type="application/json")
+
+
+@csrf_exempt
+def simulate_tasks(request):
+    """
+    POST /api/tasks/simulate/
+    body: {"tasks": [...], "scenarios": [{"name": "slip", "overlays": [{"id": "t3", "delay_days": 7}, ...]}, ...],
+           "as_of": "2025-01-01", "strategy": "smart_balance", "weights": {...}, "engine": "auto", "max_changes": 50}
+    ({"project": "name"} without "tasks" uses the stored tasks). Scores the tasks once and returns,
+    per scenario, the tasks whose score and rank the overlays change (see simulation.py).
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest(json.dumps({"error": "POST required"}), content_type="application/json")
+    try:
+        payload = _json_body(request)
+        tasks = _payload_tasks(payload)
+        result = simulate_scenarios(
+            tasks,
+            payload.get("scenarios"),
+            strategy=payload.get("strategy", "smart_balance"),
+            custom_weights=payload.get("weights"),
+            engine=payload.get("engine", "auto"),
+            as_of=payload.get("as_of"),
+            max_changes=payload.get("max_changes", DEFAULT_MAX_CHANGES),
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+    return HttpResponse(_encode(result), content_type="application/json")
+
 
-    result = calculate_scores(tasks, strategy=strategy, custom_weights=weights)
-    LAST_ANALYSIS["result"] = result
-    return JsonResponse(result, safe=False)
+@csrf_exempt
+def optimize_plan(request):
+    """
+    POST /api/tasks/optimize/
+    body: {"tasks": [...], "hours_per_day": 6, "days": 3, "strategy": "smart_balance", "weights": {...},
+           "engine": "auto", "method": "auto", "time_budget_ms": 200, "as_of": "2025-01-01"}
+    (hours_per_day may also be a list with one budget per day; {"project": "name"} without
+    "tasks" uses the stored tasks). Returns, per day, the highest-scoring set of tasks that fits
+    the budget with every task after its dependencies.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest(json.dumps({"error": "POST required"}), content_type="application/json")
+    try:
+        payload = _json_body(request)
+        tasks = _payload_tasks(payload)
+        if "hours_per_day" not in payload:
+            raise ValueError("hours_per_day required")
+        result = optimize_days(
+            tasks,
+            payload["hours_per_day"],
+            days=payload.get("days"),
+            strategy=payload.get("strategy", "smart_balance"),
+            custom_weights=payload.get("weights"),
+            engine=payload.get("engine", "auto"),
+            method=payload.get("method", "auto"),
+            time_budget_ms=payload.get("time_budget_ms", DEFAULT_TIME_BUDGET_MS),
+            as_of=payload.get("as_of"),
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+    return HttpResponse(_encode(result), content_type="application/json")
 
 
 def suggest_tasks(request):
     """
     GET /api/tasks/suggest/?strategy=...
-    Returns top 3 tasks from last analysis (if any).
+    Returns top 3 tasks from this client's last analysis (if any), as stored in the result
+    store (tasks/results.py): with a shared backend any worker process can answer.
     """
     if request.method != "GET":
         return HttpResponseBadRequest(json.dumps({"error": "GET required"}), content_type="application/json")
 
-    result = LAST_ANALYSIS.get("result")
-    if not result:
+    client = client_id(request)
+    suggestion = get_result_store().get(client) if client is not None else None
+    if suggestion is None:
         return JsonResponse({"error": "No analyzed tasks found. POST to /api/tasks/analyze/ first."}, status=400)
-    
-    top3 = result.get("analyzed_tasks", [])[:3]
-    return JsonResponse({"suggested_tasks": top3, "meta": result.get("meta")})
+    return HttpResponse(suggestion, content_type="application/json")
+
+
+def explain_task(request, task_id):
+    """
+    GET /api/tasks/<id>/explain/
+    Full score breakdown of one task from this client's last analysis (served by this worker
+    process): rank, every component's value, weight and contribution, the inputs they came
+    from, the explanation, warnings and cycles. Works after a "fields"-restricted analysis.
+    """
+    if request.method != "GET":
+        return HttpResponseBadRequest(json.dumps({"error": "GET required"}), content_type="application/json")
+    client = client_id(request)
+    context = get_explain_store().lookup(client) if client is not None else None
+    if context is None:
+        return JsonResponse({"error": "No analysis to explain. POST to /api/tasks/analyze/ first."}, status=404)
+    detail = context.explain(task_id)
+    if detail is None:
+        return JsonResponse({"error": f"task '{task_id}' is not in the last analysis"}, status=404)
+    return HttpResponse(_encode(detail), content_type="application/json")
+
+
+def _store_last(request, suggestion):
+    if suggestion is not None:
+        get_result_store().put(client_id(request, create=True), suggestion)
+
+
+def _stored_task_list(project):
+    return list(Task.objects.for_project(project).iter_task_dicts())
+
+
+@csrf_exempt
+async def analyze_tasks_async(request):
+    """
+    POST /api/tasks/async/analyze/
+    Same JSON body and response as analyze_tasks (also ?format=msgpack), for ASGI servers.
+    Scoring runs in the admission queue's executor (tasks/admission.py), so the event loop keeps
+    serving other requests meanwhile; returns 503 with Retry-After when the queue is full.
+    NDJSON bodies, snapshots, streaming and debug_timing are only served by the sync view,
+    and results are not cached.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest(json.dumps({"error": "POST required"}), content_type="application/json")
+    msgpack = _wants_msgpack(request)
+    if msgpack and not MSGPACK_AVAILABLE:
+        return JsonResponse({"error": "MessagePack output requires msgspec or msgpack to be installed"}, status=406)
+
+    queue = get_admission_queue()
+    try:
+        outcome = await run_analysis(queue, request.body, msgpack=msgpack)
+        if outcome[0] == "project":
+            tasks = await sync_to_async(_stored_task_list)(outcome[1])
+            outcome = await run_analysis(queue, request.body, tasks, msgpack)
+    except Overloaded as e:
+        response = JsonResponse({"error": "analysis queue is full, retry later"}, status=503)
+        response["Retry-After"] = str(e.retry_after)
+        return response
+    except DecodeError as e:
+        return HttpResponseBadRequest(json.dumps({"error": "invalid json", "detail": str(e)}), content_type="application/json")
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+
+    _, body, suggestion = outcome
+    await sync_to_async(_store_last)(request, suggestion)
+    return HttpResponse(body, content_type=MSGPACK_CONTENT_TYPE if msgpack else "application/json")
+
+
+async def suggest_tasks_async(request):
+    """
+    GET /api/tasks/async/suggest/
+    suggest_tasks for ASGI servers; does not wait behind analyses running in the admission queue.
+    """
+    return await sync_to_async(suggest_tasks)(request)
+
+
+def metrics(request):
+    """
+    GET /api/tasks/metrics/
+    Latency histograms of this process in Prometheus text format. Only served to the
+    addresses in settings.TASK_METRICS_ALLOWED_IPS (loopback by default).
+    """
+    if request.META.get("REMOTE_ADDR") not in getattr(settings, "TASK_METRICS_ALLOWED_IPS", ("127.0.0.1", "::1")):
+        return JsonResponse({"error": "metrics are only served locally"}, status=403)
+    if request.method != "GET":
+        return HttpResponseBadRequest(json.dumps({"error": "GET required"}), content_type="application/json")
+    return HttpResponse(histograms.render(HELP_TEXTS), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def cache_stats(request):
+    """
+    GET /api/tasks/cache/stats/
+    Hit/miss counters of the analysis result cache (this worker process).
+    """
+    return JsonResponse(get_analysis_cache().stats())
+
+
+def _json_body(request):
+    try:
+        return loads(request.body or b"{}")
+    except ValueError as e:
+        raise ValueError(f"invalid json: {e}")
+
+
+def _normalize_for_store(tasks):
+    """
+    Coerces incoming tasks with the scoring normalizer so stored rows are always clean.
+    Every task must carry an explicit id. Returns (normalized, warnings).
+    """
+    for t in tasks:
+        if not isinstance(t, dict) or not isinstance(t.get("id"), str) or not t["id"]:
+            raise ValueError("every stored task needs a string 'id'")
+        if len(t["id"]) > 100:
+            raise ValueError(f"task id '{t['id'][:20]}...' is longer than 100 characters")
+    warnings_map = TaskWarnings()
+    # unknown dependencies are fine in the store (they may be inserted later), so only field coercion is checked
+    normalized = [_normalize_task(t, i, warnings_map) for i, t in enumerate(tasks)]
+    for t in normalized:
+        t["title"] = str(t["title"])[:400]
+    return normalized, warnings_map
+
+
+@csrf_exempt
+def task_store(request):
+    """
+    GET  /api/tasks/store/?project=default   list stored tasks
+    POST /api/tasks/store/?project=default   create or replace one task (body: task object)
+    """
+    project = request.GET.get("project", "default")
+    if request.method == "GET":
+        tasks = list(Task.objects.for_project(project).iter_task_dicts())
+        return JsonResponse({"project": project, "tasks": tasks})
+    if request.method != "POST":
+        return HttpResponseBadRequest(json.dumps({"error": "GET or POST required"}), content_type="application/json")
+
+    try:
+        normalized, warnings = _normalize_for_store([_json_body(request)])
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+    created, _ = Task.objects.bulk_upsert(project, normalized)
+    task = Task.objects.for_project(project).get(external_id=normalized[0]["id"])
+    return JsonResponse(
+        {"task": task.to_task_dict(), "warnings": warnings.get(task.external_id, [])},
+        status=201 if created else 200,
+    )
+
+
+@csrf_exempt
+def task_store_detail(request, task_id):
+    """
+    GET    /api/tasks/store/<task_id>/?project=default
+    PUT    /api/tasks/store/<task_id>/   replace the task
+    PATCH  /api/tasks/store/<task_id>/   update the given fields only
+    DELETE /api/tasks/store/<task_id>/
+    """
+    project = request.GET.get("project", "default")
+    task = Task.objects.for_project(project).filter(external_id=task_id).first()
+    if task is None:
+        return JsonResponse({"error": f"task '{task_id}' not found in project '{project}'"}, status=404)
+
+    if request.method == "GET":
+        return JsonResponse({"task": task.to_task_dict()})
+    if request.method == "DELETE":
+        task.delete()
+        return JsonResponse({"deleted": task_id})
+    if request.method not in ("PUT", "PATCH"):
+        return HttpResponseBadRequest(json.dumps({"error": "GET, PUT, PATCH or DELETE required"}), content_type="application/json")
+
+    try:
+        body = _json_body(request)
+        if not isinstance(body, dict):
+            raise ValueError("task must be an object")
+        data = dict(task.to_task_dict(), **body) if request.method == "PATCH" else dict(body)
+        data["id"] = task_id
+        normalized, warnings = _normalize_for_store([data])
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+    Task.objects.bulk_upsert(project, normalized)
+    task.refresh_from_db()
+    return JsonResponse({"task": task.to_task_dict(), "warnings": warnings.get(task_id, [])})
+
+
+@csrf_exempt
+def task_store_bulk(request):
+    """
+    POST /api/tasks/store/bulk/
+    body: {"project": "default", "tasks": [...]}
+    Upserts by task id with bulk_create/bulk_update in batches.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest(json.dumps({"error": "POST required"}), content_type="application/json")
+    try:
+        payload = _json_body(request)
+        if not isinstance(payload, dict) or not isinstance(payload.get("tasks"), list):
+            raise ValueError("tasks must be a list")
+        normalized, warnings = _normalize_for_store(payload["tasks"])
+    except ValueError as e:
+        return HttpResponseBadRequest(json.dumps({"error": str(e)}), content_type="application/json")
+
+    project = payload.get("project", "default")
+    created, updated = Task.objects.bulk_upsert(project, normalized)
+    return JsonResponse(
+        {
+            "project": project,
+            "created": created,
+            "updated": updated,
+            "warnings_summary": [{"task_id": tid, "warnings": msgs} for tid, msgs in warnings.items()],
+        }
+    )